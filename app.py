@@ -1,32 +1,120 @@
-from flask import Flask, render_template, redirect, url_for, request, jsonify
+from flask import Blueprint, Flask, abort, current_app, render_template, redirect, url_for, request, jsonify, send_file, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy.orm import Session
-from datetime import timedelta, datetime
+from werkzeug.security import generate_password_hash, check_password_hash, safe_join
+from werkzeug.http import is_resource_modified
+from sqlalchemy import select, update, insert, delete, tuple_, event, bindparam, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, make_transient_to_detached
+from datetime import timedelta, datetime, time, timezone
 from flask_migrate import Migrate
 from dotenv import load_dotenv
+from jinja2 import FileSystemBytecodeCache
+from event_cache import EventCache
+from user_cache import UserCache
+from product_catalog import CatalogProduct, ProductCatalog
+from intervals import IntervalIndex, merge_intervals, subtract_intervals
+from assignment import plan_assignments
+from recurrence import expand_recurrence
+from database import configure_database, install_sqlite_pragmas
+from metrics import instrument_app, render_metrics
+from streaming import compress_chunks, dumps, iter_json_array, negotiate_encoding
+import archive
+import assets
+import calendar_feeds
+import fulltext
+import job_queue
+import rollups
+import base64
+import click
+import functools
+import heapq
+import hmac
+import itertools
+import json
+import math
+import mimetypes
 import os
 
-# Initialize Flask app
-app = Flask(__name__, static_folder='static', static_url_path='/static')
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Configuration settings
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')  # Suggest using an environment variable for SECRET_KEY
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///car_audio.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = True
-
-# Initialize database and migration tools
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+# Extensions are created unbound and attached to each application by create_app
+db = SQLAlchemy()
+migrate = Migrate(db=db, include_object=fulltext.include_object)
 
 # Set up Flask-Login for user session management
 login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'login'
+login_manager.login_view = 'main.index'  # Login pages are per role; the index links to each of them
+
+# Routes and commands; create_app registers them on the application
+bp = Blueprint('main', __name__, cli_group=None)
+
+# Build the application. Only configuration and wiring happen here: nothing reads the
+# database, so startup takes the same time however much data there is (see
+# benchmarks/startup_benchmark.py). `config` overrides the settings below, e.g. in tests.
+def create_app(config=None):
+    app = Flask(__name__, static_folder='static', static_url_path='/static')
+
+    # Load environment variables from .env file
+    load_dotenv()
+
+    # Configuration settings
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')  # Suggest using an environment variable for SECRET_KEY
+    configure_database(app)  # Database URI, pool and SQLite settings come from the environment, see database.py
+    app.config['EVENTS_CACHE_SIZE'] = 128  # Number of date windows kept per process
+    app.config['EVENTS_STREAM_BATCH_SIZE'] = 500  # Appointments read and sent per chunk by /events?stream=1
+    app.config['USER_CACHE_SIZE'] = 1024  # Number of logged-in users kept per process
+    app.config['USER_CACHE_TTL_SECONDS'] = 30  # How long another worker may keep serving a changed user
+    app.config['PRODUCT_CATALOG_TTL_SECONDS'] = 300  # How long another worker may miss a newly added product
+    app.config['SYNC_OVERLAP_SECONDS'] = 5  # Re-send changes this close to the cursor to cover in-flight commits
+    app.config['SYNC_TOMBSTONE_DAYS'] = 30  # Clients with older cursors must do a full refetch
+    app.config['BUSINESS_HOURS'] = (8, 18)  # Shop opening and closing hour, matching the calendar slots
+    app.config['BUSINESS_DAYS'] = (0, 1, 2, 3, 4, 5)  # Monday through Saturday
+    app.config['SKILL_LEVELS'] = ('beginner', 'intermediate', 'advanced', 'expert')  # Lowest to highest
+    app.config['INSTALL_TYPE_SKILLS'] = {'standard': 'beginner', 'check': 'beginner', 'custom': 'advanced'}  # Minimum skill per install type
+    app.config['BULK_SCHEDULE_LIMIT'] = 1000  # Most appointments one bulk or recurring request may create
+    app.config['SLOW_QUERY_MS'] = int(os.getenv('SLOW_QUERY_MS', 100))  # Log SQL statements slower than this, tagged by endpoint
+    app.config['SERVER_TIMING'] = bool(os.getenv('SERVER_TIMING'))  # Send Server-Timing headers outside debug mode too
+    app.config['JOB_SENDER'] = os.getenv('JOB_SENDER', 'log')  # 'log', 'file:<path>' or 'module:provider', see job_queue.load_sender
+    app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 2))  # Worker processes started by `flask run-jobs`
+    app.config['JOB_POLL_SECONDS'] = 1.0  # How long an idle worker waits before looking for due jobs again
+    app.config['JOB_LEASE_SECONDS'] = 300  # A running job not finished by then is assumed lost and run again
+    app.config['JOB_MAX_ATTEMPTS'] = 5
+    app.config['JOB_RETRY_SECONDS'] = (30, 3600)  # First retry delay, doubling up to the second value
+    app.config['JOB_RETENTION_DAYS'] = 7  # Finished jobs are deleted after this; failed ones are kept
+    app.config['REMINDER_LEAD_HOURS'] = 24  # Customers are reminded this long before their appointment
+    app.config['DAILY_REPORT_HOUR'] = 6  # Local hour at which the previous day's report is sent
+    app.config['DAILY_REPORT_RECIPIENT'] = os.getenv('DAILY_REPORT_RECIPIENT', 'manager')
+    app.config['ARCHIVE_AFTER_DAYS'] = int(os.getenv('ARCHIVE_AFTER_DAYS', 365))  # `flask archive-appointments` moves older appointments out of the hot tables
+    app.config['ARCHIVE_BATCH_SIZE'] = 1000  # Appointments moved per transaction
+    app.config['ASSET_MAX_AGE_SECONDS'] = 365 * 24 * 3600  # Fingerprinted assets never change under the same URL
+    app.config['TEMPLATE_CACHE_DIR'] = os.getenv('TEMPLATE_CACHE_DIR', os.path.join(app.instance_path, 'jinja_cache'))
+    app.config['FEED_PAST_DAYS'] = 30  # Calendar feeds include appointments that ended up to this many days ago, and all upcoming ones
+    app.config['FEED_CACHE_SIZE'] = 64  # Number of serialized calendar feeds kept per process
+    app.config['FEED_REFRESH_MINUTES'] = 15  # Poll interval suggested to calendar apps
+    app.config['FEED_UID_DOMAIN'] = os.getenv('FEED_UID_DOMAIN', 'car-audio-scheduler')  # Right-hand side of event UIDs; keep it stable
+    app.config.update(config or {})
+
+    # Compiled templates are kept on disk, so the first request after a restart skips compiling them
+    os.makedirs(app.config['TEMPLATE_CACHE_DIR'], exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_DIR'])}
+
+    # Initialize database and migration tools
+    db.init_app(app)
+    with app.app_context():
+        install_sqlite_pragmas(db.engine)
+        instrument_app(app, db.engine)
+    migrate.init_app(app)
+    login_manager.init_app(app)
+
+    # Per-process caches, reached through events_cache(), user_cache(), product_catalog() and feed_cache()
+    app.extensions['events_cache'] = EventCache(app.config['EVENTS_CACHE_SIZE'])
+    app.extensions['user_cache'] = UserCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL_SECONDS'])
+    app.extensions['product_catalog'] = ProductCatalog(load_product_catalog, app.config['PRODUCT_CATALOG_TTL_SECONDS'])
+    app.extensions['feed_cache'] = EventCache(app.config['FEED_CACHE_SIZE'])
+    # Debug servers link the plain static files, so edits show up without a build
+    app.extensions['asset_manifest'] = {} if app.debug else assets.load_manifest(app.static_folder)
+
+    app.register_blueprint(bp)
+    return app
 
 # User model representing a system user (e.g., admin, salesperson)
 class User(UserMixin, db.Model):
@@ -35,6 +123,9 @@ class User(UserMixin, db.Model):
     password = db.Column(db.String(150), nullable=False)
     role = db.Column(db.String(50), nullable=False)
 
+    # Case-insensitive prefix search and keyset paging for the manager dashboard
+    __table_args__ = (db.Index('ix_user_username_nocase', username.collate('NOCASE')),)
+
     # Hash the password before saving
     def set_password(self, password):
         self.password = generate_password_hash(password)
@@ -43,10 +134,26 @@ class User(UserMixin, db.Model):
     def check_password(self, password):
         return check_password_hash(self.password, password)
 
-# Load the current user from the session
+# Logged-in users kept per process
+def user_cache():
+    return current_app.extensions['user_cache']
+
+# Load the current user from the session.
+# Runs on every authenticated request, so users are cached per process; a cache hit is
+# rebuilt as a detached User that carries the cached columns without touching the database.
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    values = user_cache().get(user_id)
+    if values is not None:
+        user = User(**values)
+        make_transient_to_detached(user)
+        return user
+
+    user = db.session.get(User, user_id)
+    if user is not None:
+        user_cache().put(user_id, {'id': user.id, 'username': user.username, 'role': user.role})
+    return user
 
 # Customer model storing customer details
 class Customer(db.Model):
@@ -54,10 +161,13 @@ class Customer(db.Model):
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     phone_number = db.Column(db.String(15), nullable=False)
+    phone_normalized = db.Column(db.String(15), unique=True, index=True)  # Digits only; NULL when no usable phone
     vehicles = db.relationship('Vehicle', backref='owner', lazy=True)
     appointments = db.relationship('Appointment', backref='customer', lazy=True)
     comments = db.Column(db.Text)
 
+    __table_args__ = (db.Index('ix_customer_last_name_nocase', last_name.collate('NOCASE')),)
+
 # Vehicle model representing a customer's vehicle
 class Vehicle(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -65,13 +175,13 @@ class Vehicle(db.Model):
     make = db.Column(db.String(50), nullable=False)
     model = db.Column(db.String(50), nullable=False)
     color = db.Column(db.String(20))
-    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False, index=True)
     appointments = db.relationship('Appointment', backref='vehicle', lazy=True)
 
 # Product model storing product details related to installations
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, unique=True, index=True)  # Bookings find or create products by name
     type = db.Column(db.String(50), nullable=False)
     price = db.Column(db.Float, nullable=False)
     serial_number = db.Column(db.String(100))
@@ -90,28 +200,166 @@ class Appointment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     start_time = db.Column(db.DateTime, nullable=False)
     end_time = db.Column(db.DateTime, nullable=False)
-    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
-    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), nullable=False)
+    # Foreign keys are indexed so the search triggers can find a customer's, vehicle's or product's appointments
+    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False, index=True)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), nullable=False, index=True)
     installer_id = db.Column(db.Integer, db.ForeignKey('installer.id'), nullable=True)
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
     install_type = db.Column(db.String(50), nullable=False)
     comments = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # Bumped by every write; edits and moves only apply if the version the client saw is still current
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     product = db.relationship('Product', back_populates='appointments', lazy=True)
     installer = db.relationship('Installer', back_populates='appointments', lazy=True)
     installation_jobs = db.relationship('InstallationJob', back_populates='appointment', lazy=True)
 
+    # Composite indexes so calendar window lookups can range-scan either bound.
+    # AUTOINCREMENT keeps the ids of archived appointments from being handed out again.
+    __table_args__ = (
+        db.Index('ix_appointment_start_end', 'start_time', 'end_time'),
+        db.Index('ix_appointment_end_start', 'end_time', 'start_time'),
+        db.Index('ix_appointment_installer_start_end', 'installer_id', 'start_time', 'end_time'),
+        {'sqlite_autoincrement': True},
+    )
+
 # InstallationJob model storing details about specific installation tasks within an appointment
 class InstallationJob(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     job_details = db.Column(db.String(200), nullable=False)
     price = db.Column(db.Float, nullable=False)
-    appointment_id = db.Column(db.Integer, db.ForeignKey('appointment.id'), nullable=False)
+    appointment_id = db.Column(db.Integer, db.ForeignKey('appointment.id'), nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     appointment = db.relationship('Appointment', back_populates='installation_jobs', lazy=True)
 
+# Past appointment moved out of the hot table by `flask archive-appointments`, see archive.py.
+# Same columns and id as the original; archived appointments are read-only.
+class ArchivedAppointment(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False, index=True)
+    vehicle_id = db.Column(db.Integer, db.ForeignKey('vehicle.id'), nullable=False, index=True)
+    installer_id = db.Column(db.Integer, db.ForeignKey('installer.id'), nullable=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
+    install_type = db.Column(db.String(50), nullable=False)
+    comments = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_archived_appointment_start_end', 'start_time', 'end_time'),
+        db.Index('ix_archived_appointment_end_start', 'end_time', 'start_time'),
+        db.Index('ix_archived_appointment_installer_start_end', 'installer_id', 'start_time', 'end_time'),
+    )
+
+# Installation job of an archived appointment
+class ArchivedInstallationJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    job_details = db.Column(db.String(200), nullable=False)
+    price = db.Column(db.Float, nullable=False)
+    appointment_id = db.Column(db.Integer, db.ForeignKey('archived_appointment.id'), nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+# Tombstone left behind when an appointment is deleted, so syncing clients can drop it
+class DeletedAppointment(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    appointment_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+# Single-row counter bumped on every appointment write, shared by all worker processes
+class CalendarState(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+# Change counter of each installer's calendar feed, kept current by the triggers in calendar_feeds.py
+class CalendarFeedState(db.Model):
+    installer_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # 0 for unassigned appointments
+    version = db.Column(db.Integer, nullable=False, default=1)
+    changed_at = db.Column(db.DateTime, nullable=False)  # UTC
+
+# Revenue and workload per day, installer and product type, kept current by the triggers in rollups.py
+class DailyRollup(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    installer_id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # 0 for unassigned appointments
+    product_type = db.Column(db.String(50), primary_key=True)
+    appointments = db.Column(db.Integer, nullable=False, default=0)
+    hours = db.Column(db.Float, nullable=False, default=0)
+    product_revenue = db.Column(db.Float, nullable=False, default=0)
+    job_revenue = db.Column(db.Float, nullable=False, default=0)
+
+# Background job queued by a request and run by `flask run-jobs`, see job_queue.py
+class BackgroundJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text)  # JSON arguments for the handler
+    key = db.Column(db.String(100), unique=True)  # Queuing the same key again reschedules the job
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending, running, done or failed
+    run_at = db.Column(db.DateTime, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    locked_until = db.Column(db.DateTime)  # Lease of the worker running the job
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    finished_at = db.Column(db.DateTime)
+
+    # Workers look for due jobs by status and time
+    __table_args__ = (db.Index('ix_background_job_status_run_at', 'status', 'run_at'),)
+
+# Serialized /events payloads for recently requested date windows
+def events_cache():
+    return current_app.extensions['events_cache']
+
+# Product catalog shared by booking lookups and the /products typeahead
+def load_product_catalog():
+    return [CatalogProduct(*row) for row in db.session.execute(select(Product.id, Product.name, Product.type, Product.price))]
+
+def product_catalog():
+    return current_app.extensions['product_catalog']
+
+# Serialized iCalendar feeds, keyed by feed name
+def feed_cache():
+    return current_app.extensions['feed_cache']
+
+# Writers flag new products on the session; the catalog is reloaded once they are committed,
+# and also after a rollback in case the snapshot was loaded while the rows were pending
+@event.listens_for(db.session, 'after_commit')
+@event.listens_for(db.session, 'after_rollback')
+def invalidate_product_catalog(session):
+    if session.info.pop('products_changed', False):
+        product_catalog().invalidate()
+
+# Bump the calendar version in the current transaction so cached event feeds go stale on commit
+def mark_calendar_changed():
+    updated = db.session.execute(
+        update(CalendarState).where(CalendarState.id == 1).values(version=CalendarState.version + 1)
+    ).rowcount
+    if not updated:
+        db.session.add(CalendarState(id=1, version=1))
+
+# Take the write lock for a booking before its conflict check, so the check and the write run
+# in one write transaction and two concurrent bookings are checked one after the other instead
+# of both passing. Bumping the calendar version is the write every booking makes anyway, and
+# SQLite allows one write transaction at a time.
+def lock_bookings():
+    mark_calendar_changed()
+    db.session.flush()
+
+# Record a tombstone for a deleted appointment and prune ones no client can still need
+def record_appointment_deleted(appointment_id):
+    db.session.add(DeletedAppointment(appointment_id=appointment_id))
+    horizon = datetime.utcnow() - timedelta(days=current_app.config['SYNC_TOMBSTONE_DAYS'])
+    DeletedAppointment.query.filter(DeletedAppointment.deleted_at < horizon).delete()
+
+# Current calendar version (0 until the first appointment write)
+def current_calendar_version():
+    return db.session.execute(select(CalendarState.version).where(CalendarState.id == 1)).scalar() or 0
+
 # Route for user registration
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     message = None
     if request.method == 'POST':
@@ -128,12 +376,13 @@ def register():
             new_user.set_password(password)
             db.session.add(new_user)
             db.session.commit()
+            user_cache().invalidate(new_user.id)  # SQLite may reuse the id of a deleted user
             message = "User Created Successfully"
     
     return render_template('register.html', message=message)
 
 # Route for user login with role-based redirection
-@app.route('/login/<role>', methods=['GET', 'POST'])
+@bp.route('/login/<role>', methods=['GET', 'POST'])
 def login(role):
     if request.method == 'POST':
         username = request.form.get('username')
@@ -143,53 +392,200 @@ def login(role):
         # Validate user credentials and role
         if user and user.check_password(password) and user.role == role.capitalize():
             login_user(user)
-            return redirect(url_for(f'{role}_dashboard'))
+            return redirect(url_for(f'.{role}_dashboard'))
         else:
             return "Invalid username, password, or role"
     
     return render_template(f'login_{role}.html')
 
 # Route for user logout
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
     logout_user()
-    return redirect(url_for('login'))
+    return redirect(url_for('.login'))
 
 # General dashboard accessible after login
-@app.route('/dashboard')
+@bp.route('/dashboard')
 @login_required
 def dashboard():
     return f"Welcome {current_user.username}! You are logged in as {current_user.role}."
 
 # Route for Sales Dashboard
-@app.route('/sales_dashboard')
+@bp.route('/sales_dashboard')
 @login_required
 def sales_dashboard():
     return "Welcome to the Sales Dashboard!"
 
 # Route for Installation Dashboard
-@app.route('/installation_dashboard')
+@bp.route('/installation_dashboard')
 @login_required
 def installation_dashboard():
     return "Welcome to the Installation Dashboard!"
 
 # Manager-specific dashboard with user and appointment management
-@app.route('/manager_dashboard', methods=['GET', 'POST'])
+@bp.route('/manager_dashboard', methods=['GET', 'POST'])
 @login_required
 def manager_dashboard():
     if current_user.role != 'Manager':
         return "Access Denied", 403
-    
-    users = User.query.all()
-    customers = Customer.query.all()
-    appointments = Appointment.query.all()
 
     if request.method == 'POST':
         handle_manager_form_submission(request.form)
-        return redirect(url_for('manager_dashboard'))
+        return redirect(url_for('.manager_dashboard'))
+
+    # Users, customers and appointments are loaded on demand from the JSON endpoints below
+    return render_template('manager_dashboard.html')
+
+# Upper bound that turns `col >= prefix AND col < prefix + PREFIX_END` into an indexed prefix match
+PREFIX_END = '\U0010ffff'
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+# Opaque keyset cursor: the sort key of the last row on the previous page
+def encode_cursor(values):
+    raw = json.dumps(values, default=lambda value: value.isoformat())
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(token, parsers):
+    values = json.loads(base64.urlsafe_b64decode(token.encode()))
+    if not isinstance(values, list) or len(values) != len(parsers):
+        raise ValueError('Malformed cursor')
+    return [parse(value) for parse, value in zip(parsers, values)]
+
+# Return one page of `query` ordered by `keys`, continuing after the request's `after` cursor.
+# Seeking past the previous page's last key keeps every page an index range scan,
+# so deep pages cost the same as the first one. `archive` is an optional second
+# (query, keys) pair with the same columns whose rows are merged into the page.
+def keyset_page(query, keys, parsers, row_key, serialize, descending=False):
+    try:
+        limit = min(max(int(request.args.get('limit', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        after = request.args.get('after')
+        last = tuple_(*decode_cursor(after, parsers)) if after else None
+    except (ValueError, TypeError):
+        return jsonify({'status': 'error', 'message': 'Invalid paging parameters'}), 400
+
+    def page(query, keys):
+        if last is not None:
+            query = query.where(tuple_(*keys) < last if descending else tuple_(*keys) > last)
+        order = [key.desc() for key in keys] if descending else keys
+        return db.session.execute(query.order_by(*order).limit(limit + 1)).all()
+
+    rows = page(query, keys)
+    next_cursor = encode_cursor(list(row_key(rows[limit - 1]))) if len(rows) > limit else None
+    return jsonify({'status': 'success', 'items': [serialize(row) for row in rows[:limit]], 'next': next_cursor})
+
+# Typeahead: users by username prefix
+@bp.route('/manager_dashboard/users')
+@login_required
+def manager_users():
+    if current_user.role != 'Manager':
+        return jsonify({'status': 'error', 'message': 'Access Denied'}), 403
+
+    prefix = request.args.get('q', '').strip()
+    username = User.username.collate('NOCASE')
+    query = select(User.id, User.username, User.role)
+    if prefix:
+        query = query.where(username >= prefix, username < prefix + PREFIX_END)
+    return keyset_page(
+        query, [username, User.id], [str, int],
+        lambda row: (row.username, row.id),
+        lambda row: {'id': row.id, 'username': row.username, 'role': row.role}
+    )
+
+# Typeahead: customers by last name prefix, or by phone prefix when the query is numeric
+@bp.route('/manager_dashboard/customers')
+@login_required
+def manager_customers():
+    if current_user.role != 'Manager':
+        return jsonify({'status': 'error', 'message': 'Access Denied'}), 403
+
+    prefix = request.args.get('q', '').strip()
+    digits = ''.join(ch for ch in prefix if ch.isdigit())
+    query = select(Customer.id, Customer.first_name, Customer.last_name, Customer.phone_number, Customer.phone_normalized)
+    if digits and not any(ch.isalpha() for ch in prefix):
+        query = query.where(Customer.phone_normalized >= digits, Customer.phone_normalized < digits + PREFIX_END)
+        keys, parsers, row_key = [Customer.phone_normalized, Customer.id], [str, int], lambda row: (row.phone_normalized, row.id)
+    else:
+        last_name = Customer.last_name.collate('NOCASE')
+        if prefix:
+            query = query.where(last_name >= prefix, last_name < prefix + PREFIX_END)
+        keys, parsers, row_key = [last_name, Customer.id], [str, int], lambda row: (row.last_name, row.id)
+    return keyset_page(
+        query, keys, parsers, row_key,
+        lambda row: {
+            'id': row.id,
+            'first_name': row.first_name,
+            'last_name': row.last_name,
+            'phone_number': row.phone_number
+        }
+    )
+
+# Typeahead: appointments, newest first, optionally by id or by day/month (YYYY-MM-DD or YYYY-MM).
+# It feeds the delete picker, so archived appointments (history, not bookings) are left out.
+@bp.route('/manager_dashboard/appointments')
+@login_required
+def manager_appointments():
+    if current_user.role != 'Manager':
+        return jsonify({'status': 'error', 'message': 'Access Denied'}), 403
+
+    search = request.args.get('q', '').strip()
+    query = (
+        select(Appointment.id, Appointment.start_time, Appointment.end_time, Customer.first_name, Customer.last_name)
+        .join(Customer, Appointment.customer_id == Customer.id)
+    )
+    if search.isdigit():
+        query = query.where(Appointment.id == int(search))
+    elif search:
+        try:
+            day = datetime.strptime(search, '%Y-%m-%d')
+            range_start, range_end = day, day + timedelta(days=1)
+        except ValueError:
+            try:
+                range_start = datetime.strptime(search, '%Y-%m')
+            except ValueError:
+                return jsonify({'status': 'success', 'items': [], 'next': None})
+            range_end = (range_start + timedelta(days=32)).replace(day=1)
+        query = query.where(Appointment.start_time >= range_start, Appointment.start_time < range_end)
+    return keyset_page(
+        query, [Appointment.start_time, Appointment.id], [datetime.fromisoformat, int],
+        lambda row: (row.start_time, row.id),
+        lambda row: {
+            'id': row.id,
+            'start': row.start_time.isoformat(),
+            'end': row.end_time.isoformat(),
+            'customer': f'{row.first_name} {row.last_name}'
+        },
+        descending=True
+    )
+
+# Reports: appointments, hours and revenue per installer, product type or day, read from the
+# precomputed rollups, so the cost depends on the number of days and not on the booking history.
+# start/end are YYYY-MM-DD days (end exclusive) and default to the last 30 days.
+@bp.route('/manager_dashboard/reports/<group>')
+@login_required
+def manager_report(group):
+    if current_user.role != 'Manager':
+        return jsonify({'status': 'error', 'message': 'Access Denied'}), 403
+    if group not in rollups.REPORT_GROUPS:
+        return jsonify({'status': 'error', 'message': 'Unknown report'}), 404
+
+    try:
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') \
+            else datetime.now().date() + timedelta(days=1)
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') \
+            else end - timedelta(days=30)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid date range'}), 400
 
-    return render_template('manager_dashboard.html', users=users, customers=customers, appointments=appointments)
+    items = rollups.report(db.session.connection(), group, start, end)
+    if group == 'installer':
+        installer_ids = [item['installer_id'] for item in items]
+        names = dict(db.session.execute(select(Installer.id, Installer.name).where(Installer.id.in_(installer_ids))).all())
+        for item in items:
+            installer_id = item['installer_id']
+            item['installer_name'] = names.get(installer_id, f'Installer #{installer_id}') if installer_id else 'Unassigned'
+    return jsonify({'status': 'success', 'start': start.isoformat(), 'end': end.isoformat(), 'items': items})
 
 # Handle form submissions on the manager dashboard
 def handle_manager_form_submission(form_data):
@@ -213,61 +609,131 @@ def add_user(form_data):
     new_user.set_password(password)
     db.session.add(new_user)
     db.session.commit()
+    user_cache().invalidate(new_user.id)  # SQLite may reuse the id of a deleted user
 
 # Update existing user information
 def update_user(form_data):
-    user_id = form_data.get('user_id')
-    user = User.query.get(user_id)
-    new_password = form_data.get('new_password')
-    new_email = form_data.get('new_email')
-    if new_password:
-        user.set_password(new_password)
-    if new_email:
-        user.email = new_email
-    db.session.commit()
+    user_id = int(form_data.get('user_id'))
+    user = db.session.get(User, user_id)
+    if user is not None:
+        new_password = form_data.get('new_password')
+        new_email = form_data.get('new_email')
+        if new_password:
+            user.set_password(new_password)
+        if new_email:
+            user.email = new_email
+        db.session.commit()
+    # Evicted after the commit, so this process reloads the user on its next request
+    user_cache().invalidate(user_id)
 
 # Delete a customer from the database
 def delete_customer(form_data):
-    customer_id = form_data.get('customer_id')
-    customer = Customer.query.get(customer_id)
+    customer_id = int(form_data.get('customer_id'))
+    customer = db.session.get(Customer, customer_id)
+    if customer is None:
+        abort(404)
     db.session.delete(customer)
+    mark_calendar_changed()
     db.session.commit()
 
 # Delete an appointment from the database
 def delete_appointment_entry(form_data):
-    appointment_id = form_data.get('appointment_id')
-    appointment = Appointment.query.get(appointment_id)
+    appointment_id = int(form_data.get('appointment_id'))
+    appointment = db.session.get(Appointment, appointment_id)
+    if appointment is None:  # Already deleted, or archived
+        abort(404)
+    # Jobs go first, as in delete_appointment; the relationship does not cascade
+    db.session.query(InstallationJob).filter_by(appointment_id=appointment.id).delete()
     db.session.delete(appointment)
+    record_appointment_deleted(appointment.id)
+    cancel_appointment_reminders([appointment.id])
+    mark_calendar_changed()
     db.session.commit()
 
 # Delete a user from the database
 def delete_user(form_data):
-    user_id = form_data.get('user_id')
-    user = User.query.get(user_id)
-    db.session.delete(user)
-    db.session.commit()
+    user_id = int(form_data.get('user_id'))
+    user = db.session.get(User, user_id)
+    if user is not None:
+        db.session.delete(user)
+        db.session.commit()
+    # Also evicted when another worker deleted the row first, so the session stops working here too
+    user_cache().invalidate(user_id)
+
+# Prometheus scrape endpoint: request latency, SQL and render time histograms by endpoint
+@bp.route('/metrics')
+def metrics():
+    return current_app.response_class(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+# URL of a static file for templates: its fingerprinted copy once `flask build-assets` has run,
+# otherwise the plain /static URL
+@bp.app_template_global()
+def asset_url(filename):
+    hashed = current_app.extensions['asset_manifest'].get(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('main.asset', filename=hashed)
+
+# Route for fingerprinted assets: the precompressed copy the client accepts, cached for a year
+# and marked immutable, so repeat page loads do not even revalidate them
+@bp.route('/assets/<path:filename>')
+def asset(filename):
+    path = safe_join(os.path.join(current_app.static_folder, assets.DIST_DIR), filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    encoding, variant = assets.select_variant(path, request.accept_encodings)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_file(variant, mimetype=mimetype, download_name=os.path.basename(filename),
+                         max_age=current_app.config['ASSET_MAX_AGE_SECONDS'])
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 # Route for the main index page
-@app.route('/')
+@bp.route('/')
 def index():
     return render_template('index.html')
 
 # Route for scheduling appointments
-@app.route('/schedule', methods=['GET', 'POST'])
+@bp.route('/schedule', methods=['GET', 'POST'])
 @login_required
 def schedule():
     if request.method == 'POST':
-        if not process_appointment_form(request.form):
+        try:
+            saved = process_appointment_form(request.form)
+        except BookingConflict as conflict:
+            return booking_conflict_response(conflict)
+        if not saved:
             return "There was an issue saving the appointment", 500
-        return redirect(url_for('schedule'))
+        return redirect(url_for('.schedule'))
 
-    events = retrieve_calendar_events()
-    return render_template('schedule.html', events=events)
+    # The calendar fetches its own events from /events for the visible range
+    return render_template('schedule.html')
 
-# Process the form data and create a new appointment
+# Route for the schedule form's product typeahead: names starting with ?q=, from the catalog cache
+@bp.route('/products')
+@login_required
+def products():
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid limit'}), 400
+
+    matches = product_catalog().search(request.args.get('q', '').strip(), limit)
+    return jsonify({'status': 'success', 'items': [product._asdict() for product in matches]})
+
+# Process the form data and create a new appointment.
+# Everything is written in one transaction: helpers only flush to get ids, and the single
+# commit at the end means a failure can never leave a half-created booking behind.
 def process_appointment_form(form_data):
     try:
         start_time, end_time = calculate_appointment_times(form_data)
+        lock_bookings()
+        ensure_no_installer_conflicts(parse_installer_id(form_data.get('installer_id')), start_time, end_time)
         customer = get_or_create_customer(form_data)
         vehicle = get_or_create_vehicle(form_data, customer)
         product = get_or_create_product(form_data)
@@ -275,16 +741,21 @@ def process_appointment_form(form_data):
         # Create a new appointment record
         new_appointment = create_appointment(start_time, end_time, customer, vehicle, product, form_data)
         db.session.add(new_appointment)
-        db.session.commit()  # Commit to generate the new_appointment.id
+        db.session.flush()  # Flush to generate the new_appointment.id
 
         # Create associated installation jobs
         create_installation_jobs(form_data, new_appointment)
+        enqueue_job('booking_confirmation', {'appointment_id': new_appointment.id})
+        schedule_appointment_reminders([(new_appointment.id, start_time)])
         db.session.commit()
 
         return True
+    except BookingConflict:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()  # Rollback changes on error
-        app.logger.error(f'Error saving appointment: {e}')
+        current_app.logger.error(f'Error saving appointment: {e}')
         return False
 
 # Calculate start and end times for an appointment based on form data
@@ -304,16 +775,40 @@ def calculate_appointment_times(form_data):
     end_time = start_time + timedelta(hours=duration)
     return start_time, end_time
 
-# Retrieve or create a new customer based on form data
+# Reduce a phone number to its digits, dropping a leading US country code
+def normalize_phone(phone_number):
+    digits = ''.join(ch for ch in phone_number or '' if ch.isdigit())
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    return digits or None
+
+# Retrieve or create a customer, matching returning customers by normalized phone number
 def get_or_create_customer(form_data):
-    # Always create a new customer based on the form data, regardless of phone number
+    phone_normalized = normalize_phone(form_data.get('customer_phone'))
+    if phone_normalized:
+        customer = Customer.query.filter_by(phone_normalized=phone_normalized).first()
+        if customer:
+            return customer
+
+        # Insert-or-ignore on the unique phone index, so a concurrent booking for the same
+        # customer cannot create a duplicate; then read back whichever row won
+        db.session.execute(
+            sqlite_insert(Customer).values(
+                first_name=form_data.get('customer_first_name'),
+                last_name=form_data.get('customer_last_name'),
+                phone_number=form_data.get('customer_phone'),
+                phone_normalized=phone_normalized
+            ).on_conflict_do_nothing(index_elements=['phone_normalized'])
+        )
+        return Customer.query.filter_by(phone_normalized=phone_normalized).one()
+
     customer = Customer(
         first_name=form_data.get('customer_first_name'),
         last_name=form_data.get('customer_last_name'),
         phone_number=form_data.get('customer_phone')
     )
     db.session.add(customer)
-    db.session.commit()
+    db.session.flush()  # Assign customer.id without committing
 
     return customer
 
@@ -332,26 +827,32 @@ def get_or_create_vehicle(form_data, customer):
             customer_id=customer.id
         )
         db.session.add(vehicle)
-        db.session.commit()
+        db.session.flush()
 
     return vehicle
 
-# Retrieve or create a product associated with an appointment
+# Retrieve or create a product associated with an appointment.
+# Known names are answered from the catalog cache; new ones are inserted-or-ignored on the
+# unique name index, so concurrent bookings of the same new product share one row
 def get_or_create_product(form_data):
     product_name = form_data.get('product_name[]')  # Assuming a single product
     product_price = form_data.get('product_price[]')
 
-    product = Product.query.filter_by(name=product_name).first()
-    if not product:
-        product = Product(
+    product = product_catalog().get(product_name)
+    if product:
+        return product
+
+    db.session.execute(
+        sqlite_insert(Product).values(
             name=product_name,
             price=float(product_price) if product_price else 0.0,
             type=form_data.get('installation_type')
-        )
-        db.session.add(product)
-        db.session.commit()
-
-    return product
+        ).on_conflict_do_nothing(index_elements=['name'])
+    )
+    db.session.info['products_changed'] = True
+    return CatalogProduct(*db.session.execute(
+        select(Product.id, Product.name, Product.type, Product.price).where(Product.name == product_name)
+    ).one())
 
 # Create a new appointment record in the database
 def create_appointment(start_time, end_time, customer, vehicle, product, form_data):
@@ -361,62 +862,1273 @@ def create_appointment(start_time, end_time, customer, vehicle, product, form_da
         customer_id=customer.id,
         vehicle_id=vehicle.id,
         product_id=product.id,
+        installer_id=parse_installer_id(form_data.get('installer_id')),
         install_type=form_data.get('installation_type'),
         comments=form_data.get('notes')
     )
 
-# Create installation job records associated with an appointment
+# Create installation job records associated with an appointment with one bulk INSERT
 def create_installation_jobs(form_data, new_appointment):
     installation_jobs = form_data.getlist('installation_job[]')
     installation_prices = form_data.getlist('installation_price[]')
 
-    for job_details, price in zip(installation_jobs, installation_prices):
-        installation_job = InstallationJob(
-            job_details=job_details,
-            price=float(price),
-            appointment_id=new_appointment.id
-        )
-        db.session.add(installation_job)
+    job_rows = [
+        {'job_details': job_details, 'price': float(price), 'appointment_id': new_appointment.id}
+        for job_details, price in zip(installation_jobs, installation_prices)
+    ]
+    if job_rows:
+        db.session.execute(insert(InstallationJob), job_rows)
 
 
-@app.route('/events')
+@bp.route('/events')
 def events():
     try:
-        events = retrieve_calendar_events()  # Assuming this function retrieves and formats your events
-        return jsonify(events)
+        range_start = parse_range_param(request.args.get('start'))
+        range_end = parse_range_param(request.args.get('end'))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid date range'}), 400
+
+    if request.args.get('stream'):
+        return stream_events_response(range_start, range_end)
+
+    try:
+        cursor = datetime.utcnow()
+        key = (range_start, range_end)
+        version = current_calendar_version()
+        cached = events_cache().get(key, version)
+        if cached:
+            payload, etag = cached
+        else:
+            payload = dumps(retrieve_calendar_events(range_start, range_end))
+            etag = events_cache().put(key, version, payload)
+
+        # Clients must revalidate, but an unchanged calendar answers with an empty 304
+        response = current_app.response_class(payload, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        response.headers['X-Sync-Cursor'] = cursor.isoformat()
+        return response.make_conditional(request)
     except Exception as e:
-        app.logger.error(f"Error retrieving events: {e}")
+        current_app.logger.error(f"Error retrieving events: {e}")
         return jsonify({'status': 'error', 'message': 'Could not retrieve events'}), 500
 
 
-# Retrieve all appointments and prepare them for display on a calendar
-def retrieve_calendar_events():
-    appointments = Appointment.query.all()
+# Streaming /events for wide ranges and exports: the JSON array is written batch by batch
+# while the appointments are read, compressed with brotli or gzip when the client accepts it.
+# The body is produced as it is sent, so there is no cache entry or ETag for it.
+def stream_events_response(range_start, range_end):
+    cursor = datetime.utcnow()
+    encoding = negotiate_encoding(request.accept_encodings)
+    # Archived appointments are older than nearly all hot ones, so they are sent first
+    batches = itertools.chain.from_iterable(
+        stream_calendar_events(
+            lambda query, model=model: filter_to_range(query, range_start, range_end, model),
+            current_app.config['EVENTS_STREAM_BATCH_SIZE'], model, jobs
+        )
+        for model, jobs in appointment_tables(range_start)
+    )
+
+    response = current_app.response_class(
+        stream_with_context(compress_chunks(iter_json_array(batches), encoding)),
+        mimetype='application/json'
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_store = True
+    response.headers['X-Sync-Cursor'] = cursor.isoformat()
+    return response
+
+
+# Return appointments changed or deleted since the client's cursor, plus a new cursor
+@bp.route('/events/changes')
+def event_changes():
+    try:
+        since = parse_range_param(request.args.get('since'))
+    except ValueError:
+        since = None
+    if since is None:
+        return jsonify({'status': 'error', 'message': 'A valid since cursor is required'}), 400
+
+    try:
+        cursor = datetime.utcnow()
+        # Tombstones older than the retention window are gone, so the client must start over
+        if since < cursor - timedelta(days=current_app.config['SYNC_TOMBSTONE_DAYS']):
+            return jsonify({'reset': True, 'cursor': cursor.isoformat(), 'events': [], 'deleted': []})
+
+        # Overlap the cursor slightly so commits that were in flight at the last sync are not missed
+        changed_after = since - timedelta(seconds=current_app.config['SYNC_OVERLAP_SECONDS'])
+        changed = build_calendar_events(lambda query: query.filter(Appointment.updated_at > changed_after))
+        deleted = db.session.execute(
+            select(DeletedAppointment.appointment_id).where(DeletedAppointment.deleted_at > changed_after)
+        ).scalars().all()
+
+        return jsonify({'reset': False, 'cursor': cursor.isoformat(), 'events': changed, 'deleted': deleted})
+    except Exception as e:
+        current_app.logger.error(f"Error retrieving event changes: {e}")
+        return jsonify({'status': 'error', 'message': 'Could not retrieve event changes'}), 500
+
+
+# iCalendar feeds for phone calendars: one per installer and one for the whole shop.
+# Calendar apps cannot log in, so each feed URL carries a token signed with SECRET_KEY;
+# managers get the URLs from /manager_dashboard/calendar_feeds.
+def feed_token(feed):
+    message = f'calendar-feed:{feed}'.encode()
+    return hmac.new(current_app.config['SECRET_KEY'].encode(), message, 'sha256').hexdigest()[:32]
+
+def feed_url(feed, endpoint, **values):
+    return url_for(endpoint, token=feed_token(feed), _external=True, **values)
+
+# (version, changed_at) of a feed from the counters the triggers in calendar_feeds.py keep;
+# the shop feed sums all of them. None when the installer does not exist.
+def calendar_feed_state(installer_id=None):
+    if installer_id is not None:
+        return db.session.execute(
+            select(CalendarFeedState.version, CalendarFeedState.changed_at)
+            .where(CalendarFeedState.installer_id == installer_id)
+        ).first()
+    return db.session.execute(
+        select(func.coalesce(func.sum(CalendarFeedState.version), 0), func.max(CalendarFeedState.changed_at))
+    ).first()
+
+# VEVENT lines for the feed's appointments that end after window_start
+def build_feed_events(installer_id, window_start):
+    uid_domain = current_app.config['FEED_UID_DOMAIN']
     events = []
-    for appointment in appointments:
-        events.append({
-            'id': appointment.id,
-            'title': f'{appointment.customer.first_name} {appointment.customer.last_name} - {appointment.product.name}',
-            'start': appointment.start_time.isoformat(),
-            'end': appointment.end_time.isoformat(),
-            'color': 'blue' if appointment.install_type == 'standard' else 'orange',
-            'extendedProps': {
-                'customer_first_name': appointment.customer.first_name,
-                'customer_last_name': appointment.customer.last_name,
-                'customer_phone': appointment.customer.phone_number,
-                'vehicle_year': appointment.vehicle.year,
-                'vehicle_make': appointment.vehicle.make,
-                'vehicle_model': appointment.vehicle.model,
-                'installation_type': appointment.install_type,
-                'duration': (appointment.end_time - appointment.start_time).seconds // 3600,
-                'notes': appointment.comments,
-                'installation_jobs': [{'job_details': job.job_details, 'price': job.price} for job in appointment.installation_jobs]
+    for model, jobs in appointment_tables(window_start):
+        def apply_filter(query, model=model):
+            query = query.filter(model.end_time > window_start)
+            if installer_id is not None:
+                query = query.filter(model.installer_id == installer_id)
+            return query
+
+        rows = db.session.execute(
+            apply_filter(
+                calendar_event_query(model)
+                .add_columns(model.updated_at, Installer.name.label('installer_name'))
+                .outerjoin(Installer, model.installer_id == Installer.id)
+            ).order_by(model.start_time)
+        ).all()
+        jobs_by_appointment = load_calendar_jobs(apply_filter, model, jobs)
+        events += [calendar_feeds.format_event(row, jobs_by_appointment.get(row.id, []), uid_domain) for row in rows]
+    return events
+
+# Serve a feed. The ETag and Last-Modified come from the feed's change counter and window, so
+# polls of an unchanged feed get a 304 after one primary key lookup, and a changed feed is
+# rebuilt once per process and then served from feed_cache(). The state is read before the
+# appointments, so a write in between only costs one extra rebuild on the next poll.
+def calendar_feed_response(feed, installer_id=None):
+    if not hmac.compare_digest(request.args.get('token', ''), feed_token(feed)):
+        return jsonify({'status': 'error', 'message': 'Invalid feed token'}), 403
+
+    state = calendar_feed_state(installer_id)
+    if state is None:
+        return jsonify({'status': 'error', 'message': 'Installer not found'}), 404
+    version, changed_at = state
+
+    # The window moves at local midnight, which changes the feed as well
+    window_start = datetime.combine(datetime.now().date(), time()) - timedelta(days=current_app.config['FEED_PAST_DAYS'])
+    tag = f'{feed}-{version}-{window_start:%Y%m%d}'
+    last_modified = window_start.astimezone(timezone.utc)
+    if changed_at is not None:
+        last_modified = max(last_modified, changed_at.replace(tzinfo=timezone.utc))
+
+    if not is_resource_modified(request.environ, etag=tag, last_modified=last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        cached = feed_cache().get(feed, tag)
+        if cached:
+            body = cached[0]
+        else:
+            name = 'Installations'
+            if installer_id is not None:
+                name = f"{db.session.scalar(select(Installer.name).where(Installer.id == installer_id))} - {name}"
+            body = calendar_feeds.render_calendar(
+                name, build_feed_events(installer_id, window_start), current_app.config['FEED_REFRESH_MINUTES']
+            )
+            feed_cache().put(feed, tag, body)
+        response = current_app.response_class(body, mimetype='text/calendar')
+    response.set_etag(tag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+# Route for one installer's feed
+@bp.route('/calendar/installer/<int(min=1):installer_id>.ics')
+def installer_calendar_feed(installer_id):
+    try:
+        return calendar_feed_response(f'installer-{installer_id}', installer_id)
+    except Exception as e:
+        current_app.logger.error(f"Error building calendar feed: {e}")
+        return jsonify({'status': 'error', 'message': 'Could not build calendar feed'}), 500
+
+# Route for the whole shop's feed, unassigned appointments included
+@bp.route('/calendar/shop.ics')
+def shop_calendar_feed():
+    try:
+        return calendar_feed_response('shop')
+    except Exception as e:
+        current_app.logger.error(f"Error building calendar feed: {e}")
+        return jsonify({'status': 'error', 'message': 'Could not build calendar feed'}), 500
+
+# Subscription URLs of the shop feed and every installer's feed
+@bp.route('/manager_dashboard/calendar_feeds')
+@login_required
+def manager_calendar_feeds():
+    if current_user.role != 'Manager':
+        return jsonify({'status': 'error', 'message': 'Access Denied'}), 403
+
+    installers = db.session.execute(select(Installer.id, Installer.name).order_by(Installer.name, Installer.id)).all()
+    return jsonify({
+        'status': 'success',
+        'shop': feed_url('shop', '.shop_calendar_feed'),
+        'installers': [
+            {'id': installer.id, 'name': installer.name,
+             'url': feed_url(f'installer-{installer.id}', '.installer_calendar_feed', installer_id=installer.id)}
+            for installer in installers
+        ]
+    })
+
+
+# Parse a FullCalendar range parameter (e.g. 2024-08-01T00:00:00-04:00) into a naive local datetime
+def parse_range_param(value):
+    if not value:
+        return None
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    # Appointments are stored as naive local times, so keep the wall-clock value
+    return datetime.fromisoformat(value).replace(tzinfo=None)
+
+
+# Restrict an appointment query to rows overlapping the [range_start, range_end) window
+def filter_to_range(query, range_start=None, range_end=None, model=Appointment):
+    if range_end is not None:
+        query = query.filter(model.start_time < range_end)
+    if range_start is not None:
+        query = query.filter(model.end_time > range_start)
+    return query
+
+
+# The (appointment, job) tables that can hold appointments overlapping a window starting at
+# range_start (None for no lower bound). The archive only holds appointments that ended by
+# its newest end time, so windows starting after that never read it.
+def appointment_tables(range_start=None):
+    tables = [(Appointment, InstallationJob)]
+    boundary = db.session.scalar(select(func.max(ArchivedAppointment.end_time)))
+    if boundary is not None and (range_start is None or range_start < boundary):
+        tables.insert(0, (ArchivedAppointment, ArchivedInstallationJob))
+    return tables
+
+
+# Retrieve appointments in the requested window and prepare them for display on a calendar
+def retrieve_calendar_events(range_start=None, range_end=None):
+    return list(heapq.merge(
+        *(
+            build_calendar_events(
+                lambda query, model=model: filter_to_range(query, range_start, range_end, model), model, jobs
+            )
+            for model, jobs in appointment_tables(range_start)
+        ),
+        key=lambda event: event['start']
+    ))
+
+
+# Column projection behind calendar events: appointments joined to their customer, vehicle and product
+def calendar_event_query(model=Appointment):
+    return (
+        select(
+            model.id,
+            model.start_time,
+            model.end_time,
+            model.install_type,
+            model.comments,
+            model.version,
+            Customer.first_name,
+            Customer.last_name,
+            Customer.phone_number,
+            Vehicle.year,
+            Vehicle.make,
+            Vehicle.model,
+            Product.name.label('product_name'),
+        )
+        .join(Customer, model.customer_id == Customer.id)
+        .join(Vehicle, model.vehicle_id == Vehicle.id)
+        .join(Product, model.product_id == Product.id)
+    )
+
+# Serialize the appointments selected by apply_filter into calendar events.
+# Uses two column projections (appointments joined to customer/vehicle/product, then their jobs)
+# so the query count stays fixed no matter how many appointments are selected.
+# `model` and `jobs` choose between the hot and the archive tables.
+def build_calendar_events(apply_filter, model=Appointment, jobs=InstallationJob):
+    appointment_rows = db.session.execute(
+        apply_filter(calendar_event_query(model)).order_by(model.start_time)
+    ).all()
+    jobs_by_appointment = load_calendar_jobs(apply_filter, model, jobs)
+
+    archived = model is ArchivedAppointment
+    return [serialize_calendar_event(row, jobs_by_appointment.get(row.id, []), archived) for row in appointment_rows]
+
+# Installation jobs of the appointments selected by apply_filter, grouped by appointment id
+def load_calendar_jobs(apply_filter, model=Appointment, jobs=InstallationJob):
+    job_rows = db.session.execute(
+        apply_filter(
+            select(jobs.appointment_id, jobs.job_details, jobs.price)
+            .join(model, jobs.appointment_id == model.id)
+        ).order_by(jobs.id)
+    ).all()
+
+    jobs_by_appointment = {}
+    for job in job_rows:
+        jobs_by_appointment.setdefault(job.appointment_id, []).append(
+            {'job_details': job.job_details, 'price': job.price}
+        )
+    return jobs_by_appointment
+
+# Yield calendar events in lists of up to batch_size, straight off the database cursor.
+# Only one batch of appointments is held at a time and each batch loads its jobs with one
+# IN query, so memory stays flat no matter how many appointments the filter selects.
+def stream_calendar_events(apply_filter, batch_size, model=Appointment, jobs=InstallationJob):
+    archived = model is ArchivedAppointment
+    result = db.session.execute(
+        apply_filter(calendar_event_query(model)).order_by(model.start_time, model.id),
+        execution_options={'yield_per': batch_size}
+    )
+    for rows in result.partitions():
+        jobs_by_appointment = {}
+        job_rows = db.session.execute(
+            select(jobs.appointment_id, jobs.job_details, jobs.price)
+            .where(jobs.appointment_id.in_([row.id for row in rows]))
+            .order_by(jobs.id)
+        )
+        for job in job_rows:
+            jobs_by_appointment.setdefault(job.appointment_id, []).append(
+                {'job_details': job.job_details, 'price': job.price}
+            )
+        yield [serialize_calendar_event(row, jobs_by_appointment.get(row.id, []), archived) for row in rows]
+
+# Shape one appointment row and its jobs as a FullCalendar event; archived ones are read-only
+def serialize_calendar_event(row, jobs, archived=False):
+    event = {
+        'id': row.id,
+        'title': f'{row.first_name} {row.last_name} - {row.product_name}',
+        'start': row.start_time.isoformat(),
+        'end': row.end_time.isoformat(),
+        'color': 'blue' if row.install_type == 'standard' else 'orange',
+        'extendedProps': {
+            'customer_first_name': row.first_name,
+            'customer_last_name': row.last_name,
+            'customer_phone': row.phone_number,
+            'vehicle_year': row.year,
+            'vehicle_make': row.make,
+            'vehicle_model': row.model,
+            'installation_type': row.install_type,
+            'duration': (row.end_time - row.start_time).seconds // 3600,
+            'notes': row.comments,
+            'version': row.version,
+            'installation_jobs': jobs
+        }
+    }
+    if archived:
+        event['editable'] = False
+        event['extendedProps']['archived'] = True
+    return event
+
+# Raised when a booking would double-book an installer
+class BookingConflict(Exception):
+    def __init__(self, conflicts):
+        super().__init__('Installer is already booked at that time')
+        self.conflicts = conflicts
+
+# Parse an optional installer id from form or JSON data
+def parse_installer_id(value):
+    if value in (None, ''):
+        return None
+    return int(value)
+
+# Describe a clashing appointment for the JSON error payload
+def serialize_conflict(row):
+    return {
+        'id': row.id,
+        'installer_id': row.installer_id,
+        'start': row.start_time.isoformat(),
+        'end': row.end_time.isoformat()
+    }
+
+# Find the installer's appointments overlapping [start_time, end_time) using the installer/time index
+def find_installer_conflicts(installer_id, start_time, end_time, exclude_id=None):
+    if installer_id is None:
+        return []
+    conflicts = []
+    for model, _ in appointment_tables(start_time):
+        query = select(model.id, model.installer_id, model.start_time, model.end_time).where(
+            model.installer_id == installer_id,
+            model.start_time < end_time,
+            model.end_time > start_time
+        )
+        if exclude_id is not None:
+            query = query.where(model.id != exclude_id)
+        conflicts += [serialize_conflict(row) for row in db.session.execute(query.order_by(model.start_time))]
+    return conflicts
+
+# Reject a booking that overlaps another appointment of the same installer
+def ensure_no_installer_conflicts(installer_id, start_time, end_time, exclude_id=None):
+    conflicts = find_installer_conflicts(installer_id, start_time, end_time, exclude_id)
+    if conflicts:
+        raise BookingConflict(conflicts)
+
+def booking_conflict_response(conflict):
+    return jsonify({'status': 'error', 'message': str(conflict), 'conflicts': conflict.conflicts}), 409
+
+# Raised when a write is based on an appointment version someone else has since replaced
+class StaleAppointment(Exception):
+    def __init__(self, current_version):
+        super().__init__('The appointment was changed by someone else; reload it and try again')
+        self.current_version = current_version
+
+def stale_appointment_response(stale):
+    return jsonify({'status': 'error', 'message': str(stale), 'version': stale.current_version}), 409
+
+# The appointment version the client last saw, or None when it sent none. Edits without one
+# are refused: falling back to the stored version would let them overwrite newer changes.
+def expected_version(form_data):
+    try:
+        return int(form_data['version'])
+    except (KeyError, ValueError):
+        return None
+
+def missing_version_response():
+    return jsonify({'status': 'error', 'message': 'Missing appointment version; reload it and try again'}), 400
+
+# Update an appointment only if it is still at `version`, bumping the version.
+# The check and the write are one UPDATE statement, so of two concurrent writers
+# exactly one matches the row and the other gets StaleAppointment.
+def update_appointment_if_current(appointment_id, version, **values):
+    result = db.session.execute(
+        update(Appointment)
+        .where(Appointment.id == appointment_id, Appointment.version == version)
+        .values(version=Appointment.version + 1, **values)
+    )
+    if result.rowcount != 1:
+        raise StaleAppointment(db.session.scalar(select(Appointment.version).where(Appointment.id == appointment_id)))
+    return version + 1
+
+# Parse one proposed booking from the batch conflict check payload
+def parse_proposed_booking(item):
+    start_time = datetime.fromisoformat(item['start_time'])
+    end_time = datetime.fromisoformat(item['end_time'])
+    if end_time <= start_time:
+        raise ValueError('end_time must be after start_time')
+    return {
+        'id': int(item['id']) if item.get('id') is not None else None,
+        'installer_id': parse_installer_id(item.get('installer_id')),
+        'start_time': start_time,
+        'end_time': end_time
+    }
+
+# Check a batch of proposed bookings against the schedule and against each other.
+# Loads every booking of the involved installers in the batch's time span with one
+# indexed query, then answers each proposal from an in-memory interval index.
+def find_batch_conflicts(proposals):
+    # Moves of existing appointments keep their stored installer unless one is given
+    missing = [p['id'] for p in proposals if p['installer_id'] is None and p['id'] is not None]
+    if missing:
+        stored = dict(db.session.execute(
+            select(Appointment.id, Appointment.installer_id).where(Appointment.id.in_(missing))
+        ).all())
+        for proposal in proposals:
+            if proposal['installer_id'] is None and proposal['id'] is not None:
+                proposal['installer_id'] = stored.get(proposal['id'])
+
+    results = [{'index': index, 'id': p['id'], 'conflicts': []} for index, p in enumerate(proposals)]
+    booked = [p for p in proposals if p['installer_id'] is not None]
+    if not booked:
+        return results
+
+    # Appointments being moved are replaced by their proposed position
+    moving_ids = {p['id'] for p in booked if p['id'] is not None}
+    window_start = min(p['start_time'] for p in booked)
+    window_end = max(p['end_time'] for p in booked)
+    intervals = {}
+    for model, _ in appointment_tables(window_start):
+        rows = db.session.execute(
+            select(model.id, model.installer_id, model.start_time, model.end_time).where(
+                model.installer_id.in_({p['installer_id'] for p in booked}),
+                model.start_time < window_end,
+                model.end_time > window_start
+            )
+        )
+        for row in rows:
+            if row.id not in moving_ids:
+                intervals.setdefault(row.installer_id, []).append((row.start_time, row.end_time, serialize_conflict(row)))
+    for index, proposal in enumerate(proposals):
+        if proposal['installer_id'] is not None:
+            proposal['entry'] = {
+                'index': index,
+                'id': proposal['id'],
+                'installer_id': proposal['installer_id'],
+                'start': proposal['start_time'].isoformat(),
+                'end': proposal['end_time'].isoformat()
             }
+            intervals.setdefault(proposal['installer_id'], []).append(
+                (proposal['start_time'], proposal['end_time'], proposal['entry'])
+            )
+
+    indexes = {installer_id: IntervalIndex(entries) for installer_id, entries in intervals.items()}
+    for index, proposal in enumerate(proposals):
+        if proposal['installer_id'] is not None:
+            overlapping = indexes[proposal['installer_id']].overlapping(proposal['start_time'], proposal['end_time'])
+            results[index]['conflicts'] = [entry for entry in overlapping if entry is not proposal['entry']]
+    return results
+
+# Route to validate a batch of proposed bookings (e.g. drag-and-drop moves) without saving them
+@bp.route('/appointment/conflicts', methods=['POST'])
+@login_required
+def check_appointment_conflicts():
+    data = request.get_json(silent=True) or {}
+    items = data.get('appointments')
+    if not isinstance(items, list):
+        return jsonify({'status': 'error', 'message': 'Invalid data'}), 400
+
+    try:
+        proposals = [parse_proposed_booking(item) for item in items]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'status': 'error', 'message': 'Invalid data'}), 400
+
+    results = find_batch_conflicts(proposals)
+    return jsonify({
+        'status': 'success',
+        'has_conflicts': any(result['conflicts'] for result in results),
+        'results': results
+    })
+
+# Parse one entry of a bulk scheduling request into the occurrences it books
+def parse_bulk_booking(item):
+    start_time = datetime.fromisoformat(item['start_time'])
+    duration = int(item['duration'])
+    if duration < 1:
+        raise ValueError('duration must be at least one hour')
+    for field in ('customer_first_name', 'customer_last_name', 'vehicle_year', 'vehicle_make', 'vehicle_model',
+                  'product_name', 'installation_type'):
+        if not item.get(field):
+            raise ValueError(f'{field} is required')
+
+    jobs = [
+        {'job_details': str(job['job_details']), 'price': float(job['price'])}
+        for job in item.get('installation_jobs') or []
+    ]
+
+    recurrence = item.get('recurrence')
+    if recurrence:
+        until = recurrence.get('until')
+        starts = expand_recurrence(
+            start_time,
+            recurrence.get('frequency'),
+            int(recurrence.get('interval', 1)),
+            int(recurrence['count']) if recurrence.get('count') is not None else None,
+            datetime.fromisoformat(until) if until else None,
+            current_app.config['BUSINESS_DAYS'],
+            current_app.config['BULK_SCHEDULE_LIMIT']
+        )
+    else:
+        starts = [start_time]
+
+    booking = {
+        'customer_first_name': item['customer_first_name'],
+        'customer_last_name': item['customer_last_name'],
+        'customer_phone': item.get('customer_phone') or '',
+        'vehicle_year': int(item['vehicle_year']),
+        'vehicle_make': item['vehicle_make'],
+        'vehicle_model': item['vehicle_model'],
+        'product_name': item['product_name'],
+        'product_price': float(item.get('product_price') or 0),
+        'installer_id': parse_installer_id(item.get('installer_id')),
+        'installation_type': item['installation_type'],
+        'notes': item.get('notes'),
+        'jobs': jobs
+    }
+    return [dict(booking, start_time=start, end_time=start + timedelta(hours=duration)) for start in starts]
+
+# Find or create the customers of a batch in a few set-based statements.
+# Returns one customer id per booking, matching returning customers by normalized phone
+# like get_or_create_customer; bookings without a usable phone share one new customer per name.
+def resolve_bulk_customers(bookings):
+    phones = {}
+    for booking in bookings:
+        booking['phone_normalized'] = normalize_phone(booking['customer_phone'])
+        if booking['phone_normalized']:
+            phones.setdefault(booking['phone_normalized'], booking)
+
+    if phones:
+        db.session.execute(
+            sqlite_insert(Customer).values([
+                {
+                    'first_name': booking['customer_first_name'],
+                    'last_name': booking['customer_last_name'],
+                    'phone_number': booking['customer_phone'],
+                    'phone_normalized': phone
+                }
+                for phone, booking in phones.items()
+            ]).on_conflict_do_nothing(index_elements=['phone_normalized'])
+        )
+    ids_by_phone = dict(db.session.execute(
+        select(Customer.phone_normalized, Customer.id).where(Customer.phone_normalized.in_(list(phones)))
+    ).all()) if phones else {}
+
+    unnamed = {}
+    for booking in bookings:
+        if not booking['phone_normalized']:
+            unnamed.setdefault((booking['customer_first_name'], booking['customer_last_name'], booking['customer_phone']), None)
+    if unnamed:
+        new_ids = db.session.scalars(
+            insert(Customer).returning(Customer.id, sort_by_parameter_order=True),
+            [{'first_name': first, 'last_name': last, 'phone_number': phone} for first, last, phone in unnamed]
+        ).all()
+        unnamed = dict(zip(unnamed, new_ids))
+
+    return [
+        ids_by_phone[booking['phone_normalized']] if booking['phone_normalized']
+        else unnamed[(booking['customer_first_name'], booking['customer_last_name'], booking['customer_phone'])]
+        for booking in bookings
+    ]
+
+# Find or create (customer, year, make, model) vehicles, returning one vehicle id per booking
+def resolve_bulk_vehicles(bookings, customer_ids):
+    keys = [
+        (customer_id, booking['vehicle_year'], booking['vehicle_make'], booking['vehicle_model'])
+        for booking, customer_id in zip(bookings, customer_ids)
+    ]
+    existing = {}
+    for row in db.session.execute(
+        select(Vehicle.customer_id, Vehicle.year, Vehicle.make, Vehicle.model, Vehicle.id)
+        .where(Vehicle.customer_id.in_(set(customer_ids)))
+        .order_by(Vehicle.id)
+    ):
+        existing.setdefault((row.customer_id, row.year, row.make, row.model), row.id)
+
+    missing = list(dict.fromkeys(key for key in keys if key not in existing))
+    if missing:
+        new_ids = db.session.scalars(
+            insert(Vehicle).returning(Vehicle.id, sort_by_parameter_order=True),
+            [{'customer_id': customer_id, 'year': year, 'make': make, 'model': model}
+             for customer_id, year, make, model in missing]
+        ).all()
+        existing.update(zip(missing, new_ids))
+    return [existing[key] for key in keys]
+
+# Find products by name in the catalog or create them, returning one product id per booking
+def resolve_bulk_products(bookings):
+    names = {booking['product_name']: booking for booking in bookings}
+    existing = {}
+    for name in names:
+        product = product_catalog().get(name)
+        if product:
+            existing[name] = product.id
+
+    missing = [name for name in names if name not in existing]
+    if missing:
+        db.session.execute(
+            sqlite_insert(Product).values([
+                {'name': name, 'price': names[name]['product_price'], 'type': names[name]['installation_type']}
+                for name in missing
+            ]).on_conflict_do_nothing(index_elements=['name'])
+        )
+        db.session.info['products_changed'] = True
+        existing.update(db.session.execute(select(Product.name, Product.id).where(Product.name.in_(missing))).all())
+    return [existing[booking['product_name']] for booking in bookings]
+
+# Route to book many appointments at once: a fleet's vehicles, or a recurring slot.
+# Body: {"appointments": [...], "defaults": {...}, "dry_run": false}. Each entry takes the
+# /schedule fields (product_name/product_price without brackets, installation_jobs as
+# [{"job_details", "price"}]) plus an optional "recurrence": {"frequency": "daily"|"weekly",
+# "interval": 1, "count": 10} or "until" instead of count; "defaults" fill fields missing from
+# every entry. The whole batch is validated and conflict-checked first, then written in one
+# transaction with bulk inserts, so either every appointment is booked or none is.
+@bp.route('/appointment/bulk', methods=['POST'])
+@login_required
+def bulk_schedule():
+    data = request.get_json(silent=True) or {}
+    items = data.get('appointments')
+    defaults = data.get('defaults') or {}
+    if not isinstance(items, list) or not items or not isinstance(defaults, dict):
+        return jsonify({'status': 'error', 'message': 'Invalid data'}), 400
+
+    bookings = []
+    sources = []  # Index of the request entry each expanded booking came from
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            expanded = parse_bulk_booking(dict(defaults, **item))
+        except KeyError as e:
+            errors.append({'index': index, 'message': f'{e.args[0]} is required'})
+        except (TypeError, ValueError, AttributeError) as e:
+            errors.append({'index': index, 'message': str(e)})
+        else:
+            bookings.extend(expanded)
+            sources.extend([index] * len(expanded))
+    if not errors and len(bookings) > current_app.config['BULK_SCHEDULE_LIMIT']:
+        errors.append({'index': None, 'message': f"At most {current_app.config['BULK_SCHEDULE_LIMIT']} appointments per request"})
+    if errors:
+        return jsonify({'status': 'error', 'message': 'Invalid appointments', 'errors': errors}), 400
+
+    if not data.get('dry_run'):
+        lock_bookings()
+    results = find_batch_conflicts([
+        {'id': None, 'installer_id': booking['installer_id'], 'start_time': booking['start_time'], 'end_time': booking['end_time']}
+        for booking in bookings
+    ])
+    conflicts = [dict(result, entry=sources[result['index']]) for result in results if result['conflicts']]
+    if conflicts:
+        db.session.rollback()
+        return jsonify({'status': 'error', 'message': 'Installer is already booked at that time', 'conflicts': conflicts}), 409
+
+    if data.get('dry_run'):
+        return jsonify({'status': 'success', 'dry_run': True, 'count': len(bookings)})
+
+    try:
+        customer_ids = resolve_bulk_customers(bookings)
+        vehicle_ids = resolve_bulk_vehicles(bookings, customer_ids)
+        product_ids = resolve_bulk_products(bookings)
+
+        appointment_ids = db.session.scalars(
+            insert(Appointment).returning(Appointment.id, sort_by_parameter_order=True),
+            [
+                {
+                    'start_time': booking['start_time'],
+                    'end_time': booking['end_time'],
+                    'customer_id': customer_id,
+                    'vehicle_id': vehicle_id,
+                    'product_id': product_id,
+                    'installer_id': booking['installer_id'],
+                    'install_type': booking['installation_type'],
+                    'comments': booking['notes']
+                }
+                for booking, customer_id, vehicle_id, product_id in zip(bookings, customer_ids, vehicle_ids, product_ids)
+            ]
+        ).all()
+
+        job_rows = [
+            dict(job, appointment_id=appointment_id)
+            for booking, appointment_id in zip(bookings, appointment_ids)
+            for job in booking['jobs']
+        ]
+        if job_rows:
+            db.session.execute(insert(InstallationJob), job_rows)
+
+        # Reminders only: one confirmation per booking would flood a fleet customer
+        schedule_appointment_reminders([
+            (appointment_id, booking['start_time']) for booking, appointment_id in zip(bookings, appointment_ids)
+        ])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error saving bulk appointments: {e}')
+        return jsonify({'status': 'error', 'message': 'Error saving appointments'}), 500
+
+    return jsonify({'status': 'success', 'count': len(appointment_ids), 'appointment_ids': appointment_ids})
+
+# Rank an installer skill level using the configured ordering (unknown levels rank lowest)
+def skill_rank(skill_level):
+    levels = [level.lower() for level in current_app.config['SKILL_LEVELS']]
+    level = (skill_level or '').lower()
+    return levels.index(level) if level in levels else -1
+
+# Opening-hours windows for each business day in [range_start, range_end), clipped to the range
+def business_windows(range_start, range_end):
+    open_hour, close_hour = current_app.config['BUSINESS_HOURS']
+    windows = []
+    day = range_start.date()
+    while day <= range_end.date():
+        if day.weekday() in current_app.config['BUSINESS_DAYS']:
+            window_start = max(datetime.combine(day, time(open_hour)), range_start)
+            window_end = min(datetime.combine(day, time(close_hour)), range_end)
+            if window_start < window_end:
+                windows.append((window_start, window_end))
+        day += timedelta(days=1)
+    return windows
+
+# Compute each installer's open slots of at least `duration` in [range_start, range_end).
+# Bookings come from one query ordered by installer and start time, so each installer's
+# busy list is merged and subtracted from the opening hours in a single linear pass.
+def find_open_slots(range_start, range_end, duration, min_skill_level=None):
+    installers = Installer.query.order_by(Installer.id).all()
+    if min_skill_level:
+        installers = [i for i in installers if skill_rank(i.skill_level) >= skill_rank(min_skill_level)]
+
+    busy = {installer.id: [] for installer in installers}
+    if busy:
+        rows = db.session.execute(
+            filter_to_range(
+                select(Appointment.installer_id, Appointment.start_time, Appointment.end_time)
+                .where(Appointment.installer_id.in_(busy.keys())),
+                range_start, range_end
+            ).order_by(Appointment.installer_id, Appointment.start_time)
+        )
+        for row in rows:
+            busy[row.installer_id].append((row.start_time, row.end_time))
+
+    windows = business_windows(range_start, range_end)
+    availability = []
+    for installer in installers:
+        free = subtract_intervals(windows, merge_intervals(busy[installer.id]))
+        availability.append({
+            'id': installer.id,
+            'name': installer.name,
+            'skill_level': installer.skill_level,
+            'slots': [
+                {'start': start.isoformat(), 'end': end.isoformat()}
+                for start, end in free if end - start >= duration
+            ]
         })
-    return events
+    return availability
+
+# Route to list installers' open slots for a date range and required duration (in hours)
+@bp.route('/installers/availability')
+@login_required
+def installer_availability():
+    try:
+        range_start = parse_range_param(request.args.get('start'))
+        range_end = parse_range_param(request.args.get('end'))
+        hours = float(request.args.get('duration', ''))
+        # inf and nan parse as floats; too long a duration overflows timedelta
+        duration = timedelta(hours=hours) if math.isfinite(hours) and hours > 0 else None
+    except (ValueError, OverflowError):
+        return jsonify({'status': 'error', 'message': 'Invalid data'}), 400
+    if range_start is None or range_end is None or range_end <= range_start or duration is None:
+        return jsonify({'status': 'error', 'message': 'Invalid data'}), 400
+    # An unknown level would rank below every installer and match them all
+    min_skill_level = request.args.get('min_skill_level')
+    if min_skill_level and skill_rank(min_skill_level) < 0:
+        levels = ', '.join(current_app.config['SKILL_LEVELS'])
+        return jsonify({'status': 'error', 'message': f'Unknown skill level; use one of {levels}'}), 400
+
+    availability = find_open_slots(range_start, range_end, duration, min_skill_level)
+    return jsonify({'status': 'success', 'installers': availability})
+
+# Assign installers to the unassigned appointments in [range_start, range_end) in one planning pass.
+# With dry_run the plan is returned without being saved.
+def assign_installers(range_start, range_end, dry_run=False):
+    started = datetime.now()
+    if not dry_run:
+        lock_bookings()  # The plan must not race bookings made while it is computed
+    unassigned = db.session.execute(
+        filter_to_range(
+            select(Appointment.id, Appointment.start_time, Appointment.end_time, Appointment.install_type)
+            .where(Appointment.installer_id.is_(None)),
+            range_start, range_end
+        )
+    ).all()
+    installers = Installer.query.all()
+
+    # Existing bookings that could clash with anything being planned
+    bookings = {}
+    if unassigned:
+        booked_rows = db.session.execute(
+            filter_to_range(
+                select(Appointment.installer_id, Appointment.start_time, Appointment.end_time)
+                .where(Appointment.installer_id.is_not(None)),
+                min(row.start_time for row in unassigned),
+                max(row.end_time for row in unassigned)
+            )
+        )
+        for row in booked_rows:
+            bookings.setdefault(row.installer_id, []).append((row.start_time, row.end_time))
+
+    install_type_skills = current_app.config['INSTALL_TYPE_SKILLS']
+    assignments, unassignable = plan_assignments(
+        [(row.id, row.start_time, row.end_time, skill_rank(install_type_skills.get(row.install_type)))
+         for row in unassigned],
+        [(installer.id, skill_rank(installer.skill_level)) for installer in installers],
+        bookings
+    )
+
+    if assignments and not dry_run:
+        now = datetime.utcnow()
+        db.session.execute(
+            update(Appointment.__table__)
+            .where(Appointment.id == bindparam('appointment_id'))
+            .values(installer_id=bindparam('new_installer_id'), updated_at=now, version=Appointment.version + 1),
+            [{'appointment_id': appointment_id, 'new_installer_id': installer_id}
+             for appointment_id, installer_id in assignments.items()]
+        )
+        db.session.commit()
+    elif not dry_run:
+        db.session.rollback()  # Nothing to save: release the lock without bumping the calendar
+
+    installer_names = {installer.id: installer.name for installer in installers}
+    times = {row.id: (row.start_time, row.end_time) for row in unassigned}
+    return {
+        'dry_run': dry_run,
+        'assigned': [
+            {
+                'appointment_id': appointment_id,
+                'installer_id': installer_id,
+                'installer_name': installer_names[installer_id],
+                'start': times[appointment_id][0].isoformat(),
+                'end': times[appointment_id][1].isoformat()
+            }
+            for appointment_id, installer_id in sorted(assignments.items(), key=lambda item: times[item[0]])
+        ],
+        'unassigned': unassignable,
+        'elapsed_ms': round((datetime.now() - started).total_seconds() * 1000, 1)
+    }
+
+# Route for managers to auto-assign installers for a date range (dry_run previews the plan)
+@bp.route('/appointment/assign', methods=['POST'])
+@login_required
+def assign_installers_route():
+    if current_user.role != 'Manager':
+        return jsonify({'status': 'error', 'message': 'Access Denied'}), 403
+
+    data = request.get_json(silent=True) or request.form
+    try:
+        range_start = parse_range_param(data.get('start'))
+        range_end = parse_range_param(data.get('end'))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid date range'}), 400
+    if range_start is None or range_end is None or range_end <= range_start:
+        return jsonify({'status': 'error', 'message': 'Invalid date range'}), 400
+    dry_run = str(data.get('dry_run', '')).lower() in ('1', 'true', 'yes', 'on')
+
+    try:
+        result = assign_installers(range_start, range_end, dry_run)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error assigning installers: {e}')
+        return jsonify({'status': 'error', 'message': 'Error assigning installers'}), 500
+    return jsonify(dict(result, status='success'))
+
+# Command to auto-assign installers, e.g. `flask assign-installers --start 2024-08-05 --end 2024-08-12 --dry-run`
+@bp.cli.command('assign-installers')
+@click.option('--start', required=True, help='Start of the range (ISO date or datetime).')
+@click.option('--end', required=True, help='End of the range, exclusive.')
+@click.option('--dry-run', is_flag=True, help='Show the plan without saving it.')
+def assign_installers_command(start, end, dry_run):
+    result = assign_installers(datetime.fromisoformat(start), datetime.fromisoformat(end), dry_run)
+    for item in result['assigned']:
+        click.echo(f"Appointment #{item['appointment_id']} ({item['start']} - {item['end']}) -> {item['installer_name']}")
+    for appointment_id in result['unassigned']:
+        click.echo(f'Appointment #{appointment_id}: no qualified installer is free')
+    action = 'Planned' if dry_run else 'Assigned'
+    click.echo(f"{action} {len(result['assigned'])} appointment(s), {len(result['unassigned'])} left unassigned "
+               f"in {result['elapsed_ms']} ms")
+
+# Collapse customers sharing a normalized phone number into the oldest record, repointing
+# their vehicles and appointments, then merge the identical vehicles that leaves behind.
+# Commits every `batch_size` phone numbers, so an interrupted run can simply be restarted.
+def merge_duplicate_customers(batch_size=500, dry_run=False):
+    groups = {}
+    for customer_id, phone_number in db.session.execute(
+        select(Customer.id, Customer.phone_number).order_by(Customer.id)
+    ):
+        phone_normalized = normalize_phone(phone_number)
+        if phone_normalized:
+            groups.setdefault(phone_normalized, []).append(customer_id)
+
+    stats = {'phone_numbers': len(groups), 'customers_merged': 0, 'vehicles_merged': 0}
+    duplicated = [(phone, ids) for phone, ids in groups.items() if len(ids) > 1]
+    stats['customers_merged'] = sum(len(ids) - 1 for _, ids in duplicated)
+    if dry_run:
+        return stats
+
+    now = datetime.utcnow()
+    for offset in range(0, len(duplicated), batch_size):
+        for phone_normalized, (survivor_id, *duplicate_ids) in duplicated[offset:offset + batch_size]:
+            comments = [c for c in db.session.execute(
+                select(Customer.comments).where(Customer.id.in_([survivor_id] + duplicate_ids)).order_by(Customer.id)
+            ).scalars() if c]
+            db.session.execute(update(Vehicle).where(Vehicle.customer_id.in_(duplicate_ids)).values(customer_id=survivor_id))
+            db.session.execute(
+                update(Appointment).where(Appointment.customer_id.in_(duplicate_ids))
+                .values(customer_id=survivor_id, updated_at=now, version=Appointment.version + 1)
+            )
+            db.session.execute(
+                update(ArchivedAppointment).where(ArchivedAppointment.customer_id.in_(duplicate_ids))
+                .values(customer_id=survivor_id)
+            )
+            db.session.execute(delete(Customer).where(Customer.id.in_(duplicate_ids)))
+            db.session.execute(
+                update(Customer).where(Customer.id == survivor_id)
+                .values(phone_normalized=phone_normalized, comments='\n'.join(comments) or None)
+            )
+            stats['vehicles_merged'] += merge_duplicate_vehicles(survivor_id, now)
+        mark_calendar_changed()
+        db.session.commit()
+
+    # Backfill the index for customers that never had a duplicate
+    singles = [(phone, ids[0]) for phone, ids in groups.items() if len(ids) == 1]
+    for offset in range(0, len(singles), batch_size):
+        for phone_normalized, customer_id in singles[offset:offset + batch_size]:
+            db.session.execute(
+                update(Customer).where(Customer.id == customer_id, Customer.phone_normalized.is_(None))
+                .values(phone_normalized=phone_normalized)
+            )
+        db.session.commit()
+    return stats
+
+# Merge a customer's identical vehicles (same year, make and model) into the oldest one
+def merge_duplicate_vehicles(customer_id, now):
+    vehicles = {}
+    for vehicle_id, year, make, model in db.session.execute(
+        select(Vehicle.id, Vehicle.year, Vehicle.make, Vehicle.model)
+        .where(Vehicle.customer_id == customer_id).order_by(Vehicle.id)
+    ):
+        vehicles.setdefault((year, make, model), []).append(vehicle_id)
+
+    merged = 0
+    for survivor_id, *duplicate_ids in vehicles.values():
+        if duplicate_ids:
+            db.session.execute(
+                update(Appointment).where(Appointment.vehicle_id.in_(duplicate_ids))
+                .values(vehicle_id=survivor_id, updated_at=now, version=Appointment.version + 1)
+            )
+            db.session.execute(
+                update(ArchivedAppointment).where(ArchivedAppointment.vehicle_id.in_(duplicate_ids))
+                .values(vehicle_id=survivor_id)
+            )
+            db.session.execute(delete(Vehicle).where(Vehicle.id.in_(duplicate_ids)))
+            merged += len(duplicate_ids)
+    return merged
+
+# Command to merge duplicate customers, e.g. `flask merge-duplicate-customers --dry-run`
+@bp.cli.command('merge-duplicate-customers')
+@click.option('--batch-size', default=500, show_default=True, help='Phone numbers merged per transaction.')
+@click.option('--dry-run', is_flag=True, help='Only report how many customers would be merged.')
+def merge_duplicate_customers_command(batch_size, dry_run):
+    stats = merge_duplicate_customers(batch_size, dry_run)
+    action = 'Would merge' if dry_run else 'Merged'
+    click.echo(f"{action} {stats['customers_merged']} duplicate customer(s) across {stats['phone_numbers']} phone number(s)")
+    if not dry_run:
+        click.echo(f"Merged {stats['vehicles_merged']} duplicate vehicle(s)")
+
+# Route for ranked full-text search across appointments, customers and products
+@bp.route('/search')
+@login_required
+def search():
+    query = request.args.get('q', '').strip()
+    kinds = request.args.getlist('type') or list(fulltext.SEARCHES)
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid limit'}), 400
+    if any(kind not in fulltext.SEARCHES for kind in kinds):
+        return jsonify({'status': 'error', 'message': 'Invalid search type'}), 400
+
+    results = fulltext.search(db.session.connection(), query, limit, kinds) if query else []
+    return jsonify({'status': 'success', 'results': results})
+
+# Command to rebuild the full-text search index from scratch, e.g. after restoring a backup
+@bp.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    started = datetime.now()
+    fulltext.rebuild_search_index(db.session.connection())
+    db.session.commit()
+    click.echo(f'Rebuilt the search index in {(datetime.now() - started).total_seconds():.1f} s')
+
+# Command to recompute the revenue and workload rollups from scratch, e.g. after a bulk import
+@bp.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    started = datetime.now()
+    rollups.rebuild_rollups(db.session.connection())
+    db.session.commit()
+    click.echo(f'Rebuilt the rollups in {(datetime.now() - started).total_seconds():.1f} s')
+
+# Move the appointments that ended before `before`, with their jobs, into the archive tables.
+# Every batch is its own transaction, so an interrupted run keeps what it moved and the next
+# run carries on from there. The calendar version is bumped because the events become read-only.
+def archive_appointments(before, batch_size):
+    archived = 0
+    while True:
+        connection = db.session.connection()
+        ids = archive.next_batch(connection, before, batch_size)
+        if not ids:
+            db.session.rollback()
+            return archived
+        archive.archive_batch(connection, ids, datetime.utcnow())
+        mark_calendar_changed()
+        db.session.commit()
+        archived += len(ids)
+
+# Command to archive old appointments, e.g. nightly `flask archive-appointments`
+@bp.cli.command('archive-appointments')
+@click.option('--days', type=int, help='Archive appointments that ended this many days ago (default: ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, help='Appointments moved per transaction (default: ARCHIVE_BATCH_SIZE).')
+@click.option('--dry-run', is_flag=True, help='Only report how many appointments would be archived.')
+def archive_appointments_command(days, batch_size, dry_run):
+    days = current_app.config['ARCHIVE_AFTER_DAYS'] if days is None else days
+    before = datetime.combine((datetime.now() - timedelta(days=days)).date(), time.min)
+    if dry_run:
+        count = db.session.scalar(select(func.count()).where(Appointment.end_time < before))
+        click.echo(f'Would archive {count} appointment(s) that ended before {before:%Y-%m-%d}')
+        return
+
+    started = datetime.now()
+    count = archive_appointments(before, batch_size or current_app.config['ARCHIVE_BATCH_SIZE'])
+    click.echo(f'Archived {count} appointment(s) that ended before {before:%Y-%m-%d} '
+               f'in {(datetime.now() - started).total_seconds():.1f} s')
+
+# Queue background jobs in the current transaction, so they exist exactly when the change
+# that caused them commits. Each job is a dict with kind, payload and optional run_at and
+# key; queuing a key again reschedules that job (replace) or leaves the queued one alone.
+def enqueue_jobs(jobs, replace=True):
+    now = datetime.now()
+    rows = [
+        {
+            'kind': job['kind'],
+            'payload': json.dumps(job.get('payload') or {}),
+            'key': job.get('key'),
+            'run_at': job.get('run_at') or now,
+            'max_attempts': current_app.config['JOB_MAX_ATTEMPTS']
+        }
+        for job in jobs
+    ]
+    if not rows:
+        return
+
+    statement = sqlite_insert(BackgroundJob.__table__)
+    if replace:
+        statement = statement.on_conflict_do_update(index_elements=['key'], set_={
+            'payload': statement.excluded.payload,
+            'run_at': statement.excluded.run_at,
+            'status': job_queue.PENDING,
+            'attempts': 0,
+            'locked_until': None,
+            'last_error': None,
+            'finished_at': None
+        })
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=['key'])
+    db.session.execute(statement, rows)
+
+def enqueue_job(kind, payload=None, run_at=None, key=None, replace=True):
+    enqueue_jobs([{'kind': kind, 'payload': payload, 'run_at': run_at, 'key': key}], replace)
+
+def reminder_key(appointment_id):
+    return f'reminder:{appointment_id}'
+
+# (Re)schedule the reminders of appointments given as (id, start_time) pairs.
+# Appointments starting too soon for a reminder drop any pending one instead.
+def schedule_appointment_reminders(appointments):
+    lead = timedelta(hours=current_app.config['REMINDER_LEAD_HOURS'])
+    now = datetime.now()
+    due = [(appointment_id, start_time - lead) for appointment_id, start_time in appointments if start_time - lead > now]
+    enqueue_jobs([
+        {'kind': 'appointment_reminder', 'payload': {'appointment_id': appointment_id}, 'run_at': run_at,
+         'key': reminder_key(appointment_id)}
+        for appointment_id, run_at in due
+    ])
+    too_soon = [appointment_id for appointment_id, start_time in appointments if start_time - lead <= now]
+    if too_soon:
+        cancel_appointment_reminders(too_soon)
+
+def cancel_appointment_reminders(appointment_ids):
+    db.session.execute(
+        delete(BackgroundJob).where(
+            BackgroundJob.key.in_([reminder_key(appointment_id) for appointment_id in appointment_ids]),
+            BackgroundJob.status == job_queue.PENDING
+        )
+    )
+
+# Queue the report for `day`, sent the next morning at DAILY_REPORT_HOUR
+def schedule_daily_report(day):
+    run_at = datetime.combine(day + timedelta(days=1), time(current_app.config['DAILY_REPORT_HOUR']))
+    enqueue_job('daily_report', {'day': day.isoformat()}, run_at, key=f'daily_report:{day.isoformat()}', replace=False)
+
+# Sender used by the job handlers, built once per process from JOB_SENDER
+@functools.cache
+def job_sender():
+    return job_queue.load_sender(current_app.config['JOB_SENDER'], current_app.logger)
+
+# What a customer message needs to know about an appointment, or None if it was deleted
+def appointment_message_details(appointment_id):
+    return db.session.execute(calendar_event_query().where(Appointment.id == appointment_id)).first()
+
+def describe_booking(row):
+    return (f'your {row.product_name} installation for the {row.year} {row.make} {row.model} '
+            f"on {row.start_time.strftime('%A %B %d at %I:%M %p')}")
+
+def send_booking_confirmation(payload):
+    row = appointment_message_details(payload['appointment_id'])
+    if row is None or not row.phone_number:
+        return
+    job_sender().send(row.phone_number, 'Appointment confirmed', f'Hi {row.first_name}, we have booked {describe_booking(row)}.')
+
+def send_appointment_reminder(payload):
+    row = appointment_message_details(payload['appointment_id'])
+    if row is None or not row.phone_number or row.start_time <= datetime.now():
+        return
+    job_sender().send(row.phone_number, 'Appointment reminder', f'Hi {row.first_name}, a reminder about {describe_booking(row)}.')
+
+# Send one day's totals per installer from the rollups, after queuing the next day's report
+# so the chain continues even if sending fails and is retried
+def send_daily_report(payload):
+    day = datetime.fromisoformat(payload['day']).date()
+    schedule_daily_report(day + timedelta(days=1))
+    db.session.commit()
+
+    rows = rollups.report(db.session.connection(), 'installer', day, day + timedelta(days=1))
+    names = dict(db.session.execute(select(Installer.id, Installer.name)).all())
+    lines = [
+        f"{names.get(row['installer_id'], 'Unassigned')}: {row['appointments']} appointment(s), "
+        f"{row['hours']} h, ${row['revenue']:.2f}"
+        for row in rows
+    ]
+    lines.append(f"Total: {sum(row['appointments'] for row in rows)} appointment(s), "
+                 f"${sum(row['revenue'] for row in rows):.2f}")
+    job_sender().send(current_app.config['DAILY_REPORT_RECIPIENT'], f"Daily report for {day.strftime('%A %B %d')}", '\n'.join(lines))
+
+JOB_HANDLERS = {
+    'booking_confirmation': send_booking_confirmation,
+    'appointment_reminder': send_appointment_reminder,
+    'daily_report': send_daily_report,
+}
+
+# Run one due job in a fresh app context, or return None if nothing is due
+def run_next_job():
+    with current_app.app_context():
+        config = current_app.config
+        return job_queue.run_next_job(
+            db.engine, JOB_HANDLERS, config['JOB_LEASE_SECONDS'], *config['JOB_RETRY_SECONDS'], current_app.logger
+        )
+
+# Body of one worker process: run due jobs until asked to stop, pruning finished ones hourly.
+# Every worker builds its own application, so it never shares the parent's pooled connections.
+def job_worker(stop):
+    app = create_app()
+    last_pruned = None
+    while not stop.is_set():
+        if last_pruned is None or datetime.now() - last_pruned > timedelta(hours=1):
+            last_pruned = datetime.now()
+            with app.app_context():
+                job_queue.prune_jobs(db.session.connection(), last_pruned - timedelta(days=app.config['JOB_RETENTION_DAYS']))
+                db.session.commit()
+        with app.app_context():
+            job = run_next_job()
+        if job is None:
+            stop.wait(app.config['JOB_POLL_SECONDS'])
+
+# Command to run the background job workers, e.g. `flask run-jobs --processes 4`.
+# --drain runs the jobs that are due now in this process and exits, for tests and cron.
+@bp.cli.command('run-jobs')
+@click.option('--processes', type=int, help='Worker processes (default: JOB_WORKERS).')
+@click.option('--drain', is_flag=True, help='Run the due jobs in this process, then exit.')
+def run_jobs_command(processes, drain):
+    if drain:
+        count = 0
+        while run_next_job() is not None:
+            count += 1
+        click.echo(f'Ran {count} job(s)')
+        return
+
+    # Keep the nightly report chain going: queue the next report unless one is already queued
+    schedule_daily_report((datetime.now() - timedelta(hours=current_app.config['DAILY_REPORT_HOUR'])).date())
+    db.session.commit()
+    processes = processes or current_app.config['JOB_WORKERS']
+    click.echo(f'Starting {processes} job worker(s); press Ctrl-C to stop')
+    job_queue.run_pool(processes, job_worker)
 
 # Route to delete an appointment
-@app.route('/appointment/delete/<int:appointment_id>', methods=['POST'])
+@bp.route('/appointment/delete/<int:appointment_id>', methods=['POST'])
 @login_required
 def delete_appointment(appointment_id):
     appointment = db.session.get(Appointment, appointment_id)
@@ -425,16 +2137,19 @@ def delete_appointment(appointment_id):
         db.session.query(InstallationJob).filter_by(appointment_id=appointment.id).delete()
         
         db.session.delete(appointment)
+        record_appointment_deleted(appointment.id)
+        cancel_appointment_reminders([appointment.id])
+        mark_calendar_changed()
         db.session.commit()
         return jsonify({'status': 'success', 'message': 'Appointment deleted successfully'})
     else:
         return jsonify({'status': 'error', 'message': 'Appointment not found'}), 404
 
 # Route to edit an existing appointment
-@app.route('/appointment/edit/<int:appointment_id>', methods=['POST'])
+@bp.route('/appointment/edit/<int:appointment_id>', methods=['POST'])
 @login_required
 def edit_appointment(appointment_id):
-    appointment = Appointment.query.get(appointment_id)
+    appointment = db.session.get(Appointment, appointment_id)
     
     if appointment:
         try:
@@ -443,142 +2158,172 @@ def edit_appointment(appointment_id):
             duration_str = request.form.get('duration')
             if not start_time or not duration_str:
                 return jsonify({'status': 'error', 'message': 'Invalid data'}), 400
-            
+            version = expected_version(request.form)
+            if version is None:
+                return missing_version_response()
+
             duration = int(duration_str)
-            appointment.start_time = datetime.fromisoformat(start_time)
-            appointment.end_time = appointment.start_time + timedelta(hours=duration)
+            start_time = datetime.fromisoformat(start_time)
+            end_time = start_time + timedelta(hours=duration)
+
+            installer_id = appointment.installer_id
+            if 'installer_id' in request.form:
+                installer_id = parse_installer_id(request.form.get('installer_id'))
+            lock_bookings()
+            ensure_no_installer_conflicts(installer_id, start_time, end_time, appointment.id)
+
+            # Update times, installer, installation type and notes if nobody else saved first.
+            # This also touches updated_at, so job-only edits still show up in delta sync.
+            version = update_appointment_if_current(
+                appointment.id, version,
+                start_time=start_time,
+                end_time=end_time,
+                installer_id=installer_id,
+                install_type=request.form.get('installation_type'),
+                comments=request.form.get('notes')
+            )
 
             # Update vehicle information
             vehicle_year = request.form.get('vehicle_year')
             vehicle_make = request.form.get('vehicle_make')
             vehicle_model = request.form.get('vehicle_model')
             if vehicle_year and vehicle_make and vehicle_model:
-                vehicle = appointment.vehicle
-                vehicle.year = vehicle_year
-                vehicle.make = vehicle_make
-                vehicle.model = vehicle_model
-
-            # Update installation type and notes
-            appointment.install_type = request.form.get('installation_type')
-            appointment.comments = request.form.get('notes')
+                db.session.execute(
+                    update(Vehicle).where(Vehicle.id == appointment.vehicle_id)
+                    .values(year=vehicle_year, make=vehicle_make, model=vehicle_model)
+                )
 
-            # Update installation jobs
-            existing_jobs = {job.id: job for job in appointment.installation_jobs}
+            # Apply the job diff with one DELETE, one executemany UPDATE and one bulk INSERT.
+            # Submitted jobs without an id are new.
             form_job_ids = request.form.getlist('installation_job_id[]')
             form_job_details = request.form.getlist('edit_installation_job[]')
             form_job_prices = request.form.getlist('edit_installation_price[]')
-
-            # Remove jobs not in form
-            for job_id in existing_jobs:
-                if str(job_id) not in form_job_ids:
-                    db.session.delete(existing_jobs[job_id])
-
-            # Add or update jobs
-            for idx, job_id in enumerate(form_job_ids):
-                job_details = form_job_details[idx]
-                job_price = form_job_prices[idx]
+            kept_jobs, new_jobs = [], []
+            for idx, job_details in enumerate(form_job_details):
+                job_id = form_job_ids[idx] if idx < len(form_job_ids) else ''
+                job_price = float(form_job_prices[idx])
                 if job_id:
-                    # Update existing job
-                    job = existing_jobs.get(int(job_id))
-                    if job:
-                        job.job_details = job_details
-                        job.price = float(job_price)
+                    kept_jobs.append({'job_id': int(job_id), 'new_details': job_details, 'new_price': job_price})
                 else:
-                    # Create new job
-                    new_job = InstallationJob(
-                        job_details=job_details,
-                        price=float(job_price),
-                        appointment_id=appointment.id
-                    )
-                    db.session.add(new_job)
+                    new_jobs.append({'job_details': job_details, 'price': job_price, 'appointment_id': appointment.id})
 
+            # Remove jobs not in form
+            db.session.execute(
+                delete(InstallationJob.__table__).where(
+                    InstallationJob.appointment_id == appointment.id,
+                    InstallationJob.id.not_in([job['job_id'] for job in kept_jobs])
+                )
+            )
+            # Update the rest; ids belonging to another appointment match nothing
+            if kept_jobs:
+                db.session.execute(
+                    update(InstallationJob.__table__)
+                    .where(InstallationJob.id == bindparam('job_id'), InstallationJob.appointment_id == appointment.id)
+                    .values(job_details=bindparam('new_details'), price=bindparam('new_price')),
+                    kept_jobs
+                )
+            if new_jobs:
+                db.session.execute(insert(InstallationJob), new_jobs)
+
+            schedule_appointment_reminders([(appointment.id, start_time)])
             db.session.commit()
             print('success')
-            return jsonify({'status': 'success', 'message': 'Appointment updated successfully'})
-        
+            return jsonify({'status': 'success', 'message': 'Appointment updated successfully', 'version': version})
+
+        except BookingConflict as conflict:
+            db.session.rollback()
+            return booking_conflict_response(conflict)
+        except StaleAppointment as stale:
+            db.session.rollback()
+            return stale_appointment_response(stale)
         except Exception as e:
             db.session.rollback()
-            app.logger.error(f'Error editing appointment: {e}')
+            current_app.logger.error(f'Error editing appointment: {e}')
             return jsonify({'status': 'error', 'message': 'Error editing appointment'}), 500
     else:
         return jsonify({'status': 'error', 'message': 'Appointment not found'}), 404
 
 # Route to move an appointment to a new time
-@app.route('/appointment/move/<int:appointment_id>', methods=['POST'])
+@bp.route('/appointment/move/<int:appointment_id>', methods=['POST'])
 @login_required
 def move_appointment(appointment_id):
-    appointment = Appointment.query.get(appointment_id)
+    appointment = db.session.get(Appointment, appointment_id)
     if appointment:
         start_time = request.form.get('start_time')
         end_time = request.form.get('end_time')
         
         if not start_time or not end_time:
             return jsonify({'status': 'error', 'message': 'Invalid data'}), 400
-        
+        version = expected_version(request.form)
+        if version is None:
+            return missing_version_response()
+
         try:
             # Parse the ISO format datetime strings to Python datetime objects
             start_time_dt = datetime.fromisoformat(start_time)
             end_time_dt = datetime.fromisoformat(end_time)
-            
+            lock_bookings()
+            ensure_no_installer_conflicts(appointment.installer_id, start_time_dt, end_time_dt, appointment.id)
+
             # Update the appointment's start and end times
-            appointment.start_time = start_time_dt
-            appointment.end_time = end_time_dt
+            version = update_appointment_if_current(appointment.id, version, start_time=start_time_dt, end_time=end_time_dt)
 
+            schedule_appointment_reminders([(appointment.id, start_time_dt)])
             db.session.commit()
-            return jsonify({'status': 'success'})
+            return jsonify({'status': 'success', 'version': version})
+        except BookingConflict as conflict:
+            db.session.rollback()
+            return booking_conflict_response(conflict)
+        except StaleAppointment as stale:
+            db.session.rollback()
+            return stale_appointment_response(stale)
         except Exception as e:
             db.session.rollback()
-            app.logger.error(f'Error moving appointment: {e}')
+            current_app.logger.error(f'Error moving appointment: {e}')
             return jsonify({'status': 'error', 'message': 'Error moving appointment'}), 500
     else:
         return jsonify({'status': 'error', 'message': 'Appointment not found'}), 404
 
-
-# Function to print all products, along with associated customer and vehicle, on app startup
-def print_products_on_startup():
-    products = Product.query.all()
-    if products:
-        print("Products in the database:")
-        for product in products:
-            print(f'Product Name: {product.name}, Price: {product.price}, Type: {product.type}')
-            
-            # Loop through the associated appointments
-            for appointment in product.appointments:
-                customer = appointment.customer
-                vehicle = appointment.vehicle
-                
-                if customer:
-                    print(f'  Customer Name: {customer.first_name} {customer.last_name}, Phone: {customer.phone_number}')
-                else:
-                    print("  No customer associated with this product.")
-                
-                if vehicle:
-                    print(f'  Vehicle: {vehicle.year} {vehicle.make} {vehicle.model}')
-                else:
-                    print("  No vehicle associated with this product.")
-    else:
-        print("No products found in the database.")
-  
-
-
-# Run the app
+# Command to fingerprint and precompress the static files and precompile the templates,
+# run on every deploy before the workers start
+@bp.cli.command('build-assets')
+def build_assets_command():
+    started = datetime.now()
+    manifest = assets.build_assets(current_app.static_folder)
+    for name in current_app.jinja_env.list_templates():
+        current_app.jinja_env.get_template(name)
+    click.echo(f'Built {len(manifest)} asset(s) and compiled the templates in {(datetime.now() - started).total_seconds():.1f} s')
+
+# Command to summarize the database, e.g. `flask stats`: row counts and date ranges, each from
+# one aggregate query, so it stays quick however much data there is
+@bp.cli.command('stats')
+def stats_command():
+    tables = [
+        ('Users', User, None),
+        ('Customers', Customer, None),
+        ('Vehicles', Vehicle, None),
+        ('Products', Product, None),
+        ('Installers', Installer, None),
+        ('Appointments', Appointment, Appointment.start_time),
+        ('Installation jobs', InstallationJob, None),
+        ('Archived appointments', ArchivedAppointment, ArchivedAppointment.start_time),
+        ('Archived jobs', ArchivedInstallationJob, None),
+        ('Rollup rows', DailyRollup, DailyRollup.day),
+    ]
+    for label, model, dated in tables:
+        if dated is None:
+            count = db.session.scalar(select(func.count()).select_from(model))
+            click.echo(f'{label:<24}{count:>10,}')
+            continue
+        count, first, last = db.session.execute(select(func.count(), func.min(dated), func.max(dated)).select_from(model)).one()
+        span = f'  {first:%Y-%m-%d} to {last:%Y-%m-%d}' if count else ''
+        click.echo(f'{label:<24}{count:>10,}{span}')
+
+    statuses = db.session.execute(select(BackgroundJob.status, func.count()).group_by(BackgroundJob.status)).all()
+    breakdown = ', '.join(f'{count:,} {status}' for status, count in sorted(statuses))
+    click.echo(f"{'Background jobs':<24}{sum(count for _, count in statuses):>10,}  {breakdown}".rstrip())
+
+
+# Run the development server. The schema comes from `flask db upgrade`; `flask stats` summarizes the data.
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
-    with app.app_context():
-        db.create_all()
-
-        print_products_on_startup()
-
-
-        # Query and print appointment start and end times
-        appointments = Appointment.query.all()
-        if appointments:
-            for appointment in appointments:
-                print(f'Appointment ID: {appointment.id}, Start time: {appointment.start_time}, End time: {appointment.end_time}')
-        else:
-            print('No appointments found in the database.')
-
-    
-        
-
-        app.run(debug=True)
+    create_app().run(host='0.0.0.0', port=5000)
@@ -0,0 +1,55 @@
+from sqlalchemy import DateTime, bindparam, text
+
+
+# Hot/cold split of the appointment history.
+#
+# Appointments that ended before the archive horizon move, with their installation jobs, from
+# appointment and installation_job to archived_appointment and archived_installation_job in
+# the same database. The hot tables and their indexes then only hold the recent and upcoming
+# bookings that the calendar, conflict checks and edits work on, so their pages stay cached
+# no matter how many years of history the shop has.
+#
+# Archived appointments keep their id (appointment ids are AUTOINCREMENT, so never reused).
+# The rollup delete triggers skip rows that are in the archive, so reports still include
+# them. Read paths that take a date range add the archive only when the range starts before
+# the newest archived end time; see app.appointment_tables.
+
+APPOINTMENT_COLUMNS = (
+    'id, start_time, end_time, customer_id, vehicle_id, installer_id, product_id, '
+    'install_type, comments, updated_at, version'
+)
+JOB_COLUMNS = 'job_details, price, appointment_id, updated_at'
+
+NEXT_BATCH = text(
+    'SELECT id FROM appointment WHERE end_time < :before ORDER BY end_time, id LIMIT :limit'
+).bindparams(bindparam('before', type_=DateTime()))
+
+COPY_APPOINTMENTS = text(f"""
+    INSERT INTO archived_appointment ({APPOINTMENT_COLUMNS}, archived_at)
+    SELECT {APPOINTMENT_COLUMNS}, :now FROM appointment WHERE id IN :ids
+""").bindparams(bindparam('now', type_=DateTime()), bindparam('ids', expanding=True))
+
+COPY_JOBS = text(f"""
+    INSERT INTO archived_installation_job ({JOB_COLUMNS})
+    SELECT {JOB_COLUMNS} FROM installation_job WHERE appointment_id IN :ids ORDER BY id
+""").bindparams(bindparam('ids', expanding=True))
+
+# Jobs go first: the rollup triggers find the appointment in the archive and leave them counted
+DELETE_JOBS = text('DELETE FROM installation_job WHERE appointment_id IN :ids').bindparams(
+    bindparam('ids', expanding=True)
+)
+DELETE_APPOINTMENTS = text('DELETE FROM appointment WHERE id IN :ids').bindparams(bindparam('ids', expanding=True))
+
+
+# Ids of the next `batch_size` appointments that ended before `before`, oldest first
+def next_batch(connection, before, batch_size):
+    return connection.execute(NEXT_BATCH, {'before': before, 'limit': batch_size}).scalars().all()
+
+
+# Move the given appointments and their jobs into the archive. The caller commits, so a batch
+# is moved completely or not at all and an interrupted run resumes with the next batch.
+def archive_batch(connection, ids, now):
+    connection.execute(COPY_APPOINTMENTS, {'ids': ids, 'now': now})
+    connection.execute(COPY_JOBS, {'ids': ids})
+    connection.execute(DELETE_JOBS, {'ids': ids})
+    connection.execute(DELETE_APPOINTMENTS, {'ids': ids})
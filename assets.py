@@ -0,0 +1,86 @@
+import gzip
+import hashlib
+import json
+import os
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip copies are always written
+    brotli = None
+
+
+# Fingerprinted static assets.
+#
+# `flask build-assets` copies every file under static/ into static/dist/ with a hash of its
+# content in the name (app_script.js -> app_script.1f3c9a0b7e42.js), next to .gz and, with
+# brotli installed, .br copies compressed once at build time. manifest.json maps the original
+# names to the hashed ones. A changed file gets a new URL, so a hashed URL can be cached for a
+# year without ever being revalidated. Files of earlier builds are kept, so pages rendered
+# before a deploy can still load their assets.
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+COMPRESSIBLE = {'.js', '.css', '.svg', '.json', '.html', '.txt', '.map'}
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _write(path, content):
+    # Readers never see a half-written file: write next to it, then rename over it
+    partial = path + '.partial'
+    with open(partial, 'wb') as output:
+        output.write(content)
+    os.replace(partial, path)
+
+
+def fingerprint(name, content):
+    stem, extension = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{extension}'
+
+
+# Copy, fingerprint and compress everything under static_folder; returns the manifest
+def build_assets(static_folder):
+    output = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+    for directory, subdirectories, files in os.walk(static_folder):
+        if directory == static_folder and DIST_DIR in subdirectories:
+            subdirectories.remove(DIST_DIR)
+        for filename in sorted(files):
+            source = os.path.join(directory, filename)
+            name = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as file:
+                content = file.read()
+
+            hashed = fingerprint(name, content)
+            target = os.path.join(output, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            _write(target, content)
+            if os.path.splitext(name)[1] in COMPRESSIBLE:
+                compressed = {'.gz': gzip.compress(content, 9, mtime=0)}
+                if brotli is not None:
+                    compressed['.br'] = brotli.compress(content, quality=11)
+                for suffix, data in compressed.items():
+                    if len(data) < len(content):
+                        _write(target + suffix, data)
+            manifest[name] = hashed
+
+    os.makedirs(output, exist_ok=True)
+    _write(os.path.join(output, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+# The manifest of the last build, or an empty one when assets were never built
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST), encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+# The precompressed copy of `path` the client accepts, best first, or the file itself:
+# returns (content coding or None, path to send)
+def select_variant(path, accept_encodings):
+    for encoding, suffix in ENCODINGS:
+        if accept_encodings[encoding] and os.path.isfile(path + suffix):
+            return encoding, path + suffix
+    return None, path
@@ -0,0 +1,44 @@
+from intervals import BookingTimeline
+
+
+# Greedy installer assignment for a batch of unassigned appointments.
+#
+# appointments: iterable of (appointment_id, start, end, required_rank)
+# installers:   iterable of (installer_id, skill_rank)
+# bookings:     dict of installer_id -> [(start, end), ...] already on their schedule
+#
+# Appointments are planned most-constrained first (fewest qualified installers, then the
+# longest jobs), and each goes to the qualified, free installer with the fewest booked
+# hours so far; ties go to the lower-skilled installer to keep experts available.
+# Returns (assignments, unassigned) where assignments maps appointment_id -> installer_id.
+def plan_assignments(appointments, installers, bookings):
+    installers = sorted(installers, key=lambda installer: (installer[1], installer[0]))
+    timelines = {installer_id: BookingTimeline(bookings.get(installer_id, ())) for installer_id, _ in installers}
+    load = {
+        installer_id: sum((end - start).total_seconds() for start, end in bookings.get(installer_id, ()))
+        for installer_id, _ in installers
+    }
+
+    candidates = {}
+    for appointment in appointments:
+        required_rank = appointment[3]
+        candidates[appointment] = [installer_id for installer_id, rank in installers if rank >= required_rank]
+
+    order = sorted(candidates, key=lambda a: (len(candidates[a]), -(a[2] - a[1]).total_seconds(), a[1], a[0]))
+
+    assignments = {}
+    unassigned = []
+    for appointment in order:
+        appointment_id, start, end, _ = appointment
+        best = None
+        for installer_id in candidates[appointment]:
+            if (best is None or load[installer_id] < load[best]) and timelines[installer_id].is_free(start, end):
+                best = installer_id
+        if best is None:
+            unassigned.append(appointment_id)
+            continue
+        timelines[best].add(start, end)
+        load[best] += (end - start).total_seconds()
+        assignments[appointment_id] = best
+
+    return assignments, sorted(unassigned)
@@ -0,0 +1,72 @@
+"""Measure how long the installer assignment planner takes on synthetic weeks.
+
+Run from the project root:
+
+    python benchmarks/assignment_benchmark.py
+    python benchmarks/assignment_benchmark.py --appointments 5000 --installers 40
+
+The planner is pure Python over plain tuples, so no database is needed.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assignment import plan_assignments  # noqa: E402
+
+
+def build_week(appointment_count, installer_count, booked_fraction, seed):
+    rng = random.Random(seed)
+    week_start = datetime(2024, 8, 5, 8)
+
+    installers = [(installer_id, rng.randint(0, 3)) for installer_id in range(1, installer_count + 1)]
+
+    def random_slot():
+        day = rng.randrange(6)
+        hour = rng.randrange(10)
+        duration = rng.choice([1, 1, 2, 2, 3, 4, 8])
+        start = week_start + timedelta(days=day, hours=hour)
+        return start, start + timedelta(hours=min(duration, 10 - hour))
+
+    bookings = {}
+    for installer_id, _ in installers:
+        for _ in range(int(30 * booked_fraction)):
+            bookings.setdefault(installer_id, []).append(random_slot())
+
+    appointments = []
+    for appointment_id in range(1, appointment_count + 1):
+        start, end = random_slot()
+        appointments.append((appointment_id, start, end, rng.choice([0, 0, 0, 2])))
+    return appointments, installers, bookings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--appointments', type=int, nargs='+', default=[1000, 2500, 5000])
+    parser.add_argument('--installers', type=int, default=120)
+    parser.add_argument('--booked-fraction', type=float, default=0.2)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'appointments':>12} {'installers':>10} {'assigned':>8} {'unassigned':>10} {'best ms':>8} {'median ms':>9}")
+    for appointment_count in args.appointments:
+        appointments, installers, bookings = build_week(
+            appointment_count, args.installers, args.booked_fraction, args.seed
+        )
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            assignments, unassigned = plan_assignments(appointments, installers, bookings)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print(f'{appointment_count:>12} {args.installers:>10} {len(assignments):>8} {len(unassigned):>10} '
+              f'{timings[0]:>8.1f} {timings[len(timings) // 2]:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""Measure throughput and "database is locked" failures with several gunicorn workers.
+
+Run from the project root (needs gunicorn installed):
+
+    python benchmarks/concurrency_benchmark.py
+    python benchmarks/concurrency_benchmark.py --workers 8 --clients 32 --write-ratio 0.5
+    python benchmarks/concurrency_benchmark.py --journal-mode DELETE --busy-timeout 0
+
+Each run gets a fresh SQLite file in a temporary directory. The script seeds it, starts
+gunicorn against it with the database profile taken from the environment (see database.py),
+and then has every client log in and mix calendar reads (/events) with bookings (/schedule).
+Comparing the default WAL profile with --journal-mode DELETE --busy-timeout 0 shows the
+difference in failed writes and in read latency while writes are in flight.
+"""
+import argparse
+import http.cookiejar
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'benchmark'
+WEEK_START = datetime(2024, 8, 5, 8)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def seed_database(env, appointment_count):
+    # Import the app with the benchmark's environment so it binds to the temporary database
+    os.environ.update(env)
+    import app as application
+    from flask_migrate import upgrade
+
+    rng = random.Random(1)
+    with application.create_app().app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+        db = application.db
+        sales = application.User(username='sales', role='Sales')
+        sales.set_password(PASSWORD)
+        db.session.add(sales)
+        customer = application.Customer(first_name='Bench', last_name='Mark', phone_number='4065550000',
+                                        phone_normalized='4065550000')
+        db.session.add(customer)
+        db.session.flush()
+        vehicle = application.Vehicle(year=2020, make='Toyota', model='Tacoma', customer_id=customer.id)
+        product = application.Product(name='Amplifier', price=199.0, type='standard')
+        db.session.add_all([vehicle, product])
+        db.session.flush()
+        for _ in range(appointment_count):
+            start = WEEK_START + timedelta(days=rng.randrange(6), hours=rng.randrange(9))
+            db.session.add(application.Appointment(
+                start_time=start, end_time=start + timedelta(hours=1), customer_id=customer.id,
+                vehicle_id=vehicle.id, product_id=product.id, install_type='standard'
+            ))
+        db.session.commit()
+
+
+def wait_until_listening(port, server, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError('gunicorn exited before it started listening')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('gunicorn did not start listening in time')
+
+
+class Client(threading.Thread):
+    def __init__(self, base_url, number, request_count, write_ratio):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.number = number
+        self.request_count = request_count
+        self.write_ratio = write_ratio
+        self.rng = random.Random(number)
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        self.timings = {'read': [], 'write': []}
+        self.failures = {'read': 0, 'write': 0}
+
+    def post(self, path, fields):
+        return self.opener.open(self.base_url + path, urllib.parse.urlencode(fields, doseq=True).encode(), timeout=60)
+
+    def run(self):
+        self.post('/login/sales', {'username': 'sales', 'password': PASSWORD}).read()
+        for sequence in range(self.request_count):
+            if self.rng.random() < self.write_ratio:
+                kind = 'write'
+                start = WEEK_START + timedelta(days=self.rng.randrange(6), hours=self.rng.randrange(9))
+                request = lambda: self.post('/schedule', {
+                    'start_time': start.isoformat(), 'duration': '1',
+                    'customer_first_name': 'Load', 'customer_last_name': f'Client{self.number}',
+                    'customer_phone': f'555{self.number:03d}{sequence:04d}',
+                    'vehicle_year': '2021', 'vehicle_make': 'Ford', 'vehicle_model': 'F-150',
+                    'product_name[]': 'Subwoofer', 'product_price[]': '299', 'installation_type': 'standard',
+                    'installation_job[]': ['Wiring', 'Mounting'], 'installation_price[]': ['50', '75'],
+                })
+            else:
+                kind = 'read'
+                query = urllib.parse.urlencode({'start': WEEK_START.isoformat(),
+                                                'end': (WEEK_START + timedelta(days=7)).isoformat()})
+                request = lambda: self.opener.open(f'{self.base_url}/events?{query}', timeout=60)
+
+            started = time.perf_counter()
+            try:
+                with request() as response:
+                    response.read()
+            except (urllib.error.HTTPError, urllib.error.URLError, TimeoutError):
+                self.failures[kind] += 1
+                continue
+            self.timings[kind].append(time.perf_counter() - started)
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent client threads')
+    parser.add_argument('--requests', type=int, default=50, help='requests per client')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='share of requests that book an appointment')
+    parser.add_argument('--appointments', type=int, default=2000, help='appointments seeded before the run')
+    parser.add_argument('--journal-mode', default='WAL')
+    parser.add_argument('--synchronous', default='NORMAL')
+    parser.add_argument('--busy-timeout', type=int, default=5000, help='milliseconds')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            'DATABASE_URL': f"sqlite:///{os.path.join(directory, 'benchmark.db')}",
+            'SQLITE_JOURNAL_MODE': args.journal_mode,
+            'SQLITE_SYNCHRONOUS': args.synchronous,
+            'SQLITE_BUSY_TIMEOUT_MS': str(args.busy_timeout),
+            'SECRET_KEY': os.getenv('SECRET_KEY') or 'benchmark-secret',
+        }
+        seed_database(env, args.appointments)
+
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--workers', str(args.workers), '--bind', f'127.0.0.1:{port}',
+             '--log-level', 'warning', 'app:create_app()'],
+            cwd=ROOT, env=dict(os.environ, **env)
+        )
+        try:
+            wait_until_listening(port, server)
+            clients = [Client(f'http://127.0.0.1:{port}', number, args.requests, args.write_ratio)
+                       for number in range(args.clients)]
+            started = time.perf_counter()
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f'{args.workers} workers, {args.clients} clients, journal_mode={args.journal_mode}, '
+          f'synchronous={args.synchronous}, busy_timeout={args.busy_timeout}ms')
+    total = 0
+    for kind in ('read', 'write'):
+        timings = [t for client in clients for t in client.timings[kind]]
+        failures = sum(client.failures[kind] for client in clients)
+        total += len(timings)
+        print(f'  {kind:5}  ok {len(timings):5}  failed {failures:4}  '
+              f'p50 {percentile(timings, 0.50) * 1000:7.1f} ms  p95 {percentile(timings, 0.95) * 1000:7.1f} ms'
+              + (f'  mean {statistics.mean(timings) * 1000:7.1f} ms' if timings else ''))
+    print(f'  throughput {total / elapsed:.0f} successful requests/s over {elapsed:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""Measure latency, SQL query counts and peak memory of the scheduling endpoints.
+
+Run from the project root:
+
+    python benchmarks/endpoint_benchmark.py
+    python benchmarks/endpoint_benchmark.py --customers 10000 --appointments 200000
+    python benchmarks/endpoint_benchmark.py --database /tmp/car_audio_bench.db --json results.json
+    python benchmarks/endpoint_benchmark.py --database /tmp/car_audio_bench.db --baseline results.json
+
+Without --database a temporary SQLite file is seeded with benchmarks/seed_data.py using the
+count options; pass --database to reuse a file seeded earlier with the same password. Requests
+go through Flask's test client as the seeded manager, so no server is needed.
+
+Each case runs --iterations times for p50/p95 latency and the mean number of SQL statements
+per request, then a few more times under tracemalloc for peak Python memory (kept out of
+the latency runs because tracing slows everything down). --json saves the results and
+--baseline compares against a saved run, exiting non-zero if any case's p95 latency or
+query count grew by more than --threshold.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from seed_data import add_count_arguments, count_arguments, seed_database  # noqa: E402
+
+
+# Benchmark cases: (name, prepare) where prepare(rng) returns the request to time as
+# (method, path, form data, query string). Reads come first so the write cases
+# cannot invalidate the cached /events case.
+def build_cases(application, data_start, data_end):
+    from sqlalchemy import func, select
+
+    db = application.db
+    span_days = max((data_end - data_start).days - 31, 1)
+    max_appointment_id = db.session.scalar(select(func.max(application.Appointment.id)))
+
+    def random_week(rng):
+        week_start = data_start + timedelta(days=rng.randrange(span_days))
+        return {'start': week_start.isoformat(), 'end': (week_start + timedelta(days=7)).isoformat()}
+
+    def random_month(rng):
+        month_start = data_start + timedelta(days=rng.randrange(span_days))
+        return {'start': month_start.isoformat(), 'end': (month_start + timedelta(days=31)).isoformat()}
+
+    fixed_week = random_week(random.Random(0))
+
+    def uncached(prepare):
+        def run(rng):
+            application.events_cache().clear()
+            return prepare(rng)
+        return run
+
+    def random_appointment(rng):
+        return db.session.get(application.Appointment, rng.randint(1, max_appointment_id))
+
+    def edit(rng):
+        appointment = random_appointment(rng)
+        jobs = appointment.installation_jobs
+        hours = max(1, round((appointment.end_time - appointment.start_time).total_seconds() / 3600))
+        form = {
+            'start_time': appointment.start_time.isoformat(),
+            'duration': str(hours),
+            'installation_type': appointment.install_type,
+            'notes': appointment.comments or '',
+            'version': str(appointment.version),
+            'installation_job_id[]': [str(job.id) for job in jobs],
+            'edit_installation_job[]': [job.job_details for job in jobs],
+            'edit_installation_price[]': [str(job.price) for job in jobs],
+        }
+        return 'POST', f'/appointment/edit/{appointment.id}', form, None
+
+    def move(rng):
+        appointment = random_appointment(rng)
+        form = {'start_time': appointment.start_time.isoformat(), 'end_time': appointment.end_time.isoformat(),
+                'version': str(appointment.version)}
+        return 'POST', f'/appointment/move/{appointment.id}', form, None
+
+    booking_numbers = iter(range(10 ** 6))
+
+    def book(rng):
+        number = next(booking_numbers)
+        start = data_start + timedelta(days=rng.randrange(span_days), hours=rng.randrange(8))
+        form = {
+            'start_time': start.isoformat(), 'duration': str(rng.choice([1, 2, 3])),
+            'customer_first_name': 'Bench', 'customer_last_name': 'Booking',
+            'customer_phone': f'555{number:07d}',
+            'vehicle_year': '2021', 'vehicle_make': 'Ford', 'vehicle_model': 'F-150',
+            'product_name[]': 'Benchmark Amplifier', 'product_price[]': '299', 'installation_type': 'standard',
+            'installation_job[]': ['Wiring harness', 'Mount amplifier'], 'installation_price[]': ['50', '75'],
+        }
+        return 'POST', '/schedule', form, None
+
+    return [
+        ('GET /events (week)', uncached(lambda rng: ('GET', '/events', None, random_week(rng)))),
+        ('GET /events (month)', uncached(lambda rng: ('GET', '/events', None, random_month(rng)))),
+        ('GET /events (cached)', lambda rng: ('GET', '/events', None, fixed_week)),
+        ('GET /schedule', lambda rng: ('GET', '/schedule', None, None)),
+        ('GET /manager_dashboard', lambda rng: ('GET', '/manager_dashboard', None, None)),
+        ('GET /manager_dashboard/users', lambda rng: ('GET', '/manager_dashboard/users', None, None)),
+        ('GET /manager_dashboard/customers',
+         lambda rng: ('GET', '/manager_dashboard/customers', None, {'q': rng.choice('ABCDGHJLMRSTW')})),
+        ('GET /manager_dashboard/appointments',
+         lambda rng: ('GET', '/manager_dashboard/appointments', None,
+                      {'q': (data_start + timedelta(days=rng.randrange(span_days))).strftime('%Y-%m-%d')})),
+        ('POST /appointment/edit', edit),
+        ('POST /appointment/move', move),
+        ('POST /schedule', book),
+    ]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+# Requests run outside any app context, like in production, so each gets a fresh session
+def prepare_request(app, prepare, rng):
+    with app.app_context():
+        return prepare(rng)
+
+
+def run_case(app, client, prepare, rng, iterations, counter):
+    latencies, queries, failures = [], [], 0
+    for _ in range(iterations):
+        method, path, form, query_string = prepare_request(app, prepare, rng)
+        counter[0] = 0
+        started = time.perf_counter()
+        response = client.open(path, method=method, data=form, query_string=query_string)
+        latencies.append(time.perf_counter() - started)
+        queries.append(counter[0])
+        if response.status_code >= 400:
+            failures += 1
+    return latencies, queries, failures
+
+
+def measure_peak_memory(app, client, prepare, rng, iterations):
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        for _ in range(iterations):
+            method, path, form, query_string = prepare_request(app, prepare, rng)
+            client.open(path, method=method, data=form, query_string=query_string)
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in ('p95_ms', 'queries'):
+            if previous[metric] and result[metric] > previous[metric] * threshold:
+                regressions.append(f'{name}: {metric} {previous[metric]:.1f} -> {result[metric]:.1f}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', help='existing seeded SQLite file (default: seed a temporary one)')
+    parser.add_argument('--iterations', type=int, default=50, help='timed requests per case')
+    parser.add_argument('--memory-iterations', type=int, default=5, help='requests per case under tracemalloc')
+    parser.add_argument('--only', help='run only cases whose name contains this text')
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--baseline', help='results file of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25, help='allowed growth factor before flagging')
+    add_count_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.database
+        if not path:
+            path = os.path.join(directory, 'benchmark.db')
+            started = time.perf_counter()
+            totals = seed_database(path, **count_arguments(args))
+            print(f"seeded {totals['customers']} customers, {totals['appointments']} appointments "
+                  f"and {totals['installation_jobs']} jobs in {time.perf_counter() - started:.1f}s")
+        else:
+            os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(path)}'
+            os.environ.setdefault('SECRET_KEY', 'benchmark-secret')
+        results = run_benchmarks(args)
+
+    print(f"{'case':38} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'peak MB':>8} {'failed':>7}")
+    for name, result in results.items():
+        print(f"{name:38} {result['p50_ms']:8.1f} {result['p95_ms']:8.1f} {result['queries']:8.1f} "
+              f"{result['peak_mb']:8.2f} {result['failed']:7}")
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+def run_benchmarks(args):
+    import app as application
+    from sqlalchemy import event, func, select
+
+    counter = [0]
+    app = application.create_app()
+    with app.app_context():
+        @event.listens_for(application.db.engine, 'before_cursor_execute')
+        def count_query(*_):
+            counter[0] += 1
+
+        Appointment = application.Appointment
+        data_start, data_end = application.db.session.execute(
+            select(func.min(Appointment.start_time), func.max(Appointment.start_time))
+        ).one()
+        cases = build_cases(application, data_start, data_end)
+
+    client = app.test_client()
+    login = client.post('/login/manager', data={'username': 'manager', 'password': args.password})
+    if login.status_code != 302:
+        raise SystemExit('could not log in as the seeded manager; check --password')
+
+    results = {}
+    # edit_appointment prints on success; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, prepare in cases:
+            if args.only and args.only not in name:
+                continue
+            latencies, queries, failures = run_case(app, client, prepare, random.Random(name),
+                                                    args.iterations, counter)
+            peak = measure_peak_memory(app, client, prepare, random.Random(name + ' memory'),
+                                       args.memory_iterations)
+            results[name] = {
+                'p50_ms': percentile(latencies, 0.50) * 1000,
+                'p95_ms': percentile(latencies, 0.95) * 1000,
+                'queries': sum(queries) / len(queries),
+                'peak_mb': peak / 2 ** 20,
+                'failed': failures,
+            }
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""Seed a database with synthetic shop data for benchmarks and load tests.
+
+Run from the project root:
+
+    python benchmarks/seed_data.py --database /tmp/car_audio_bench.db
+    python benchmarks/seed_data.py --database /tmp/car_audio_bench.db --customers 10000 --appointments 200000
+
+The target file must not exist yet; the schema is built by the migrations. Rows are
+written with bulk INSERTs in batches; the search index and rollups are built once at the end.
+Installer calendars are filled back to back without overlaps, so moving or editing a seeded
+appointment to its own slot never reports a booking conflict. Every user gets the password
+given by --password (manager, sales and installation accounts are created).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import calendar_feeds  # noqa: E402
+import fulltext  # noqa: E402
+import rollups  # noqa: E402
+
+BATCH_SIZE = 5000
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+               'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Chris', 'Karen']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+              'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin']
+VEHICLES = [('Toyota', 'Tacoma'), ('Ford', 'F-150'), ('Honda', 'Civic'), ('Chevrolet', 'Silverado'),
+            ('Jeep', 'Wrangler'), ('Subaru', 'Outback'), ('Ram', '1500'), ('Nissan', 'Altima'), ('Tesla', 'Model 3')]
+COLORS = ['Black', 'White', 'Silver', 'Red', 'Blue', 'Gray', None]
+PRODUCT_KINDS = [('Amplifier', 'standard'), ('Subwoofer', 'standard'), ('Head Unit', 'standard'),
+                 ('Remote Start', 'custom'), ('Backup Camera', 'standard'), ('Speaker Set', 'check'),
+                 ('Dash Cam', 'standard'), ('Sound Deadening', 'custom')]
+JOBS = ['Wiring harness', 'Mount amplifier', 'Run power wire', 'Install subwoofer box', 'Tune DSP',
+        'Replace door speakers', 'Fabricate dash kit', 'Program remote start', 'Route camera cable']
+SKILL_LEVELS = ['beginner', 'intermediate', 'advanced', 'expert']
+
+
+def bulk_insert(db, model, rows):
+    from sqlalchemy import insert
+    for offset in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model), rows[offset:offset + BATCH_SIZE])
+
+
+# Business-day slots for one installer, filled back to back from `start`
+def installer_slots(rng, start, business_hours):
+    open_hour, close_hour = business_hours
+    cursor = start
+    while True:
+        if cursor.weekday() == 6 or cursor.hour >= close_hour:
+            cursor = datetime.combine(cursor.date() + timedelta(days=1), datetime.min.time()) + timedelta(hours=open_hour)
+            continue
+        duration = rng.choice([1, 1, 2, 2, 3, 4])
+        end = min(cursor + timedelta(hours=duration), cursor.replace(hour=close_hour))
+        yield cursor, end
+        cursor = end + timedelta(hours=rng.choice([0, 0, 1]))
+
+
+# Write the synthetic data set; must run inside an app context of `application`
+def generate_data(application, customers=1000, vehicles_per_customer=1.5, products=200, installers=20,
+                  appointments=10000, jobs_per_appointment=2, assigned_fraction=0.8, start=None,
+                  password='benchmark', seed=1):
+    from flask import current_app
+    from werkzeug.security import generate_password_hash
+
+    rng = random.Random(seed)
+    db = application.db
+    # Per-row search, rollup and feed triggers would dominate a bulk load; build them once at the end instead
+    fulltext.drop_search_index(db.session.connection())
+    rollups.drop_rollup_triggers(db.session.connection())
+    calendar_feeds.drop_feed_triggers(db.session.connection())
+    start = start or datetime(2022, 1, 3, 8)
+    password_hash = generate_password_hash(password)
+
+    bulk_insert(db, application.User, [
+        {'username': username, 'password': password_hash, 'role': role}
+        for username, role in [('manager', 'Manager'), ('sales', 'Sales'), ('installation', 'Installation')]
+    ])
+    bulk_insert(db, application.Installer, [
+        {'name': f'Installer {number}', 'skill_level': rng.choice(SKILL_LEVELS)} for number in range(1, installers + 1)
+    ])
+    bulk_insert(db, application.Customer, [
+        {
+            'first_name': rng.choice(FIRST_NAMES),
+            'last_name': rng.choice(LAST_NAMES),
+            'phone_number': f'(406) {number // 10000 % 1000:03d}-{number % 10000:04d}',
+            'phone_normalized': f'406{number // 10000 % 1000:03d}{number % 10000:04d}',
+        }
+        for number in range(1, customers + 1)
+    ])
+
+    vehicle_rows = []
+    for customer_id in range(1, customers + 1):
+        for _ in range(max(1, round(rng.expovariate(1 / vehicles_per_customer)))):
+            make, model = rng.choice(VEHICLES)
+            vehicle_rows.append({'year': rng.randint(2005, 2025), 'make': make, 'model': model,
+                                 'color': rng.choice(COLORS), 'customer_id': customer_id})
+    bulk_insert(db, application.Vehicle, vehicle_rows)
+    vehicles_by_customer = {}
+    for vehicle_id, row in enumerate(vehicle_rows, start=1):
+        vehicles_by_customer.setdefault(row['customer_id'], []).append(vehicle_id)
+
+    product_rows = []
+    for number in range(1, products + 1):
+        name, install_type = rng.choice(PRODUCT_KINDS)
+        product_rows.append({'name': f'{name} {number}', 'type': install_type, 'price': round(rng.uniform(49, 1499), 2),
+                             'serial_number': f'SN{number:08d}'})
+    bulk_insert(db, application.Product, product_rows)
+
+    business_hours = current_app.config['BUSINESS_HOURS']
+    calendars = [installer_slots(rng, start, business_hours) for _ in range(installers)]
+    assigned_count = int(appointments * assigned_fraction) if installers else 0
+    appointment_rows = []
+    for number in range(appointments):
+        if number < assigned_count:
+            installer_index = number % installers
+            slot_start, slot_end = next(calendars[installer_index])
+            installer_id = installer_index + 1
+        else:
+            # Unassigned bookings spread over the same period as the installer calendars
+            span_days = max(1, appointments // max(installers, 1) // 3)
+            slot_start = start + timedelta(days=rng.randrange(span_days), hours=rng.randrange(8))
+            slot_end = slot_start + timedelta(hours=rng.choice([1, 2, 3]))
+            installer_id = None
+        customer_id = rng.randint(1, customers)
+        product_id = rng.randint(1, products)
+        appointment_rows.append({
+            'start_time': slot_start,
+            'end_time': slot_end,
+            'customer_id': customer_id,
+            'vehicle_id': rng.choice(vehicles_by_customer[customer_id]),
+            'installer_id': installer_id,
+            'product_id': product_id,
+            'install_type': product_rows[product_id - 1]['type'],
+            'comments': rng.choice([None, None, 'Customer waiting', 'Bring keys to front desk', 'Rush job']),
+            'updated_at': datetime.utcnow(),
+        })
+    bulk_insert(db, application.Appointment, appointment_rows)
+
+    job_rows = []
+    for appointment_id in range(1, appointments + 1):
+        for _ in range(rng.randint(0, 2 * jobs_per_appointment)):
+            job_rows.append({'job_details': rng.choice(JOBS), 'price': round(rng.uniform(25, 400), 2),
+                             'appointment_id': appointment_id, 'updated_at': datetime.utcnow()})
+    bulk_insert(db, application.InstallationJob, job_rows)
+    fulltext.rebuild_search_index(db.session.connection())
+    rollups.rebuild_rollups(db.session.connection())
+    calendar_feeds.rebuild_feed_state(db.session.connection())
+    db.session.commit()
+
+    return {
+        'users': 3, 'installers': installers, 'customers': customers, 'vehicles': len(vehicle_rows),
+        'products': products, 'appointments': appointments, 'installation_jobs': len(job_rows),
+    }
+
+
+# Create and seed a new SQLite file, importing the app bound to it
+def seed_database(path, **counts):
+    if os.path.exists(path):
+        raise SystemExit(f'{path} already exists; seed a new file')
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(path)}'
+    os.environ.setdefault('SECRET_KEY', 'benchmark-secret')
+    import app as application
+    from flask_migrate import upgrade
+
+    with application.create_app().app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+        return generate_data(application, **counts)
+
+
+def add_count_arguments(parser):
+    parser.add_argument('--customers', type=int, default=1000)
+    parser.add_argument('--vehicles-per-customer', type=float, default=1.5)
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--installers', type=int, default=20)
+    parser.add_argument('--appointments', type=int, default=10000)
+    parser.add_argument('--jobs-per-appointment', type=int, default=2, help='average jobs per appointment')
+    parser.add_argument('--password', default='benchmark', help='password of the seeded users')
+    parser.add_argument('--seed', type=int, default=1, help='random seed, for reproducible data sets')
+
+
+def count_arguments(args):
+    return {
+        'customers': args.customers, 'vehicles_per_customer': args.vehicles_per_customer,
+        'products': args.products, 'installers': args.installers, 'appointments': args.appointments,
+        'jobs_per_appointment': args.jobs_per_appointment, 'password': args.password, 'seed': args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', required=True, help='path of the SQLite file to create')
+    add_count_arguments(parser)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    totals = seed_database(args.database, **count_arguments(args))
+    print(', '.join(f'{count} {name}' for name, count in totals.items()))
+    print(f'seeded {args.database} in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
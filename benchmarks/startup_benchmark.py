@@ -0,0 +1,96 @@
+"""Measure cold start time: importing the app, create_app() and the first request.
+
+Run from the project root:
+
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --sizes 0 1000 100000 --budget 1.5
+
+For every size a fresh SQLite file is seeded with that many appointments, and each run
+starts a new interpreter that imports app, builds the application and serves GET / with
+the test client. Startup must not read the data, so the median has to stay under --budget
+for every size and must not grow with it. The exit status is 1 when either check fails,
+so the script can run in CI; tests/test_startup.py checks one seeded data set with pytest.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP = """
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+status = app.test_client().get('/').status_code
+finished = time.perf_counter()
+print(json.dumps({'import': imported - started, 'create_app': created - imported,
+                  'first_request': finished - created, 'total': finished - started, 'status': status}))
+"""
+
+
+def seed(path, appointments):
+    customers = max(appointments // 10, 1)
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'benchmarks', 'seed_data.py'), '--database', path,
+         '--appointments', str(appointments), '--customers', str(customers), '--products', '50'],
+        check=True, stdout=subprocess.DEVNULL, cwd=ROOT
+    )
+
+
+# Start the app `runs` times in new interpreters and return the timings of every run
+def measure_startup(database_url, runs=5):
+    env = dict(os.environ, DATABASE_URL=database_url, SECRET_KEY=os.getenv('SECRET_KEY', 'benchmark-secret'))
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', STARTUP], env=env, cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout
+        timings.append(json.loads(output.strip().splitlines()[-1]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 50000], help='appointments per data set')
+    parser.add_argument('--runs', type=int, default=5, help='cold starts per data set')
+    parser.add_argument('--budget', type=float, default=2.0, help='maximum median startup in seconds')
+    parser.add_argument('--growth', type=float, default=1.25,
+                        help='maximum ratio between the largest and the smallest data set')
+    args = parser.parse_args()
+
+    medians = {}
+    failures = []
+    print(f"{'appointments':>12}  {'import':>8}  {'create':>8}  {'request':>8}  {'total':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, f'startup_{size}.db')
+            seed(path, size)
+            timings = measure_startup(f'sqlite:///{path}', args.runs)
+            if any(timing['status'] != 200 for timing in timings):
+                failures.append(f'GET / failed with {size} appointments')
+            median = {key: statistics.median(timing[key] for timing in timings)
+                      for key in ('import', 'create_app', 'first_request', 'total')}
+            medians[size] = median['total']
+            print(f"{size:>12}  {median['import'] * 1000:>6.0f}ms  {median['create_app'] * 1000:>6.0f}ms  "
+                  f"{median['first_request'] * 1000:>6.0f}ms  {median['total'] * 1000:>6.0f}ms")
+            if median['total'] > args.budget:
+                failures.append(f'startup with {size} appointments took {median["total"]:.2f}s (budget {args.budget:.2f}s)')
+
+    smallest, largest = medians[min(medians)], medians[max(medians)]
+    if len(medians) > 1 and largest > smallest * args.growth:
+        failures.append(f'startup grew from {smallest:.2f}s to {largest:.2f}s with the data set size')
+
+    for failure in failures:
+        print(f'FAILED {failure}')
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+from datetime import timezone
+
+from sqlalchemy import text
+
+
+# iCalendar (RFC 5545) feeds of the schedule, one per installer and one for the whole shop.
+#
+# calendar_feed_state holds a change counter per installer (0 for unassigned appointments).
+# Triggers bump the counter of every installer whose feed a write touches: appointments
+# added, moved, reassigned or deleted, their jobs, and the customer, vehicle, product and
+# installer names shown in the events. A feed only has to be rebuilt when its counter moved
+# (the shop feed uses the sum of all counters), and the counter doubles as the feed's ETag,
+# so polls of an unchanged feed are answered without reading any appointment.
+
+NOW = "strftime('%Y-%m-%d %H:%M:%S', 'now')"
+
+
+# Bump the feeds of the installers returned by `installers` (a SELECT of installer_id)
+def _bump(installers):
+    return (
+        f"INSERT INTO calendar_feed_state (installer_id, version, changed_at)\n"
+        f"SELECT DISTINCT coalesce(installer_id, 0), 1, {NOW} FROM ({installers}) WHERE true\n"
+        f"ON CONFLICT (installer_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;"
+    )
+
+
+def _installers_of(where):
+    return f'SELECT installer_id FROM appointment WHERE {where}'
+
+
+def _trigger(name, event, body):
+    return f"CREATE TRIGGER {name} {event} BEGIN\n{body}\nEND"
+
+
+SCHEMA = [
+    _trigger('appointment_feed_ai', 'AFTER INSERT ON appointment', _bump('SELECT NEW.installer_id AS installer_id')),
+    _trigger('appointment_feed_au', 'AFTER UPDATE ON appointment',
+             _bump('SELECT OLD.installer_id AS installer_id UNION SELECT NEW.installer_id')),
+    _trigger('appointment_feed_ad', 'AFTER DELETE ON appointment', _bump('SELECT OLD.installer_id AS installer_id')),
+
+    _trigger('installation_job_feed_ai', 'AFTER INSERT ON installation_job',
+             _bump(_installers_of('id = NEW.appointment_id'))),
+    _trigger('installation_job_feed_au', 'AFTER UPDATE ON installation_job',
+             _bump(_installers_of('id IN (OLD.appointment_id, NEW.appointment_id)'))),
+    _trigger('installation_job_feed_ad', 'AFTER DELETE ON installation_job',
+             _bump(_installers_of('id = OLD.appointment_id'))),
+
+    _trigger('customer_feed_au', 'AFTER UPDATE OF first_name, last_name, phone_number ON customer',
+             _bump(_installers_of('customer_id = NEW.id'))),
+    _trigger('vehicle_feed_au', 'AFTER UPDATE OF year, make, model ON vehicle',
+             _bump(_installers_of('vehicle_id = NEW.id'))),
+    _trigger('product_feed_au', 'AFTER UPDATE OF name ON product',
+             _bump(_installers_of('product_id = NEW.id'))),
+    _trigger('installer_feed_ai', 'AFTER INSERT ON installer', _bump('SELECT NEW.id AS installer_id')),
+    _trigger('installer_feed_au', 'AFTER UPDATE OF name ON installer', _bump('SELECT NEW.id AS installer_id')),
+]
+
+TRIGGERS = [
+    'appointment_feed_ai', 'appointment_feed_au', 'appointment_feed_ad',
+    'installation_job_feed_ai', 'installation_job_feed_au', 'installation_job_feed_ad',
+    'customer_feed_au', 'vehicle_feed_au', 'product_feed_au', 'installer_feed_ai', 'installer_feed_au',
+]
+
+
+# Drop the feed triggers, e.g. before a bulk load that rebuilds the state afterwards
+def drop_feed_triggers(connection):
+    for trigger in TRIGGERS:
+        connection.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+
+
+# Give every installer (and the unassigned feed) a state row, bumping existing ones so feeds
+# cached before a bulk change are rebuilt, and recreate the triggers
+def rebuild_feed_state(connection):
+    drop_feed_triggers(connection)
+    connection.execute(text(_bump('SELECT 0 AS installer_id UNION SELECT id FROM installer')))
+    for statement in SCHEMA:
+        connection.execute(text(statement))
+
+
+# Escape a TEXT property value
+def escape_text(value):
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+# Fold a content line into chunks of at most 75 octets, never splitting a UTF-8 character
+def fold(line):
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+    chunks, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        chunks.append(encoded[start:end].decode())
+        start, limit = end, 74  # Continuation lines start with a space
+    return '\r\n '.join(chunks)
+
+
+# Appointment times are naive shop-local times and go out as floating times, which calendar
+# apps show unchanged; stamps are naive UTC
+def _local(value):
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+def _utc(value):
+    return value.replace(tzinfo=timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+# VEVENT lines for one appointment row and its jobs
+def format_event(row, jobs, uid_domain):
+    description = [
+        f'Customer: {row.first_name} {row.last_name}' + (f', {row.phone_number}' if row.phone_number else ''),
+        f'Vehicle: {row.year} {row.make} {row.model}',
+        f'Installer: {row.installer_name or "Unassigned"}',
+        f'Installation type: {row.install_type}',
+    ]
+    if jobs:
+        description.append('Jobs:')
+        description += [f"- {job['job_details']} (${job['price']:.2f})" for job in jobs]
+    if row.comments:
+        description.append(f'Notes: {row.comments}')
+
+    return [
+        'BEGIN:VEVENT',
+        f'UID:appointment-{row.id}@{uid_domain}',
+        f'DTSTAMP:{_utc(row.updated_at)}',
+        f'LAST-MODIFIED:{_utc(row.updated_at)}',
+        f'SEQUENCE:{max(row.version - 1, 0)}',
+        f'DTSTART:{_local(row.start_time)}',
+        f'DTEND:{_local(row.end_time)}',
+        f'SUMMARY:{escape_text(f"{row.product_name} - {row.first_name} {row.last_name}")}',
+        f'DESCRIPTION:{escape_text(chr(10).join(description))}',
+        'END:VEVENT',
+    ]
+
+
+# Serialize a whole calendar; `events` are the line lists from format_event
+def render_calendar(name, events, refresh_minutes):
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Car Audio Scheduler//Calendar feeds//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+        f'REFRESH-INTERVAL;VALUE=DURATION:PT{refresh_minutes}M',
+        f'X-PUBLISHED-TTL:PT{refresh_minutes}M',
+    ]
+    for event in events:
+        lines += event
+    lines.append('END:VCALENDAR')
+    return ('\r\n'.join(fold(line) for line in lines) + '\r\n').encode()
@@ -0,0 +1,73 @@
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+# Database profile driven by environment variables (all optional):
+#
+#   DATABASE_URL            SQLite URI (default sqlite:///car_audio.db in the instance folder)
+#   DB_POOL_SIZE            connections kept open per process (default 10 for file databases)
+#   DB_MAX_OVERFLOW         extra connections allowed under load (default 20)
+#   DB_POOL_TIMEOUT         seconds to wait for a free connection (default 30)
+#   DB_POOL_RECYCLE         seconds after which connections are replaced (default: never)
+#   SQLITE_JOURNAL_MODE     default WAL, so readers never block the writer
+#   SQLITE_SYNCHRONOUS      default NORMAL, which is durable in WAL mode without an fsync per commit
+#   SQLITE_BUSY_TIMEOUT_MS  how long a writer waits for the lock before "database is locked" (default 5000)
+#   SQLITE_MMAP_SIZE        bytes of the file to memory-map (default 256 MiB)
+#   SQLITE_CACHE_SIZE       page cache per connection, negative = KiB (default -64000, about 64 MB)
+DEFAULT_DATABASE_URL = 'sqlite:///car_audio.db'
+
+# The schema and write paths are SQLite-specific: FTS5 search tables, SQLite trigger syntax
+# and date functions, and INSERT ... ON CONFLICT upserts built with the SQLite dialect
+SUPPORTED_BACKENDS = ('sqlite',)
+
+POOL_SETTINGS = {
+    'pool_size': ('DB_POOL_SIZE', 10),
+    'max_overflow': ('DB_MAX_OVERFLOW', 20),
+    'pool_timeout': ('DB_POOL_TIMEOUT', 30),
+    'pool_recycle': ('DB_POOL_RECYCLE', None),
+}
+
+SQLITE_PRAGMAS = {
+    'journal_mode': ('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': ('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': ('SQLITE_BUSY_TIMEOUT_MS', '5000'),
+    'mmap_size': ('SQLITE_MMAP_SIZE', '268435456'),
+    'cache_size': ('SQLITE_CACHE_SIZE', '-64000'),
+    'temp_store': ('SQLITE_TEMP_STORE', 'MEMORY'),
+}
+
+
+# Fill in the SQLAlchemy settings for the app before the database extension is initialized
+def configure_database(app):
+    url = os.getenv('DATABASE_URL', DEFAULT_DATABASE_URL)
+    parsed = make_url(url)
+    if parsed.get_backend_name() not in SUPPORTED_BACKENDS:
+        raise ValueError(f'DATABASE_URL must be a SQLite URL (sqlite:///path/to/file.db), not {parsed.get_backend_name()}')
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Flask-SQLAlchemy's change signals are unused
+
+    engine_options = {}
+    # In-memory SQLite uses a single-connection pool that takes no sizing options
+    if parsed.database not in (None, '', ':memory:'):
+        for option, (variable, default) in POOL_SETTINGS.items():
+            value = os.getenv(variable, default)
+            if value is not None:
+                engine_options[option] = int(value)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
+
+# Apply the SQLite PRAGMAs to every new connection of the engine
+def install_sqlite_pragmas(engine):
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = [(name, os.getenv(variable, default)) for name, (variable, default) in SQLITE_PRAGMAS.items()]
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
@@ -0,0 +1,36 @@
+from collections import OrderedDict
+from hashlib import sha1
+from threading import Lock
+
+
+# Per-process LRU of serialized /events payloads keyed by date window.
+# Each entry remembers the calendar version it was built from, so a bump of that
+# version (on any appointment write, in any worker) makes the entry stale.
+class EventCache:
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    # Return (payload, etag) for the window if it was built from the given version
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    # Store a serialized payload and return its ETag
+    def put(self, key, version, payload):
+        etag = sha1(payload).hexdigest()
+        with self._lock:
+            self._entries[key] = (version, payload, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,209 @@
+import re
+
+from sqlalchemy import text
+
+
+# SQLite FTS5 search over customers, vehicles, products, appointment notes and installation jobs.
+#
+# Three FTS5 tables hold one search document per row, keyed by rowid = source id:
+#   appointment_search - customer, phone, vehicle, product, notes and job details of one appointment,
+#                        so "black 2019 tacoma amp" can match a single booking
+#   customer_search    - customer name, phone, their vehicles and comments
+#   product_search     - product name, serial number and type
+# Triggers on the source tables rebuild the affected documents inside the writing transaction.
+
+SEARCH_TABLES = ('appointment_search', 'customer_search', 'product_search')
+
+APPOINTMENT_DOCUMENT = """
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+"""
+
+CUSTOMER_DOCUMENT = """
+    SELECT c.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           coalesce((SELECT group_concat(v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''), ' ')
+                     FROM vehicle v WHERE v.customer_id = c.id), ''),
+           coalesce(c.comments, '')
+    FROM customer c
+"""
+
+PRODUCT_DOCUMENT = """
+    SELECT p.id, p.name, coalesce(p.serial_number, ''), p.type
+    FROM product p
+"""
+
+
+def _refresh(table, columns, document, where, ids):
+    return (
+        f"DELETE FROM {table} WHERE rowid IN ({ids});\n"
+        f"INSERT INTO {table}(rowid, {columns}) {document} WHERE {where};"
+    )
+
+
+def _refresh_appointments(where, ids):
+    return _refresh('appointment_search', 'customer, phone, vehicle, product, notes, jobs',
+                    APPOINTMENT_DOCUMENT, where, ids)
+
+
+def _refresh_customers(where, ids):
+    return _refresh('customer_search', 'name, phone, vehicles, comments', CUSTOMER_DOCUMENT, where, ids)
+
+
+def _refresh_products(where, ids):
+    return _refresh('product_search', 'name, serial_number, type', PRODUCT_DOCUMENT, where, ids)
+
+
+def _trigger(name, event, body):
+    return f"CREATE TRIGGER {name} {event} BEGIN\n{body}\nEND"
+
+
+SCHEMA = [
+    "CREATE VIRTUAL TABLE appointment_search USING fts5("
+    "customer, phone, vehicle, product, notes, jobs, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE VIRTUAL TABLE customer_search USING fts5("
+    "name, phone, vehicles, comments, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE VIRTUAL TABLE product_search USING fts5("
+    "name, serial_number, type, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+
+    # Appointments
+    _trigger('appointment_search_ai', 'AFTER INSERT ON appointment',
+             _refresh_appointments('a.id = NEW.id', 'NEW.id')),
+    _trigger('appointment_search_au', 'AFTER UPDATE OF customer_id, vehicle_id, product_id, comments ON appointment',
+             _refresh_appointments('a.id = NEW.id', 'NEW.id')),
+    _trigger('appointment_search_ad', 'AFTER DELETE ON appointment',
+             'DELETE FROM appointment_search WHERE rowid = OLD.id;'),
+
+    # Installation jobs feed their appointment's document
+    _trigger('installation_job_search_ai', 'AFTER INSERT ON installation_job',
+             _refresh_appointments('a.id = NEW.appointment_id', 'NEW.appointment_id')),
+    _trigger('installation_job_search_au', 'AFTER UPDATE OF job_details, appointment_id ON installation_job',
+             _refresh_appointments('a.id = OLD.appointment_id', 'OLD.appointment_id') + '\n'
+             + _refresh_appointments('a.id = NEW.appointment_id', 'NEW.appointment_id')),
+    _trigger('installation_job_search_ad', 'AFTER DELETE ON installation_job',
+             _refresh_appointments('a.id = OLD.appointment_id', 'OLD.appointment_id')),
+
+    # Customers, and the appointments that show their name and phone
+    _trigger('customer_search_ai', 'AFTER INSERT ON customer',
+             _refresh_customers('c.id = NEW.id', 'NEW.id')),
+    _trigger('customer_search_au',
+             'AFTER UPDATE OF first_name, last_name, phone_number, phone_normalized, comments ON customer',
+             _refresh_customers('c.id = NEW.id', 'NEW.id') + '\n'
+             + _refresh_appointments('a.customer_id = NEW.id', 'SELECT id FROM appointment WHERE customer_id = NEW.id')),
+    _trigger('customer_search_ad', 'AFTER DELETE ON customer',
+             'DELETE FROM customer_search WHERE rowid = OLD.id;'),
+
+    # Vehicles feed their owner's document and the appointments booked for them
+    _trigger('vehicle_search_ai', 'AFTER INSERT ON vehicle',
+             _refresh_customers('c.id = NEW.customer_id', 'NEW.customer_id')),
+    _trigger('vehicle_search_au', 'AFTER UPDATE OF year, make, model, color, customer_id ON vehicle',
+             _refresh_customers('c.id IN (OLD.customer_id, NEW.customer_id)', 'OLD.customer_id, NEW.customer_id') + '\n'
+             + _refresh_appointments('a.vehicle_id = NEW.id', 'SELECT id FROM appointment WHERE vehicle_id = NEW.id')),
+    _trigger('vehicle_search_ad', 'AFTER DELETE ON vehicle',
+             _refresh_customers('c.id = OLD.customer_id', 'OLD.customer_id')),
+
+    # Products, and the appointments that show their name and serial number
+    _trigger('product_search_ai', 'AFTER INSERT ON product',
+             _refresh_products('p.id = NEW.id', 'NEW.id')),
+    _trigger('product_search_au', 'AFTER UPDATE OF name, serial_number, type ON product',
+             _refresh_products('p.id = NEW.id', 'NEW.id') + '\n'
+             + _refresh_appointments('a.product_id = NEW.id', 'SELECT id FROM appointment WHERE product_id = NEW.id')),
+    _trigger('product_search_ad', 'AFTER DELETE ON product',
+             'DELETE FROM product_search WHERE rowid = OLD.id;'),
+]
+
+TRIGGERS = [
+    'appointment_search_ai', 'appointment_search_au', 'appointment_search_ad',
+    'installation_job_search_ai', 'installation_job_search_au', 'installation_job_search_ad',
+    'customer_search_ai', 'customer_search_au', 'customer_search_ad',
+    'vehicle_search_ai', 'vehicle_search_au', 'vehicle_search_ad',
+    'product_search_ai', 'product_search_au', 'product_search_ad',
+]
+
+
+# Drop the search tables and triggers, e.g. before a bulk load that rebuilds the index afterwards
+def drop_search_index(connection):
+    for trigger in TRIGGERS:
+        connection.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    for table in SEARCH_TABLES:
+        connection.execute(text(f'DROP TABLE IF EXISTS {table}'))
+
+
+# Drop and recreate the search tables and triggers, then index every existing row
+def rebuild_search_index(connection):
+    drop_search_index(connection)
+    for statement in SCHEMA:
+        connection.execute(text(statement))
+
+    connection.execute(text(
+        'INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs) ' + APPOINTMENT_DOCUMENT
+    ))
+    connection.execute(text('INSERT INTO customer_search(rowid, name, phone, vehicles, comments) ' + CUSTOMER_DOCUMENT))
+    connection.execute(text('INSERT INTO product_search(rowid, name, serial_number, type) ' + PRODUCT_DOCUMENT))
+    for table in SEARCH_TABLES:
+        connection.execute(text(f"INSERT INTO {table}({table}) VALUES ('optimize')"))
+
+
+# Keep Alembic autogenerate from proposing to drop the FTS tables and their shadow tables
+def include_object(obj, name, type_, reflected, compare_to):
+    return not (type_ == 'table' and reflected and compare_to is None and name.startswith(SEARCH_TABLES))
+
+
+# Turn free text into an FTS5 query of quoted prefix terms joined by `operator`
+def build_match_query(query, operator='AND'):
+    terms = re.findall(r'\w+', query.lower())
+    return f' {operator} '.join(f'"{term}"*' for term in terms)
+
+
+# Column weights for bm25(): names and phones count most, free-text notes least
+SEARCHES = {
+    'appointment': (
+        """SELECT s.rowid AS id, bm25(appointment_search, 5.0, 5.0, 3.0, 3.0, 1.0, 2.0) AS rank,
+                  s.customer, s.vehicle, s.product, strftime('%Y-%m-%dT%H:%M:%S', a.start_time) AS start_time
+           FROM appointment_search s JOIN appointment a ON a.id = s.rowid
+           WHERE appointment_search MATCH :match ORDER BY rank LIMIT :limit""",
+        lambda row: {
+            'title': f'{row.customer} - {row.vehicle.strip()} - {row.product.strip()}',
+            'start': row.start_time,
+        },
+    ),
+    'customer': (
+        """SELECT rowid AS id, bm25(customer_search, 5.0, 5.0, 2.0, 1.0) AS rank, name, phone, vehicles
+           FROM customer_search WHERE customer_search MATCH :match ORDER BY rank LIMIT :limit""",
+        # The phone column is "<as entered> <digits>"; show it as entered
+        lambda row: {'title': row.name, 'phone': row.phone.rsplit(' ', 1)[0], 'vehicles': row.vehicles},
+    ),
+    'product': (
+        """SELECT rowid AS id, bm25(product_search, 5.0, 5.0, 1.0) AS rank, name, serial_number, type
+           FROM product_search WHERE product_search MATCH :match ORDER BY rank LIMIT :limit""",
+        lambda row: {'title': row.name, 'serial_number': row.serial_number, 'type': row.type},
+    ),
+}
+
+
+# Ranked matches across appointments, customers and products (lower rank is better).
+# All terms must match; if that finds nothing, any term may match, ranked by relevance.
+def search(connection, query, limit=20, kinds=SEARCHES.keys()):
+    results = []
+    for operator in ('AND', 'OR'):
+        match = build_match_query(query, operator)
+        if not match:
+            return []
+        for kind in kinds:
+            sql, describe = SEARCHES[kind]
+            for row in connection.execute(text(sql), {'match': match, 'limit': limit}):
+                results.append(dict(describe(row), type=kind, id=row.id, rank=row.rank))
+        if results:
+            break
+    results.sort(key=lambda result: result['rank'])
+    return results[:limit]
@@ -0,0 +1,73 @@
+from bisect import bisect_left
+
+
+# Static index over (start, end, value) intervals for fast overlap lookups.
+# Intervals are sorted by start; since no interval is longer than max_length, every
+# interval overlapping [start, end) begins in [start - max_length, end), which bisect finds.
+class IntervalIndex:
+    def __init__(self, intervals=()):
+        self.intervals = sorted(intervals, key=lambda interval: interval[0])
+        self.starts = [interval[0] for interval in self.intervals]
+        self.max_length = max((end - start for start, end, _ in self.intervals), default=None)
+
+    def __len__(self):
+        return len(self.intervals)
+
+    # Return the values of all intervals overlapping the half-open range [start, end)
+    def overlapping(self, start, end):
+        if not self.intervals:
+            return []
+        lo = bisect_left(self.starts, start - self.max_length)
+        hi = bisect_left(self.starts, end)
+        return [value for s, e, value in self.intervals[lo:hi] if e > start]
+
+
+# Merge (start, end) pairs sorted by start into non-overlapping, non-touching intervals
+def merge_intervals(intervals):
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+# Subtract merged busy intervals from sorted, non-overlapping windows in one linear sweep
+def subtract_intervals(windows, busy):
+    free = []
+    i = 0
+    for window_start, window_end in windows:
+        cursor = window_start
+        # Skip busy intervals that end before this window starts
+        while i < len(busy) and busy[i][1] <= window_start:
+            i += 1
+        j = i
+        while j < len(busy) and busy[j][0] < window_end:
+            if busy[j][0] > cursor:
+                free.append((cursor, busy[j][0]))
+            cursor = max(cursor, busy[j][1])
+            j += 1
+        if cursor < window_end:
+            free.append((cursor, window_end))
+    return free
+
+
+# Mutable, non-overlapping timeline of one installer's bookings kept sorted by start
+class BookingTimeline:
+    def __init__(self, bookings=()):
+        merged = merge_intervals(sorted(bookings))
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+
+    # True if [start, end) does not overlap any booking
+    def is_free(self, start, end):
+        i = bisect_left(self.starts, end)
+        return i == 0 or self.ends[i - 1] <= start
+
+    # Book [start, end); the caller must have checked is_free
+    def add(self, start, end):
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
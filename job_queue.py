@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta
+from importlib import import_module
+from threading import Lock
+import json
+import multiprocessing
+import signal
+
+from sqlalchemy import DateTime, bindparam, text
+
+
+# Persistent background jobs stored in the application database (table background_job).
+#
+# Jobs are queued in the same transaction as the change that caused them, so a booking and
+# its confirmation commit or roll back together. Worker processes claim due jobs with one
+# UPDATE ... RETURNING, which SQLite runs atomically, so two workers never take the same job.
+# A claimed job holds a lease (locked_until): if its worker dies, the lease runs out and the
+# job is claimed again, unless that was its last attempt. Failures are retried with exponential
+# backoff up to max_attempts and then kept with status 'failed' and the last error for inspection.
+# A job that keeps killing or hanging its worker therefore ends up failed as well.
+#
+# run_at and the other job times are naive local time, like appointment times, so
+# "24 hours before start_time" needs no conversion.
+
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+
+
+def _times(statement, *names):
+    return statement.bindparams(*(bindparam(name, type_=DateTime()) for name in names))
+
+
+CLAIM = _times(text("""
+    UPDATE background_job
+    SET status = 'running', attempts = attempts + 1, locked_until = :lease_end
+    WHERE id = (
+        SELECT id FROM background_job
+        WHERE (status = 'pending' AND run_at <= :now)
+           OR (status = 'running' AND locked_until < :now AND attempts < max_attempts)
+        ORDER BY run_at, id
+        LIMIT 1
+    )
+    RETURNING id, kind, payload, attempts, max_attempts
+"""), 'now', 'lease_end')
+
+# Jobs whose last attempt lost its worker
+EXPIRE = _times(text("""
+    UPDATE background_job SET status = 'failed', finished_at = :now, locked_until = NULL, last_error = 'Lease expired'
+    WHERE status = 'running' AND locked_until < :now AND attempts >= max_attempts
+"""), 'now')
+
+# A job rescheduled while it ran (its attempts were reset) stays pending for the new time
+COMPLETE = _times(text("""
+    UPDATE background_job SET status = 'done', finished_at = :now, locked_until = NULL, last_error = NULL
+    WHERE id = :id AND status = 'running' AND attempts = :attempts
+"""), 'now')
+
+RETRY = _times(text("""
+    UPDATE background_job SET status = :status, run_at = :run_at, finished_at = :finished_at,
+        locked_until = NULL, last_error = :error
+    WHERE id = :id AND status = 'running' AND attempts = :attempts
+"""), 'run_at', 'finished_at')
+
+PRUNE = _times(text("DELETE FROM background_job WHERE status = 'done' AND finished_at < :before"), 'before')
+
+
+# A job claimed by this worker
+class ClaimedJob:
+    def __init__(self, row):
+        self.id = row.id
+        self.kind = row.kind
+        self.payload = json.loads(row.payload) if row.payload else {}
+        self.attempts = row.attempts
+        self.max_attempts = row.max_attempts
+
+
+# Fail the jobs whose lease ran out on their last attempt; returns how many
+def expire_jobs(connection, now):
+    return connection.execute(EXPIRE, {'now': now}).rowcount
+
+
+# Claim the next due job (or one whose worker's lease ran out), or None when nothing is due.
+# Jobs that lost their worker on the last attempt are marked failed first.
+def claim_job(connection, now, lease_seconds):
+    expire_jobs(connection, now)
+    row = connection.execute(CLAIM, {'now': now, 'lease_end': now + timedelta(seconds=lease_seconds)}).first()
+    return ClaimedJob(row) if row else None
+
+
+def complete_job(connection, job, now):
+    connection.execute(COMPLETE, {'id': job.id, 'attempts': job.attempts, 'now': now})
+
+
+# Delay before the next attempt: base, 2 * base, 4 * base ... capped at cap seconds
+def retry_delay(attempts, base, cap):
+    return min(cap, base * 2 ** (attempts - 1))
+
+
+# Schedule another attempt, or give up once the job has used all of its attempts
+def fail_job(connection, job, error, now, base_delay, max_delay):
+    exhausted = job.attempts >= job.max_attempts
+    connection.execute(RETRY, {
+        'id': job.id,
+        'attempts': job.attempts,
+        'status': FAILED if exhausted else PENDING,
+        'run_at': now + timedelta(seconds=retry_delay(job.attempts, base_delay, max_delay)),
+        'finished_at': now if exhausted else None,
+        'error': error[-2000:],
+    })
+    return exhausted
+
+
+# Delete finished jobs older than `before`; failed ones are kept for inspection
+def prune_jobs(connection, before):
+    return connection.execute(PRUNE, {'before': before}).rowcount
+
+
+# Claim and run one due job with its handler from `handlers` (kind -> callable(payload)).
+# Returns the job, or None when the queue had nothing due. The claim and the outcome are
+# committed separately, so a slow handler holds no database lock while it runs.
+def run_next_job(engine, handlers, lease_seconds, base_delay, max_delay, logger):
+    with engine.begin() as connection:
+        job = claim_job(connection, datetime.now(), lease_seconds)
+    if job is None:
+        return None
+
+    try:
+        handler = handlers.get(job.kind)
+        if handler is None:
+            raise LookupError(f'No handler for job kind {job.kind!r}')
+        handler(job.payload)
+    except Exception as e:
+        with engine.begin() as connection:
+            exhausted = fail_job(connection, job, f'{type(e).__name__}: {e}', datetime.now(), base_delay, max_delay)
+        level = logger.error if exhausted else logger.warning
+        level(f'Job {job.id} ({job.kind}) failed on attempt {job.attempts}/{job.max_attempts}: {e}')
+    else:
+        with engine.begin() as connection:
+            complete_job(connection, job, datetime.now())
+    return job
+
+
+def _worker_main(stop, target, *args):
+    # The terminal's Ctrl-C reaches every process in the group; only the parent reacts to it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    target(stop, *args)
+
+
+# Start `processes` copies of target(stop_event, *args) and wait for them. SIGINT or SIGTERM
+# sets the event, and each worker exits once its current job is finished.
+def run_pool(processes, target, *args):
+    stop = multiprocessing.Event()
+    workers = [
+        multiprocessing.Process(target=_worker_main, args=(stop, target) + args, name=f'job-worker-{number}')
+        for number in range(1, processes + 1)
+    ]
+
+    previous = {sig: signal.signal(sig, lambda signum, frame: stop.set()) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+    return [worker.exitcode for worker in workers]
+
+
+# Senders deliver customer and staff messages. Anything with send(recipient, subject, body)
+# works; these two stand in for an SMS or email provider in development and tests.
+
+# Write every message to the application log
+class LogSender:
+    def __init__(self, logger):
+        self.logger = logger
+
+    def send(self, recipient, subject, body):
+        self.logger.info(f'Message to {recipient}: {subject}\n{body}')
+
+
+# Append every message to a file as one JSON object per line
+class FileSender:
+    def __init__(self, path):
+        self.path = path
+        self._lock = Lock()
+
+    def send(self, recipient, subject, body):
+        line = json.dumps({'sent_at': datetime.now().isoformat(), 'recipient': recipient, 'subject': subject, 'body': body})
+        with self._lock, open(self.path, 'a', encoding='utf-8') as output:
+            output.write(line + '\n')
+
+
+# Build a sender from its configuration: 'log', 'file:<path>', or 'package.module:name'
+# for a provider class or factory that takes no arguments
+def load_sender(spec, logger):
+    if spec == 'log':
+        return LogSender(logger)
+    if spec.startswith('file:'):
+        return FileSender(spec[len('file:'):])
+    module_name, _, attribute = spec.partition(':')
+    if not attribute:
+        raise ValueError(f'Unknown sender {spec!r}')
+    return getattr(import_module(module_name), attribute)()
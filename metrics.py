@@ -0,0 +1,187 @@
+from bisect import bisect_left
+from threading import Lock
+import time
+
+from flask import g, has_request_context, request
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+
+
+# Minimal Prometheus metrics in the text exposition format (version 0.0.4).
+# Values live in the worker process, so with several gunicorn workers each scrape sees the
+# worker that answered it; Prometheus sums them fine once every worker has been scraped.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# Cumulative-bucket histogram with one series per label combination
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _format_value(bound)
+                    lines.append(f'{self.name}_bucket{_format_labels(self.labelnames + ("le",), labels + (le,))} {cumulative}')
+                label_text = _format_labels(self.labelnames, labels)
+                lines.append(f'{self.name}_sum{label_text} {_format_value(total)}')
+                lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._series.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time spent handling the request.', ('endpoint', 'method', 'status')
+)
+REQUEST_SQL_QUERIES = Histogram(
+    'http_request_sql_queries', 'SQL statements executed per request.', ('endpoint',), COUNT_BUCKETS
+)
+REQUEST_SQL_TIME = Histogram(
+    'http_request_sql_duration_seconds', 'Time spent in SQL statements per request.', ('endpoint',)
+)
+REQUEST_RENDER_TIME = Histogram(
+    'http_request_render_duration_seconds', 'Time spent rendering templates per request.', ('endpoint',)
+)
+SLOW_QUERIES = Counter('sql_slow_queries_total', 'SQL statements slower than SLOW_QUERY_MS.', ('endpoint',))
+
+REGISTRY = (REQUEST_LATENCY, REQUEST_SQL_QUERIES, REQUEST_SQL_TIME, REQUEST_RENDER_TIME, SLOW_QUERIES)
+
+
+# The whole registry as a Prometheus scrape payload
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# Per-request totals kept on flask.g while the request runs
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.render_started = None
+
+
+def _endpoint():
+    # Unmatched URLs share one label so scanners cannot blow up the series count
+    return request.endpoint or 'unmatched'
+
+
+# Record latency, SQL and template time for every request of `app` using `engine`.
+# Statements slower than SLOW_QUERY_MS are logged with their endpoint; the Server-Timing
+# header is added in debug mode or when SERVER_TIMING is set.
+def instrument_app(app, engine):
+    @app.before_request
+    def start_request_metrics():
+        g.request_stats = RequestStats()
+
+    @app.after_request
+    def record_request_metrics(response):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return response
+        elapsed = time.perf_counter() - stats.started
+        endpoint = _endpoint()
+        REQUEST_LATENCY.observe(elapsed, endpoint, request.method, str(response.status_code))
+        REQUEST_SQL_QUERIES.observe(stats.sql_count, endpoint)
+        REQUEST_SQL_TIME.observe(stats.sql_time, endpoint)
+        REQUEST_RENDER_TIME.observe(stats.render_time, endpoint)
+
+        if app.debug or app.config.get('SERVER_TIMING'):
+            response.headers.add('Server-Timing', ', '.join([
+                f'sql;desc="{stats.sql_count} queries";dur={stats.sql_time * 1000:.1f}',
+                f'render;dur={stats.render_time * 1000:.1f}',
+                f'total;dur={elapsed * 1000:.1f}',
+            ]))
+        return response
+
+    # Statement time runs until the cursor returns; fetching the rows counts as handler time
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_query_time(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        stats = g.get('request_stats') if has_request_context() else None
+        if stats is None:
+            return
+        stats.sql_count += 1
+        stats.sql_time += elapsed
+        if elapsed * 1000 >= app.config['SLOW_QUERY_MS']:
+            SLOW_QUERIES.inc(_endpoint())
+            app.logger.warning(f'Slow query on {_endpoint()} ({elapsed * 1000:.0f} ms): {" ".join(statement.split())}')
+
+    @event.listens_for(engine, 'handle_error')
+    def discard_query_timer(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get('query_started'):
+            connection.info['query_started'].pop()
+
+    @before_render_template.connect_via(app)
+    def start_render_timer(sender, template, context, **extra):
+        stats = g.get('request_stats')
+        if stats is not None:
+            stats.render_started = time.perf_counter()
+
+    @template_rendered.connect_via(app)
+    def record_render_time(sender, template, context, **extra):
+        stats = g.get('request_stats')
+        if stats is not None and stats.render_started is not None:
+            stats.render_time += time.perf_counter() - stats.render_started
+            stats.render_started = None
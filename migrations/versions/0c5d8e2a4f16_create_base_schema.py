@@ -0,0 +1,105 @@
+"""create base schema
+
+Revision ID: 0c5d8e2a4f16
+Revises: 
+Create Date: 2026-10-19 09:12:40.517306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c5d8e2a4f16'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created with db.create_all() before the schema was migrated already have
+    # these tables; only the missing ones are created, so `flask db upgrade` works for both
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'user' not in existing:
+        op.create_table('user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=150), nullable=False),
+        sa.Column('password', sa.String(length=150), nullable=False),
+        sa.Column('role', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('username')
+        )
+    if 'customer' not in existing:
+        op.create_table('customer',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('first_name', sa.String(length=50), nullable=False),
+        sa.Column('last_name', sa.String(length=50), nullable=False),
+        sa.Column('phone_number', sa.String(length=15), nullable=False),
+        sa.Column('comments', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'product' not in existing:
+        op.create_table('product',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('type', sa.String(length=50), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('serial_number', sa.String(length=100), nullable=True),
+        sa.Column('warranty_info', sa.String(length=100), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'installer' not in existing:
+        op.create_table('installer',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('skill_level', sa.String(length=50), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'vehicle' not in existing:
+        op.create_table('vehicle',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('year', sa.Integer(), nullable=False),
+        sa.Column('make', sa.String(length=50), nullable=False),
+        sa.Column('model', sa.String(length=50), nullable=False),
+        sa.Column('color', sa.String(length=20), nullable=True),
+        sa.Column('customer_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['customer_id'], ['customer.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'appointment' not in existing:
+        op.create_table('appointment',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=False),
+        sa.Column('customer_id', sa.Integer(), nullable=False),
+        sa.Column('vehicle_id', sa.Integer(), nullable=False),
+        sa.Column('installer_id', sa.Integer(), nullable=True),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('install_type', sa.String(length=50), nullable=False),
+        sa.Column('comments', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['customer_id'], ['customer.id'], ),
+        sa.ForeignKeyConstraint(['installer_id'], ['installer.id'], ),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+        sa.ForeignKeyConstraint(['vehicle_id'], ['vehicle.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'installation_job' not in existing:
+        op.create_table('installation_job',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_details', sa.String(length=200), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('appointment_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['appointment_id'], ['appointment.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('installation_job')
+    op.drop_table('appointment')
+    op.drop_table('vehicle')
+    op.drop_table('installer')
+    op.drop_table('product')
+    op.drop_table('customer')
+    op.drop_table('user')
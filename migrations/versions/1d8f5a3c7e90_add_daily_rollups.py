@@ -0,0 +1,169 @@
+"""add daily rollups
+
+Revision ID: 1d8f5a3c7e90
+Revises: 7c4e1b9d3a26
+Create Date: 2026-10-18 19:10:42.557301
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1d8f5a3c7e90'
+down_revision = '7c4e1b9d3a26'
+branch_labels = None
+depends_on = None
+
+
+# Rollup triggers as of this revision, spelled out instead of taken from rollups.py so later
+# changes to that module never change what replaying this migration builds
+TRIGGERS = [
+    'appointment_rollup_ai', 'appointment_rollup_au', 'appointment_rollup_ad',
+    'installation_job_rollup_ai', 'installation_job_rollup_au', 'installation_job_rollup_ad',
+    'product_rollup_au',
+]
+
+SCHEMA = [
+    """CREATE TRIGGER appointment_rollup_ai AFTER INSERT ON appointment BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(NEW.start_time), coalesce(NEW.installer_id, 0), p.type, 1, 1 * (julianday(NEW.end_time) - julianday(NEW.start_time)) * 24, 1 * p.price, 1 * coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = NEW.id), 0)
+FROM product p WHERE p.id = NEW.product_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER appointment_rollup_au AFTER UPDATE OF start_time, end_time, installer_id, product_id ON appointment BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(OLD.start_time), coalesce(OLD.installer_id, 0), p.type, -1, -1 * (julianday(OLD.end_time) - julianday(OLD.start_time)) * 24, -1 * p.price, -1 * coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = OLD.id), 0)
+FROM product p WHERE p.id = OLD.product_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(NEW.start_time), coalesce(NEW.installer_id, 0), p.type, 1, 1 * (julianday(NEW.end_time) - julianday(NEW.start_time)) * 24, 1 * p.price, 1 * coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = NEW.id), 0)
+FROM product p WHERE p.id = NEW.product_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER appointment_rollup_ad AFTER DELETE ON appointment BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(OLD.start_time), coalesce(OLD.installer_id, 0), p.type, -1, -1 * (julianday(OLD.end_time) - julianday(OLD.start_time)) * 24, -1 * p.price, -1 * coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = OLD.id), 0)
+FROM product p WHERE p.id = OLD.product_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER installation_job_rollup_ai AFTER INSERT ON installation_job BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type, 0, 0, 0, 1 * NEW.price
+FROM appointment a JOIN product p ON p.id = a.product_id WHERE a.id = NEW.appointment_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER installation_job_rollup_au AFTER UPDATE OF price, appointment_id ON installation_job BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type, 0, 0, 0, -1 * OLD.price
+FROM appointment a JOIN product p ON p.id = a.product_id WHERE a.id = OLD.appointment_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type, 0, 0, 0, 1 * NEW.price
+FROM appointment a JOIN product p ON p.id = a.product_id WHERE a.id = NEW.appointment_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER installation_job_rollup_ad AFTER DELETE ON installation_job BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type, 0, 0, 0, -1 * OLD.price
+FROM appointment a JOIN product p ON p.id = a.product_id WHERE a.id = OLD.appointment_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER product_rollup_au AFTER UPDATE OF price, type ON product BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), OLD.type, 0, 0, -1 * OLD.price, 0
+FROM appointment a WHERE a.product_id = OLD.id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), NEW.type, 0, 0, 1 * NEW.price, 0
+FROM appointment a WHERE a.product_id = NEW.id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT m.day, m.installer_id, OLD.type, -m.appointments, -m.hours, 0, -m.job_revenue FROM (SELECT date(a.start_time) AS day, coalesce(a.installer_id, 0) AS installer_id, count(*) AS appointments, sum((julianday(a.end_time) - julianday(a.start_time)) * 24) AS hours, sum(coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = a.id), 0)) AS job_revenue FROM appointment a WHERE a.product_id = NEW.id GROUP BY 1, 2) m WHERE OLD.type IS NOT NEW.type
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT m.day, m.installer_id, NEW.type, m.appointments, m.hours, 0, m.job_revenue FROM (SELECT date(a.start_time) AS day, coalesce(a.installer_id, 0) AS installer_id, count(*) AS appointments, sum((julianday(a.end_time) - julianday(a.start_time)) * 24) AS hours, sum(coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = a.id), 0)) AS job_revenue FROM appointment a WHERE a.product_id = NEW.id GROUP BY 1, 2) m WHERE OLD.type IS NOT NEW.type
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+]
+
+# Rollups of the appointments that exist before the triggers do
+POPULATE = """INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type,
+       count(*), sum((julianday(a.end_time) - julianday(a.start_time)) * 24), sum(p.price), sum(coalesce(j.total, 0))
+FROM appointment a
+JOIN product p ON p.id = a.product_id
+LEFT JOIN (SELECT appointment_id, sum(price) AS total FROM installation_job GROUP BY appointment_id) j
+       ON j.appointment_id = a.id
+GROUP BY 1, 2, 3"""
+
+
+def upgrade():
+    op.create_table('daily_rollup',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('installer_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('product_type', sa.String(length=50), nullable=False),
+    sa.Column('appointments', sa.Integer(), nullable=False),
+    sa.Column('hours', sa.Float(), nullable=False),
+    sa.Column('product_revenue', sa.Float(), nullable=False),
+    sa.Column('job_revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'installer_id', 'product_type')
+    )
+
+    op.execute(sa.text(POPULATE))
+    for statement in SCHEMA:
+        op.execute(sa.text(statement))
+
+
+def downgrade():
+    for trigger in TRIGGERS:
+        op.execute(sa.text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    op.drop_table('daily_rollup')
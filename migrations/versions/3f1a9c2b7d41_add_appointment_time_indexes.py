@@ -0,0 +1,28 @@
+"""add appointment time indexes
+
+Revision ID: 3f1a9c2b7d41
+Revises: 0c5d8e2a4f16
+Create Date: 2026-10-18 12:05:11.482913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2b7d41'
+down_revision = '0c5d8e2a4f16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.create_index('ix_appointment_start_end', ['start_time', 'end_time'], unique=False, if_not_exists=True)
+        batch_op.create_index('ix_appointment_end_start', ['end_time', 'start_time'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointment_end_start', if_exists=True)
+        batch_op.drop_index('ix_appointment_start_end', if_exists=True)
@@ -0,0 +1,26 @@
+"""add appointment version
+
+Revision ID: 4b8d2e6f9c13
+Revises: 1d8f5a3c7e90
+Create Date: 2026-10-18 20:41:05.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8d2e6f9c13'
+down_revision = '1d8f5a3c7e90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A plain ADD COLUMN with a constant default; batch mode would recreate the table
+    # and drop the search and rollup triggers on it
+    op.add_column('appointment', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    op.drop_column('appointment', 'version')
@@ -0,0 +1,51 @@
+"""add customer phone_normalized
+
+Revision ID: 5e9b0c7a2f14
+Revises: d4a81f2c6b07
+Create Date: 2026-10-18 15:37:52.214660
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e9b0c7a2f14'
+down_revision = 'd4a81f2c6b07'
+branch_labels = None
+depends_on = None
+
+
+def normalize_phone(phone_number):
+    digits = ''.join(ch for ch in phone_number or '' if ch.isdigit())
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    return digits or None
+
+
+def upgrade():
+    with op.batch_alter_table('customer', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('phone_normalized', sa.String(length=15), nullable=True))
+
+    # Backfill the oldest customer for each phone number; later duplicates stay NULL
+    # until `flask merge-duplicate-customers` folds them into it
+    connection = op.get_bind()
+    seen = set()
+    rows = connection.execute(sa.text('SELECT id, phone_number FROM customer ORDER BY id')).fetchall()
+    for customer_id, phone_number in rows:
+        phone_normalized = normalize_phone(phone_number)
+        if phone_normalized and phone_normalized not in seen:
+            seen.add(phone_normalized)
+            connection.execute(
+                sa.text('UPDATE customer SET phone_normalized = :phone WHERE id = :id'),
+                {'phone': phone_normalized, 'id': customer_id}
+            )
+
+    with op.batch_alter_table('customer', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_customer_phone_normalized'), ['phone_normalized'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('customer', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_customer_phone_normalized'))
+        batch_op.drop_column('phone_normalized')
@@ -0,0 +1,24 @@
+"""add installation job appointment index
+
+Revision ID: 7c4e1b9d3a26
+Revises: e2c6a9d41f7b
+Create Date: 2026-10-18 18:02:11.402716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4e1b9d3a26'
+down_revision = 'e2c6a9d41f7b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_installation_job_appointment_id'), 'installation_job', ['appointment_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_installation_job_appointment_id'), table_name='installation_job')
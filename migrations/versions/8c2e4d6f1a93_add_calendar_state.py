@@ -0,0 +1,29 @@
+"""add calendar state
+
+Revision ID: 8c2e4d6f1a93
+Revises: 3f1a9c2b7d41
+Create Date: 2026-10-18 13:21:47.106254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2e4d6f1a93'
+down_revision = '3f1a9c2b7d41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    calendar_state = op.create_table('calendar_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(calendar_state, [{'id': 1, 'version': 0}])
+
+
+def downgrade():
+    op.drop_table('calendar_state')
@@ -0,0 +1,26 @@
+"""add nocase search indexes
+
+Revision ID: 9a3f7b2e4c58
+Revises: 5e9b0c7a2f14
+Create Date: 2026-10-18 16:24:30.918377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3f7b2e4c58'
+down_revision = '5e9b0c7a2f14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_user_username_nocase', 'user', [sa.text('username COLLATE "NOCASE"')], unique=False)
+    op.create_index('ix_customer_last_name_nocase', 'customer', [sa.text('last_name COLLATE "NOCASE"')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_customer_last_name_nocase', table_name='customer')
+    op.drop_index('ix_user_username_nocase', table_name='user')
@@ -0,0 +1,591 @@
+"""add appointment archive
+
+Revision ID: a9d4f2b6c8e1
+Revises: f6a2c8d4e1b7
+Create Date: 2026-10-18 23:02:47.318520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4f2b6c8e1'
+down_revision = 'f6a2c8d4e1b7'
+branch_labels = None
+depends_on = None
+
+
+# The trigger DDL this migration needs, as of this revision. It is spelled out instead of taken
+# from fulltext.py and rollups.py, so later changes to those modules never change what
+# replaying this migration builds.
+APPOINTMENT_COLUMNS = 'id, start_time, end_time, customer_id, vehicle_id, installer_id, product_id, install_type, comments, updated_at, version'
+JOB_COLUMNS = 'job_details, price, appointment_id, updated_at'
+
+SEARCH_TRIGGERS = [
+    'appointment_search_ai', 'appointment_search_au', 'appointment_search_ad',
+    'installation_job_search_ai', 'installation_job_search_au', 'installation_job_search_ad',
+    'customer_search_ai', 'customer_search_au', 'customer_search_ad',
+    'vehicle_search_ai', 'vehicle_search_au', 'vehicle_search_ad',
+    'product_search_ai', 'product_search_au', 'product_search_ad',
+]
+
+SEARCH_SCHEMA = [
+    """CREATE TRIGGER appointment_search_ai AFTER INSERT ON appointment BEGIN
+DELETE FROM appointment_search WHERE rowid IN (NEW.id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.id = NEW.id;
+END""",
+    """CREATE TRIGGER appointment_search_au AFTER UPDATE OF customer_id, vehicle_id, product_id, comments ON appointment BEGIN
+DELETE FROM appointment_search WHERE rowid IN (NEW.id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.id = NEW.id;
+END""",
+    """CREATE TRIGGER appointment_search_ad AFTER DELETE ON appointment BEGIN
+DELETE FROM appointment_search WHERE rowid = OLD.id;
+END""",
+    """CREATE TRIGGER installation_job_search_ai AFTER INSERT ON installation_job BEGIN
+DELETE FROM appointment_search WHERE rowid IN (NEW.appointment_id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.id = NEW.appointment_id;
+END""",
+    """CREATE TRIGGER installation_job_search_au AFTER UPDATE OF job_details, appointment_id ON installation_job BEGIN
+DELETE FROM appointment_search WHERE rowid IN (OLD.appointment_id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.id = OLD.appointment_id;
+DELETE FROM appointment_search WHERE rowid IN (NEW.appointment_id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.id = NEW.appointment_id;
+END""",
+    """CREATE TRIGGER installation_job_search_ad AFTER DELETE ON installation_job BEGIN
+DELETE FROM appointment_search WHERE rowid IN (OLD.appointment_id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.id = OLD.appointment_id;
+END""",
+    """CREATE TRIGGER customer_search_ai AFTER INSERT ON customer BEGIN
+DELETE FROM customer_search WHERE rowid IN (NEW.id);
+INSERT INTO customer_search(rowid, name, phone, vehicles, comments)
+    SELECT c.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           coalesce((SELECT group_concat(v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''), ' ')
+                     FROM vehicle v WHERE v.customer_id = c.id), ''),
+           coalesce(c.comments, '')
+    FROM customer c
+ WHERE c.id = NEW.id;
+END""",
+    """CREATE TRIGGER customer_search_au AFTER UPDATE OF first_name, last_name, phone_number, phone_normalized, comments ON customer BEGIN
+DELETE FROM customer_search WHERE rowid IN (NEW.id);
+INSERT INTO customer_search(rowid, name, phone, vehicles, comments)
+    SELECT c.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           coalesce((SELECT group_concat(v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''), ' ')
+                     FROM vehicle v WHERE v.customer_id = c.id), ''),
+           coalesce(c.comments, '')
+    FROM customer c
+ WHERE c.id = NEW.id;
+DELETE FROM appointment_search WHERE rowid IN (SELECT id FROM appointment WHERE customer_id = NEW.id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.customer_id = NEW.id;
+END""",
+    """CREATE TRIGGER customer_search_ad AFTER DELETE ON customer BEGIN
+DELETE FROM customer_search WHERE rowid = OLD.id;
+END""",
+    """CREATE TRIGGER vehicle_search_ai AFTER INSERT ON vehicle BEGIN
+DELETE FROM customer_search WHERE rowid IN (NEW.customer_id);
+INSERT INTO customer_search(rowid, name, phone, vehicles, comments)
+    SELECT c.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           coalesce((SELECT group_concat(v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''), ' ')
+                     FROM vehicle v WHERE v.customer_id = c.id), ''),
+           coalesce(c.comments, '')
+    FROM customer c
+ WHERE c.id = NEW.customer_id;
+END""",
+    """CREATE TRIGGER vehicle_search_au AFTER UPDATE OF year, make, model, color, customer_id ON vehicle BEGIN
+DELETE FROM customer_search WHERE rowid IN (OLD.customer_id, NEW.customer_id);
+INSERT INTO customer_search(rowid, name, phone, vehicles, comments)
+    SELECT c.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           coalesce((SELECT group_concat(v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''), ' ')
+                     FROM vehicle v WHERE v.customer_id = c.id), ''),
+           coalesce(c.comments, '')
+    FROM customer c
+ WHERE c.id IN (OLD.customer_id, NEW.customer_id);
+DELETE FROM appointment_search WHERE rowid IN (SELECT id FROM appointment WHERE vehicle_id = NEW.id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.vehicle_id = NEW.id;
+END""",
+    """CREATE TRIGGER vehicle_search_ad AFTER DELETE ON vehicle BEGIN
+DELETE FROM customer_search WHERE rowid IN (OLD.customer_id);
+INSERT INTO customer_search(rowid, name, phone, vehicles, comments)
+    SELECT c.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           coalesce((SELECT group_concat(v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''), ' ')
+                     FROM vehicle v WHERE v.customer_id = c.id), ''),
+           coalesce(c.comments, '')
+    FROM customer c
+ WHERE c.id = OLD.customer_id;
+END""",
+    """CREATE TRIGGER product_search_ai AFTER INSERT ON product BEGIN
+DELETE FROM product_search WHERE rowid IN (NEW.id);
+INSERT INTO product_search(rowid, name, serial_number, type)
+    SELECT p.id, p.name, coalesce(p.serial_number, ''), p.type
+    FROM product p
+ WHERE p.id = NEW.id;
+END""",
+    """CREATE TRIGGER product_search_au AFTER UPDATE OF name, serial_number, type ON product BEGIN
+DELETE FROM product_search WHERE rowid IN (NEW.id);
+INSERT INTO product_search(rowid, name, serial_number, type)
+    SELECT p.id, p.name, coalesce(p.serial_number, ''), p.type
+    FROM product p
+ WHERE p.id = NEW.id;
+DELETE FROM appointment_search WHERE rowid IN (SELECT id FROM appointment WHERE product_id = NEW.id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.product_id = NEW.id;
+END""",
+    """CREATE TRIGGER product_search_ad AFTER DELETE ON product BEGIN
+DELETE FROM product_search WHERE rowid = OLD.id;
+END""",
+]
+
+ROLLUP_TRIGGERS = [
+    'appointment_rollup_ai', 'appointment_rollup_au', 'appointment_rollup_ad',
+    'installation_job_rollup_ai', 'installation_job_rollup_au', 'installation_job_rollup_ad',
+    'product_rollup_au',
+]
+
+# Rollup triggers that keep archived appointments counted
+ARCHIVE_ROLLUP_SCHEMA = [
+    """CREATE TRIGGER appointment_rollup_ai AFTER INSERT ON appointment BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(NEW.start_time), coalesce(NEW.installer_id, 0), p.type, 1, 1 * (julianday(NEW.end_time) - julianday(NEW.start_time)) * 24, 1 * p.price, 1 * coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = NEW.id), 0)
+FROM product p WHERE p.id = NEW.product_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER appointment_rollup_au AFTER UPDATE OF start_time, end_time, installer_id, product_id ON appointment BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(OLD.start_time), coalesce(OLD.installer_id, 0), p.type, -1, -1 * (julianday(OLD.end_time) - julianday(OLD.start_time)) * 24, -1 * p.price, -1 * coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = OLD.id), 0)
+FROM product p WHERE p.id = OLD.product_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(NEW.start_time), coalesce(NEW.installer_id, 0), p.type, 1, 1 * (julianday(NEW.end_time) - julianday(NEW.start_time)) * 24, 1 * p.price, 1 * coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = NEW.id), 0)
+FROM product p WHERE p.id = NEW.product_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER appointment_rollup_ad AFTER DELETE ON appointment WHEN NOT EXISTS (SELECT 1 FROM archived_appointment WHERE id = OLD.id) BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(OLD.start_time), coalesce(OLD.installer_id, 0), p.type, -1, -1 * (julianday(OLD.end_time) - julianday(OLD.start_time)) * 24, -1 * p.price, -1 * coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = OLD.id), 0)
+FROM product p WHERE p.id = OLD.product_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER installation_job_rollup_ai AFTER INSERT ON installation_job BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type, 0, 0, 0, 1 * NEW.price
+FROM appointment a JOIN product p ON p.id = a.product_id WHERE a.id = NEW.appointment_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER installation_job_rollup_au AFTER UPDATE OF price, appointment_id ON installation_job BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type, 0, 0, 0, -1 * OLD.price
+FROM appointment a JOIN product p ON p.id = a.product_id WHERE a.id = OLD.appointment_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type, 0, 0, 0, 1 * NEW.price
+FROM appointment a JOIN product p ON p.id = a.product_id WHERE a.id = NEW.appointment_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER installation_job_rollup_ad AFTER DELETE ON installation_job WHEN NOT EXISTS (SELECT 1 FROM archived_appointment WHERE id = OLD.appointment_id) BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type, 0, 0, 0, -1 * OLD.price
+FROM appointment a JOIN product p ON p.id = a.product_id WHERE a.id = OLD.appointment_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER product_rollup_au AFTER UPDATE OF price, type ON product BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), OLD.type, 0, 0, -1 * OLD.price, 0
+FROM (SELECT id, start_time, end_time, installer_id, product_id FROM appointment UNION ALL SELECT id, start_time, end_time, installer_id, product_id FROM archived_appointment) a WHERE a.product_id = OLD.id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), NEW.type, 0, 0, 1 * NEW.price, 0
+FROM (SELECT id, start_time, end_time, installer_id, product_id FROM appointment UNION ALL SELECT id, start_time, end_time, installer_id, product_id FROM archived_appointment) a WHERE a.product_id = NEW.id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT m.day, m.installer_id, OLD.type, -m.appointments, -m.hours, 0, -m.job_revenue FROM (SELECT date(a.start_time) AS day, coalesce(a.installer_id, 0) AS installer_id, count(*) AS appointments, sum((julianday(a.end_time) - julianday(a.start_time)) * 24) AS hours, sum(coalesce((SELECT sum(j.price) FROM (SELECT appointment_id, price FROM installation_job UNION ALL SELECT appointment_id, price FROM archived_installation_job) j WHERE j.appointment_id = a.id), 0)) AS job_revenue FROM (SELECT id, start_time, end_time, installer_id, product_id FROM appointment UNION ALL SELECT id, start_time, end_time, installer_id, product_id FROM archived_appointment) a WHERE a.product_id = NEW.id GROUP BY 1, 2) m WHERE OLD.type IS NOT NEW.type
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT m.day, m.installer_id, NEW.type, m.appointments, m.hours, 0, m.job_revenue FROM (SELECT date(a.start_time) AS day, coalesce(a.installer_id, 0) AS installer_id, count(*) AS appointments, sum((julianday(a.end_time) - julianday(a.start_time)) * 24) AS hours, sum(coalesce((SELECT sum(j.price) FROM (SELECT appointment_id, price FROM installation_job UNION ALL SELECT appointment_id, price FROM archived_installation_job) j WHERE j.appointment_id = a.id), 0)) AS job_revenue FROM (SELECT id, start_time, end_time, installer_id, product_id FROM appointment UNION ALL SELECT id, start_time, end_time, installer_id, product_id FROM archived_appointment) a WHERE a.product_id = NEW.id GROUP BY 1, 2) m WHERE OLD.type IS NOT NEW.type
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+]
+
+# Rollup triggers and rollups of the hot tables only, restored by the downgrade
+ROLLUP_SCHEMA = [
+    """CREATE TRIGGER appointment_rollup_ai AFTER INSERT ON appointment BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(NEW.start_time), coalesce(NEW.installer_id, 0), p.type, 1, 1 * (julianday(NEW.end_time) - julianday(NEW.start_time)) * 24, 1 * p.price, 1 * coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = NEW.id), 0)
+FROM product p WHERE p.id = NEW.product_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER appointment_rollup_au AFTER UPDATE OF start_time, end_time, installer_id, product_id ON appointment BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(OLD.start_time), coalesce(OLD.installer_id, 0), p.type, -1, -1 * (julianday(OLD.end_time) - julianday(OLD.start_time)) * 24, -1 * p.price, -1 * coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = OLD.id), 0)
+FROM product p WHERE p.id = OLD.product_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(NEW.start_time), coalesce(NEW.installer_id, 0), p.type, 1, 1 * (julianday(NEW.end_time) - julianday(NEW.start_time)) * 24, 1 * p.price, 1 * coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = NEW.id), 0)
+FROM product p WHERE p.id = NEW.product_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER appointment_rollup_ad AFTER DELETE ON appointment BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(OLD.start_time), coalesce(OLD.installer_id, 0), p.type, -1, -1 * (julianday(OLD.end_time) - julianday(OLD.start_time)) * 24, -1 * p.price, -1 * coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = OLD.id), 0)
+FROM product p WHERE p.id = OLD.product_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER installation_job_rollup_ai AFTER INSERT ON installation_job BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type, 0, 0, 0, 1 * NEW.price
+FROM appointment a JOIN product p ON p.id = a.product_id WHERE a.id = NEW.appointment_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER installation_job_rollup_au AFTER UPDATE OF price, appointment_id ON installation_job BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type, 0, 0, 0, -1 * OLD.price
+FROM appointment a JOIN product p ON p.id = a.product_id WHERE a.id = OLD.appointment_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type, 0, 0, 0, 1 * NEW.price
+FROM appointment a JOIN product p ON p.id = a.product_id WHERE a.id = NEW.appointment_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER installation_job_rollup_ad AFTER DELETE ON installation_job BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type, 0, 0, 0, -1 * OLD.price
+FROM appointment a JOIN product p ON p.id = a.product_id WHERE a.id = OLD.appointment_id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+    """CREATE TRIGGER product_rollup_au AFTER UPDATE OF price, type ON product BEGIN
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), OLD.type, 0, 0, -1 * OLD.price, 0
+FROM appointment a WHERE a.product_id = OLD.id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), NEW.type, 0, 0, 1 * NEW.price, 0
+FROM appointment a WHERE a.product_id = NEW.id
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT m.day, m.installer_id, OLD.type, -m.appointments, -m.hours, 0, -m.job_revenue FROM (SELECT date(a.start_time) AS day, coalesce(a.installer_id, 0) AS installer_id, count(*) AS appointments, sum((julianday(a.end_time) - julianday(a.start_time)) * 24) AS hours, sum(coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = a.id), 0)) AS job_revenue FROM appointment a WHERE a.product_id = NEW.id GROUP BY 1, 2) m WHERE OLD.type IS NOT NEW.type
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT m.day, m.installer_id, NEW.type, m.appointments, m.hours, 0, m.job_revenue FROM (SELECT date(a.start_time) AS day, coalesce(a.installer_id, 0) AS installer_id, count(*) AS appointments, sum((julianday(a.end_time) - julianday(a.start_time)) * 24) AS hours, sum(coalesce((SELECT sum(j.price) FROM installation_job j WHERE j.appointment_id = a.id), 0)) AS job_revenue FROM appointment a WHERE a.product_id = NEW.id GROUP BY 1, 2) m WHERE OLD.type IS NOT NEW.type
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;
+END""",
+]
+
+ROLLUP_POPULATE = """INSERT INTO daily_rollup (day, installer_id, product_type, appointments, hours, product_revenue, job_revenue)
+SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type,
+       count(*), sum((julianday(a.end_time) - julianday(a.start_time)) * 24), sum(p.price), sum(coalesce(j.total, 0))
+FROM appointment a
+JOIN product p ON p.id = a.product_id
+LEFT JOIN (SELECT appointment_id, sum(price) AS total FROM installation_job GROUP BY appointment_id) j
+       ON j.appointment_id = a.id
+GROUP BY 1, 2, 3"""
+
+
+def drop_triggers(names):
+    for name in names:
+        op.execute(sa.text(f'DROP TRIGGER IF EXISTS {name}'))
+
+
+def create_triggers(schema):
+    for statement in schema:
+        op.execute(sa.text(statement))
+
+
+def upgrade():
+    op.create_table('archived_appointment',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('end_time', sa.DateTime(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('vehicle_id', sa.Integer(), nullable=False),
+    sa.Column('installer_id', sa.Integer(), nullable=True),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('install_type', sa.String(length=50), nullable=False),
+    sa.Column('comments', sa.Text(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['customer.id'], ),
+    sa.ForeignKeyConstraint(['installer_id'], ['installer.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ),
+    sa.ForeignKeyConstraint(['vehicle_id'], ['vehicle.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_appointment', schema=None) as batch_op:
+        batch_op.create_index('ix_archived_appointment_end_start', ['end_time', 'start_time'], unique=False)
+        batch_op.create_index('ix_archived_appointment_installer_start_end', ['installer_id', 'start_time', 'end_time'], unique=False)
+        batch_op.create_index('ix_archived_appointment_start_end', ['start_time', 'end_time'], unique=False)
+        batch_op.create_index(batch_op.f('ix_archived_appointment_customer_id'), ['customer_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_archived_appointment_product_id'), ['product_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_archived_appointment_vehicle_id'), ['vehicle_id'], unique=False)
+
+    op.create_table('archived_installation_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_details', sa.String(length=200), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('appointment_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['appointment_id'], ['archived_appointment.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_installation_job', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_archived_installation_job_appointment_id'), ['appointment_id'], unique=False)
+
+    # Archived ids must never be handed out again, which needs AUTOINCREMENT. SQLite can only
+    # add it by recreating the table, and triggers that mention appointment block the rename,
+    # so the search and rollup triggers are dropped first and created again afterwards. The
+    # rollup triggers come back archive-aware; the archive is still empty, so the search
+    # index and the rollups themselves stay valid.
+    drop_triggers(SEARCH_TRIGGERS + ROLLUP_TRIGGERS)
+    with op.batch_alter_table('appointment', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        pass
+    create_triggers(SEARCH_SCHEMA + ARCHIVE_ROLLUP_SCHEMA)
+
+
+def downgrade():
+    # Move archived appointments back before the archive tables go. The search triggers index
+    # them again; the rollups still count them, so the rollup triggers must not.
+    drop_triggers(ROLLUP_TRIGGERS)
+    op.execute(sa.text(
+        f'INSERT INTO appointment ({APPOINTMENT_COLUMNS}) '
+        f'SELECT {APPOINTMENT_COLUMNS} FROM archived_appointment'
+    ))
+    op.execute(sa.text(
+        f'INSERT INTO installation_job ({JOB_COLUMNS}) '
+        f'SELECT {JOB_COLUMNS} FROM archived_installation_job ORDER BY id'
+    ))
+
+    with op.batch_alter_table('archived_installation_job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_installation_job_appointment_id'))
+
+    op.drop_table('archived_installation_job')
+    with op.batch_alter_table('archived_appointment', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_appointment_vehicle_id'))
+        batch_op.drop_index(batch_op.f('ix_archived_appointment_product_id'))
+        batch_op.drop_index(batch_op.f('ix_archived_appointment_customer_id'))
+        batch_op.drop_index('ix_archived_appointment_start_end')
+        batch_op.drop_index('ix_archived_appointment_installer_start_end')
+        batch_op.drop_index('ix_archived_appointment_end_start')
+
+    op.drop_table('archived_appointment')
+
+    drop_triggers(SEARCH_TRIGGERS)
+    with op.batch_alter_table('appointment', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+        pass
+    create_triggers(SEARCH_SCHEMA)
+    op.execute(sa.text('DELETE FROM daily_rollup'))
+    op.execute(sa.text(ROLLUP_POPULATE))
+    create_triggers(ROLLUP_SCHEMA)
@@ -0,0 +1,107 @@
+"""add calendar feed state
+
+Revision ID: b5e3c7a1d9f2
+Revises: a9d4f2b6c8e1
+Create Date: 2026-10-18 23:58:12.604731
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e3c7a1d9f2'
+down_revision = 'a9d4f2b6c8e1'
+branch_labels = None
+depends_on = None
+
+
+# Feed triggers as of this revision, spelled out instead of taken from calendar_feeds.py so
+# later changes to that module never change what replaying this migration builds
+TRIGGERS = [
+    'appointment_feed_ai', 'appointment_feed_au', 'appointment_feed_ad',
+    'installation_job_feed_ai', 'installation_job_feed_au', 'installation_job_feed_ad',
+    'customer_feed_au', 'vehicle_feed_au', 'product_feed_au', 'installer_feed_ai', 'installer_feed_au',
+]
+
+SCHEMA = [
+    """CREATE TRIGGER appointment_feed_ai AFTER INSERT ON appointment BEGIN
+INSERT INTO calendar_feed_state (installer_id, version, changed_at)
+SELECT DISTINCT coalesce(installer_id, 0), 1, strftime('%Y-%m-%d %H:%M:%S', 'now') FROM (SELECT NEW.installer_id AS installer_id) WHERE true
+ON CONFLICT (installer_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+END""",
+    """CREATE TRIGGER appointment_feed_au AFTER UPDATE ON appointment BEGIN
+INSERT INTO calendar_feed_state (installer_id, version, changed_at)
+SELECT DISTINCT coalesce(installer_id, 0), 1, strftime('%Y-%m-%d %H:%M:%S', 'now') FROM (SELECT OLD.installer_id AS installer_id UNION SELECT NEW.installer_id) WHERE true
+ON CONFLICT (installer_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+END""",
+    """CREATE TRIGGER appointment_feed_ad AFTER DELETE ON appointment BEGIN
+INSERT INTO calendar_feed_state (installer_id, version, changed_at)
+SELECT DISTINCT coalesce(installer_id, 0), 1, strftime('%Y-%m-%d %H:%M:%S', 'now') FROM (SELECT OLD.installer_id AS installer_id) WHERE true
+ON CONFLICT (installer_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+END""",
+    """CREATE TRIGGER installation_job_feed_ai AFTER INSERT ON installation_job BEGIN
+INSERT INTO calendar_feed_state (installer_id, version, changed_at)
+SELECT DISTINCT coalesce(installer_id, 0), 1, strftime('%Y-%m-%d %H:%M:%S', 'now') FROM (SELECT installer_id FROM appointment WHERE id = NEW.appointment_id) WHERE true
+ON CONFLICT (installer_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+END""",
+    """CREATE TRIGGER installation_job_feed_au AFTER UPDATE ON installation_job BEGIN
+INSERT INTO calendar_feed_state (installer_id, version, changed_at)
+SELECT DISTINCT coalesce(installer_id, 0), 1, strftime('%Y-%m-%d %H:%M:%S', 'now') FROM (SELECT installer_id FROM appointment WHERE id IN (OLD.appointment_id, NEW.appointment_id)) WHERE true
+ON CONFLICT (installer_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+END""",
+    """CREATE TRIGGER installation_job_feed_ad AFTER DELETE ON installation_job BEGIN
+INSERT INTO calendar_feed_state (installer_id, version, changed_at)
+SELECT DISTINCT coalesce(installer_id, 0), 1, strftime('%Y-%m-%d %H:%M:%S', 'now') FROM (SELECT installer_id FROM appointment WHERE id = OLD.appointment_id) WHERE true
+ON CONFLICT (installer_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+END""",
+    """CREATE TRIGGER customer_feed_au AFTER UPDATE OF first_name, last_name, phone_number ON customer BEGIN
+INSERT INTO calendar_feed_state (installer_id, version, changed_at)
+SELECT DISTINCT coalesce(installer_id, 0), 1, strftime('%Y-%m-%d %H:%M:%S', 'now') FROM (SELECT installer_id FROM appointment WHERE customer_id = NEW.id) WHERE true
+ON CONFLICT (installer_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+END""",
+    """CREATE TRIGGER vehicle_feed_au AFTER UPDATE OF year, make, model ON vehicle BEGIN
+INSERT INTO calendar_feed_state (installer_id, version, changed_at)
+SELECT DISTINCT coalesce(installer_id, 0), 1, strftime('%Y-%m-%d %H:%M:%S', 'now') FROM (SELECT installer_id FROM appointment WHERE vehicle_id = NEW.id) WHERE true
+ON CONFLICT (installer_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+END""",
+    """CREATE TRIGGER product_feed_au AFTER UPDATE OF name ON product BEGIN
+INSERT INTO calendar_feed_state (installer_id, version, changed_at)
+SELECT DISTINCT coalesce(installer_id, 0), 1, strftime('%Y-%m-%d %H:%M:%S', 'now') FROM (SELECT installer_id FROM appointment WHERE product_id = NEW.id) WHERE true
+ON CONFLICT (installer_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+END""",
+    """CREATE TRIGGER installer_feed_ai AFTER INSERT ON installer BEGIN
+INSERT INTO calendar_feed_state (installer_id, version, changed_at)
+SELECT DISTINCT coalesce(installer_id, 0), 1, strftime('%Y-%m-%d %H:%M:%S', 'now') FROM (SELECT NEW.id AS installer_id) WHERE true
+ON CONFLICT (installer_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+END""",
+    """CREATE TRIGGER installer_feed_au AFTER UPDATE OF name ON installer BEGIN
+INSERT INTO calendar_feed_state (installer_id, version, changed_at)
+SELECT DISTINCT coalesce(installer_id, 0), 1, strftime('%Y-%m-%d %H:%M:%S', 'now') FROM (SELECT NEW.id AS installer_id) WHERE true
+ON CONFLICT (installer_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;
+END""",
+]
+
+# A state row for every existing installer and for the unassigned feed
+POPULATE = """INSERT INTO calendar_feed_state (installer_id, version, changed_at)
+SELECT DISTINCT coalesce(installer_id, 0), 1, strftime('%Y-%m-%d %H:%M:%S', 'now') FROM (SELECT 0 AS installer_id UNION SELECT id FROM installer) WHERE true
+ON CONFLICT (installer_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at;"""
+
+
+def upgrade():
+    op.create_table('calendar_feed_state',
+    sa.Column('installer_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('installer_id')
+    )
+
+    op.execute(sa.text(POPULATE))
+    for statement in SCHEMA:
+        op.execute(sa.text(statement))
+
+
+def downgrade():
+    for trigger in TRIGGERS:
+        op.execute(sa.text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    op.drop_table('calendar_feed_state')
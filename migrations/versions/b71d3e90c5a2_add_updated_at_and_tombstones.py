@@ -0,0 +1,52 @@
+"""add updated_at and appointment tombstones
+
+Revision ID: b71d3e90c5a2
+Revises: 8c2e4d6f1a93
+Create Date: 2026-10-18 14:02:36.557190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b71d3e90c5a2'
+down_revision = '8c2e4d6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('deleted_appointment',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('appointment_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('deleted_appointment', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_deleted_appointment_deleted_at'), ['deleted_at'], unique=False)
+
+    # SQLite cannot add a NOT NULL column without a constant default, so backfill first
+    for table in ('appointment', 'installation_job'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP")
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_appointment_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_appointment_updated_at'))
+
+    for table in ('installation_job', 'appointment'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('deleted_appointment', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_deleted_appointment_deleted_at'))
+
+    op.drop_table('deleted_appointment')
@@ -0,0 +1,35 @@
+"""add unique product name
+
+Revision ID: c3e7a1f5b842
+Revises: 4b8d2e6f9c13
+Create Date: 2026-10-18 21:26:47.903615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e7a1f5b842'
+down_revision = '4b8d2e6f9c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Concurrent bookings may already have created the same product twice: keep the oldest
+    # row per name and repoint appointments at it (the rollup and search triggers follow)
+    op.execute("""
+        UPDATE appointment
+        SET product_id = (
+            SELECT min(keep.id) FROM product keep JOIN product dup ON dup.name = keep.name
+            WHERE dup.id = appointment.product_id
+        )
+        WHERE product_id NOT IN (SELECT min(id) FROM product GROUP BY name)
+    """)
+    op.execute("DELETE FROM product WHERE id NOT IN (SELECT min(id) FROM product GROUP BY name)")
+    op.create_index(op.f('ix_product_name'), 'product', ['name'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_product_name'), table_name='product')
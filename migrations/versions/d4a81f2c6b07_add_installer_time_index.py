@@ -0,0 +1,26 @@
+"""add installer time index
+
+Revision ID: d4a81f2c6b07
+Revises: b71d3e90c5a2
+Create Date: 2026-10-18 14:48:09.731402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a81f2c6b07'
+down_revision = 'b71d3e90c5a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.create_index('ix_appointment_installer_start_end', ['installer_id', 'start_time', 'end_time'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointment_installer_start_end')
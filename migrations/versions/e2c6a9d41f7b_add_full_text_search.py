@@ -0,0 +1,310 @@
+"""add full-text search
+
+Revision ID: e2c6a9d41f7b
+Revises: 9a3f7b2e4c58
+Create Date: 2026-10-18 17:12:04.385519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c6a9d41f7b'
+down_revision = '9a3f7b2e4c58'
+branch_labels = None
+depends_on = None
+
+
+# FTS5 tables and the triggers that keep them in sync, as of this revision. They are spelled
+# out here instead of taken from fulltext.py, so later changes to that module never change
+# what replaying this migration builds.
+SEARCH_TABLES = ('appointment_search', 'customer_search', 'product_search')
+
+TRIGGERS = [
+    'appointment_search_ai', 'appointment_search_au', 'appointment_search_ad',
+    'installation_job_search_ai', 'installation_job_search_au', 'installation_job_search_ad',
+    'customer_search_ai', 'customer_search_au', 'customer_search_ad',
+    'vehicle_search_ai', 'vehicle_search_au', 'vehicle_search_ad',
+    'product_search_ai', 'product_search_au', 'product_search_ad',
+]
+
+SCHEMA = [
+    """CREATE VIRTUAL TABLE appointment_search USING fts5(customer, phone, vehicle, product, notes, jobs, tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    """CREATE VIRTUAL TABLE customer_search USING fts5(name, phone, vehicles, comments, tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    """CREATE VIRTUAL TABLE product_search USING fts5(name, serial_number, type, tokenize='unicode61 remove_diacritics 2', prefix='2 3')""",
+    """CREATE TRIGGER appointment_search_ai AFTER INSERT ON appointment BEGIN
+DELETE FROM appointment_search WHERE rowid IN (NEW.id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.id = NEW.id;
+END""",
+    """CREATE TRIGGER appointment_search_au AFTER UPDATE OF customer_id, vehicle_id, product_id, comments ON appointment BEGIN
+DELETE FROM appointment_search WHERE rowid IN (NEW.id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.id = NEW.id;
+END""",
+    """CREATE TRIGGER appointment_search_ad AFTER DELETE ON appointment BEGIN
+DELETE FROM appointment_search WHERE rowid = OLD.id;
+END""",
+    """CREATE TRIGGER installation_job_search_ai AFTER INSERT ON installation_job BEGIN
+DELETE FROM appointment_search WHERE rowid IN (NEW.appointment_id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.id = NEW.appointment_id;
+END""",
+    """CREATE TRIGGER installation_job_search_au AFTER UPDATE OF job_details, appointment_id ON installation_job BEGIN
+DELETE FROM appointment_search WHERE rowid IN (OLD.appointment_id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.id = OLD.appointment_id;
+DELETE FROM appointment_search WHERE rowid IN (NEW.appointment_id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.id = NEW.appointment_id;
+END""",
+    """CREATE TRIGGER installation_job_search_ad AFTER DELETE ON installation_job BEGIN
+DELETE FROM appointment_search WHERE rowid IN (OLD.appointment_id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.id = OLD.appointment_id;
+END""",
+    """CREATE TRIGGER customer_search_ai AFTER INSERT ON customer BEGIN
+DELETE FROM customer_search WHERE rowid IN (NEW.id);
+INSERT INTO customer_search(rowid, name, phone, vehicles, comments)
+    SELECT c.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           coalesce((SELECT group_concat(v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''), ' ')
+                     FROM vehicle v WHERE v.customer_id = c.id), ''),
+           coalesce(c.comments, '')
+    FROM customer c
+ WHERE c.id = NEW.id;
+END""",
+    """CREATE TRIGGER customer_search_au AFTER UPDATE OF first_name, last_name, phone_number, phone_normalized, comments ON customer BEGIN
+DELETE FROM customer_search WHERE rowid IN (NEW.id);
+INSERT INTO customer_search(rowid, name, phone, vehicles, comments)
+    SELECT c.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           coalesce((SELECT group_concat(v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''), ' ')
+                     FROM vehicle v WHERE v.customer_id = c.id), ''),
+           coalesce(c.comments, '')
+    FROM customer c
+ WHERE c.id = NEW.id;
+DELETE FROM appointment_search WHERE rowid IN (SELECT id FROM appointment WHERE customer_id = NEW.id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.customer_id = NEW.id;
+END""",
+    """CREATE TRIGGER customer_search_ad AFTER DELETE ON customer BEGIN
+DELETE FROM customer_search WHERE rowid = OLD.id;
+END""",
+    """CREATE TRIGGER vehicle_search_ai AFTER INSERT ON vehicle BEGIN
+DELETE FROM customer_search WHERE rowid IN (NEW.customer_id);
+INSERT INTO customer_search(rowid, name, phone, vehicles, comments)
+    SELECT c.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           coalesce((SELECT group_concat(v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''), ' ')
+                     FROM vehicle v WHERE v.customer_id = c.id), ''),
+           coalesce(c.comments, '')
+    FROM customer c
+ WHERE c.id = NEW.customer_id;
+END""",
+    """CREATE TRIGGER vehicle_search_au AFTER UPDATE OF year, make, model, color, customer_id ON vehicle BEGIN
+DELETE FROM customer_search WHERE rowid IN (OLD.customer_id, NEW.customer_id);
+INSERT INTO customer_search(rowid, name, phone, vehicles, comments)
+    SELECT c.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           coalesce((SELECT group_concat(v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''), ' ')
+                     FROM vehicle v WHERE v.customer_id = c.id), ''),
+           coalesce(c.comments, '')
+    FROM customer c
+ WHERE c.id IN (OLD.customer_id, NEW.customer_id);
+DELETE FROM appointment_search WHERE rowid IN (SELECT id FROM appointment WHERE vehicle_id = NEW.id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.vehicle_id = NEW.id;
+END""",
+    """CREATE TRIGGER vehicle_search_ad AFTER DELETE ON vehicle BEGIN
+DELETE FROM customer_search WHERE rowid IN (OLD.customer_id);
+INSERT INTO customer_search(rowid, name, phone, vehicles, comments)
+    SELECT c.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           coalesce((SELECT group_concat(v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''), ' ')
+                     FROM vehicle v WHERE v.customer_id = c.id), ''),
+           coalesce(c.comments, '')
+    FROM customer c
+ WHERE c.id = OLD.customer_id;
+END""",
+    """CREATE TRIGGER product_search_ai AFTER INSERT ON product BEGIN
+DELETE FROM product_search WHERE rowid IN (NEW.id);
+INSERT INTO product_search(rowid, name, serial_number, type)
+    SELECT p.id, p.name, coalesce(p.serial_number, ''), p.type
+    FROM product p
+ WHERE p.id = NEW.id;
+END""",
+    """CREATE TRIGGER product_search_au AFTER UPDATE OF name, serial_number, type ON product BEGIN
+DELETE FROM product_search WHERE rowid IN (NEW.id);
+INSERT INTO product_search(rowid, name, serial_number, type)
+    SELECT p.id, p.name, coalesce(p.serial_number, ''), p.type
+    FROM product p
+ WHERE p.id = NEW.id;
+DELETE FROM appointment_search WHERE rowid IN (SELECT id FROM appointment WHERE product_id = NEW.id);
+INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+ WHERE a.product_id = NEW.id;
+END""",
+    """CREATE TRIGGER product_search_ad AFTER DELETE ON product BEGIN
+DELETE FROM product_search WHERE rowid = OLD.id;
+END""",
+]
+
+# Index the existing rows, then merge the index segments
+POPULATE = [
+    """INSERT INTO appointment_search(rowid, customer, phone, vehicle, product, notes, jobs)
+    SELECT a.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''),
+           p.name || ' ' || coalesce(p.serial_number, ''),
+           coalesce(a.comments, ''),
+           coalesce((SELECT group_concat(j.job_details, ' ') FROM installation_job j WHERE j.appointment_id = a.id), '')
+    FROM appointment a
+    JOIN customer c ON c.id = a.customer_id
+    JOIN vehicle v ON v.id = a.vehicle_id
+    JOIN product p ON p.id = a.product_id
+""",
+    """INSERT INTO customer_search(rowid, name, phone, vehicles, comments)
+    SELECT c.id,
+           c.first_name || ' ' || c.last_name,
+           c.phone_number || ' ' || coalesce(c.phone_normalized, ''),
+           coalesce((SELECT group_concat(v.year || ' ' || v.make || ' ' || v.model || ' ' || coalesce(v.color, ''), ' ')
+                     FROM vehicle v WHERE v.customer_id = c.id), ''),
+           coalesce(c.comments, '')
+    FROM customer c
+""",
+    """INSERT INTO product_search(rowid, name, serial_number, type)
+    SELECT p.id, p.name, coalesce(p.serial_number, ''), p.type
+    FROM product p
+""",
+    """INSERT INTO appointment_search(appointment_search) VALUES ('optimize')""",
+    """INSERT INTO customer_search(customer_search) VALUES ('optimize')""",
+    """INSERT INTO product_search(product_search) VALUES ('optimize')""",
+]
+
+
+def upgrade():
+    op.create_index(op.f('ix_appointment_customer_id'), 'appointment', ['customer_id'], unique=False)
+    op.create_index(op.f('ix_appointment_vehicle_id'), 'appointment', ['vehicle_id'], unique=False)
+    op.create_index(op.f('ix_appointment_product_id'), 'appointment', ['product_id'], unique=False)
+    op.create_index(op.f('ix_vehicle_customer_id'), 'vehicle', ['customer_id'], unique=False)
+
+    for statement in SCHEMA + POPULATE:
+        op.execute(sa.text(statement))
+
+
+def downgrade():
+    for trigger in TRIGGERS:
+        op.execute(sa.text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    for table in SEARCH_TABLES:
+        op.execute(sa.text(f'DROP TABLE IF EXISTS {table}'))
+
+    op.drop_index(op.f('ix_vehicle_customer_id'), table_name='vehicle')
+    op.drop_index(op.f('ix_appointment_product_id'), table_name='appointment')
+    op.drop_index(op.f('ix_appointment_vehicle_id'), table_name='appointment')
+    op.drop_index(op.f('ix_appointment_customer_id'), table_name='appointment')
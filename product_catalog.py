@@ -0,0 +1,50 @@
+from bisect import bisect_left
+from collections import namedtuple
+from threading import Lock
+import time
+
+CatalogProduct = namedtuple('CatalogProduct', 'id name type price')
+
+
+# Per-process copy of the product catalog for exact-name lookups and typeahead.
+# The whole table is loaded by `loader` on first use and kept for ttl seconds: writes in
+# this process invalidate it after they commit, and the TTL bounds how long another
+# worker can miss a product added elsewhere. A miss is never wrong, only slower, because
+# callers fall back to the database's insert-or-get on the unique name index.
+class ProductCatalog:
+    def __init__(self, loader, ttl=300):
+        self.loader = loader
+        self.ttl = ttl
+        self._snapshot = None
+        self._lock = Lock()
+
+    def _current(self):
+        with self._lock:
+            if self._snapshot is None or self._snapshot[0] <= time.monotonic():
+                products = sorted(self.loader(), key=lambda product: (product.name.casefold(), product.name))
+                self._snapshot = (
+                    time.monotonic() + self.ttl,
+                    {product.name: product for product in products},
+                    [product.name.casefold() for product in products],
+                    products
+                )
+            return self._snapshot
+
+    # The product with exactly this name, or None if it is not (yet) in the snapshot
+    def get(self, name):
+        return self._current()[1].get(name)
+
+    # Products whose name starts with `prefix`, ignoring case, in name order
+    def search(self, prefix, limit=10):
+        _, _, keys, products = self._current()
+        prefix = prefix.casefold()
+        matches = []
+        for index in range(bisect_left(keys, prefix), len(keys)):
+            if len(matches) >= limit or not keys[index].startswith(prefix):
+                break
+            matches.append(products[index])
+        return matches
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+FREQUENCIES = {'daily': timedelta(days=1), 'weekly': timedelta(weeks=1)}
+
+
+# Start times of a recurring booking: every `interval` days or weeks from `start`, stopping after
+# `count` occurrences or at `until` (inclusive), whichever comes first. Daily rules skip days whose
+# weekday is not in `open_weekdays`, so "10 daily occurrences" means ten days the shop is open.
+def expand_recurrence(start, frequency, interval=1, count=None, until=None, open_weekdays=None, limit=1000):
+    if frequency not in FREQUENCIES:
+        raise ValueError(f'frequency must be one of {", ".join(FREQUENCIES)}')
+    if interval < 1:
+        raise ValueError('interval must be at least 1')
+    if count is None and until is None:
+        raise ValueError('count or until is required')
+    if count is not None and count < 1:
+        raise ValueError('count must be at least 1')
+
+    step = FREQUENCIES[frequency] * interval
+    skip_closed = frequency == 'daily' and open_weekdays is not None
+    occurrences = []
+    current = start
+    while (count is None or len(occurrences) < count) and (until is None or current <= until):
+        if not (skip_closed and current.weekday() not in open_weekdays):
+            occurrences.append(current)
+            if len(occurrences) > limit:
+                raise ValueError(f'recurrence expands to more than {limit} occurrences')
+        current += step
+        if skip_closed and not open_weekdays:
+            break
+    return occurrences
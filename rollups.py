@@ -0,0 +1,192 @@
+from sqlalchemy import text
+
+
+# Revenue and workload rollups per day, installer and product type.
+#
+# daily_rollup holds one row per (day, installer_id, product_type) with the number of
+# appointments, booked hours, product revenue (Product.price per appointment) and job
+# revenue (sum of InstallationJob.price). An appointment counts on the day it starts and
+# unassigned appointments use installer_id 0. Triggers on appointment, installation_job and
+# product apply the difference of every write inside the writing transaction, so the table
+# is always consistent with the source rows and reports never aggregate the raw history.
+#
+# Appointments moved to the archive tables (see archive.py) keep counting: the delete
+# triggers skip rows that are being archived, and rebuilds and product changes read both.
+
+ROLLUP_COLUMNS = 'day, installer_id, product_type, appointments, hours, product_revenue, job_revenue'
+
+UPSERT_TAIL = """
+ON CONFLICT (day, installer_id, product_type) DO UPDATE SET
+    appointments = appointments + excluded.appointments,
+    hours = hours + excluded.hours,
+    product_revenue = product_revenue + excluded.product_revenue,
+    job_revenue = job_revenue + excluded.job_revenue;"""
+
+
+def _hours(row):
+    return f'(julianday({row}.end_time) - julianday({row}.start_time)) * 24'
+
+
+# Appointment and job sources for statements that must also see the archive
+ALL_APPOINTMENTS = (
+    '(SELECT id, start_time, end_time, installer_id, product_id FROM appointment UNION ALL '
+    'SELECT id, start_time, end_time, installer_id, product_id FROM archived_appointment)'
+)
+ALL_JOBS = (
+    '(SELECT appointment_id, price FROM installation_job UNION ALL '
+    'SELECT appointment_id, price FROM archived_installation_job)'
+)
+
+
+def _job_total(appointment_id, jobs='installation_job'):
+    return f'coalesce((SELECT sum(j.price) FROM {jobs} j WHERE j.appointment_id = {appointment_id}), 0)'
+
+
+# Add (sign 1) or remove (sign -1) the whole contribution of one appointment row (NEW or OLD)
+def _appointment_delta(row, sign):
+    return (
+        f"INSERT INTO daily_rollup ({ROLLUP_COLUMNS})\n"
+        f"SELECT date({row}.start_time), coalesce({row}.installer_id, 0), p.type, {sign}, "
+        f"{sign} * {_hours(row)}, {sign} * p.price, {sign} * {_job_total(f'{row}.id')}\n"
+        f"FROM product p WHERE p.id = {row}.product_id"
+        + UPSERT_TAIL
+    )
+
+
+# Add or remove one job's price on the bucket of the appointment it belongs to
+def _job_delta(row, sign):
+    return (
+        f"INSERT INTO daily_rollup ({ROLLUP_COLUMNS})\n"
+        f"SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type, 0, 0, 0, {sign} * {row}.price\n"
+        f"FROM appointment a JOIN product p ON p.id = a.product_id WHERE a.id = {row}.appointment_id"
+        + UPSERT_TAIL
+    )
+
+
+# Move every appointment of a product from its old type and price to the new ones
+def _product_delta(row, sign, appointments):
+    return (
+        f"INSERT INTO daily_rollup ({ROLLUP_COLUMNS})\n"
+        f"SELECT date(a.start_time), coalesce(a.installer_id, 0), {row}.type, 0, 0, {sign} * {row}.price, 0\n"
+        f"FROM {appointments} a WHERE a.product_id = {row}.id"
+        + UPSERT_TAIL
+    )
+
+
+def _product_type_move(appointments, jobs):
+    # A changed type also moves the appointment counts, hours and job revenue between buckets
+    moved = (
+        f"(SELECT date(a.start_time) AS day, coalesce(a.installer_id, 0) AS installer_id, "
+        f"count(*) AS appointments, sum({_hours('a')}) AS hours, sum({_job_total('a.id', jobs)}) AS job_revenue "
+        f"FROM {appointments} a WHERE a.product_id = NEW.id GROUP BY 1, 2)"
+    )
+    return (
+        f"INSERT INTO daily_rollup ({ROLLUP_COLUMNS})\n"
+        f"SELECT m.day, m.installer_id, OLD.type, -m.appointments, -m.hours, 0, -m.job_revenue FROM {moved} m "
+        f"WHERE OLD.type IS NOT NEW.type" + UPSERT_TAIL + "\n"
+        f"INSERT INTO daily_rollup ({ROLLUP_COLUMNS})\n"
+        f"SELECT m.day, m.installer_id, NEW.type, m.appointments, m.hours, 0, m.job_revenue FROM {moved} m "
+        f"WHERE OLD.type IS NOT NEW.type" + UPSERT_TAIL
+    )
+
+
+def _trigger(name, event, body):
+    return f"CREATE TRIGGER {name} {event} BEGIN\n{body}\nEND"
+
+
+# Trigger definitions; with `archive` they also account for the archive tables
+def schema(archive):
+    appointments, jobs = (ALL_APPOINTMENTS, ALL_JOBS) if archive else ('appointment', 'installation_job')
+    # Rows of an appointment that is being archived leave the hot tables but still count
+    archived_appointment = ' WHEN NOT EXISTS (SELECT 1 FROM archived_appointment WHERE id = OLD.id)' if archive else ''
+    archived_job = ' WHEN NOT EXISTS (SELECT 1 FROM archived_appointment WHERE id = OLD.appointment_id)' if archive else ''
+    return [
+        _trigger('appointment_rollup_ai', 'AFTER INSERT ON appointment', _appointment_delta('NEW', 1)),
+        _trigger('appointment_rollup_au', 'AFTER UPDATE OF start_time, end_time, installer_id, product_id ON appointment',
+                 _appointment_delta('OLD', -1) + '\n' + _appointment_delta('NEW', 1)),
+        # Jobs still attached when their appointment goes are removed here; their own delete
+        # trigger then finds no appointment and changes nothing
+        _trigger('appointment_rollup_ad', 'AFTER DELETE ON appointment' + archived_appointment,
+                 _appointment_delta('OLD', -1)),
+
+        _trigger('installation_job_rollup_ai', 'AFTER INSERT ON installation_job', _job_delta('NEW', 1)),
+        _trigger('installation_job_rollup_au', 'AFTER UPDATE OF price, appointment_id ON installation_job',
+                 _job_delta('OLD', -1) + '\n' + _job_delta('NEW', 1)),
+        _trigger('installation_job_rollup_ad', 'AFTER DELETE ON installation_job' + archived_job, _job_delta('OLD', -1)),
+
+        _trigger('product_rollup_au', 'AFTER UPDATE OF price, type ON product',
+                 _product_delta('OLD', -1, appointments) + '\n' + _product_delta('NEW', 1, appointments) + '\n'
+                 + _product_type_move(appointments, jobs)),
+    ]
+
+TRIGGERS = [
+    'appointment_rollup_ai', 'appointment_rollup_au', 'appointment_rollup_ad',
+    'installation_job_rollup_ai', 'installation_job_rollup_au', 'installation_job_rollup_ad',
+    'product_rollup_au',
+]
+
+
+# Drop the rollup triggers, e.g. before a bulk load that rebuilds the rollups afterwards
+def drop_rollup_triggers(connection):
+    for trigger in TRIGGERS:
+        connection.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+
+
+# Databases migrated from before the archive have no archive tables until its migration runs
+def _has_archive(connection):
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'archived_appointment'")
+    ).first() is not None
+
+
+# Recompute every rollup row from the source tables and recreate the triggers
+def rebuild_rollups(connection):
+    archive = _has_archive(connection)
+    appointments, jobs = (ALL_APPOINTMENTS, ALL_JOBS) if archive else ('appointment', 'installation_job')
+    drop_rollup_triggers(connection)
+    connection.execute(text('DELETE FROM daily_rollup'))
+    connection.execute(text(f"""
+        INSERT INTO daily_rollup ({ROLLUP_COLUMNS})
+        SELECT date(a.start_time), coalesce(a.installer_id, 0), p.type,
+               count(*), sum({_hours('a')}), sum(p.price), sum(coalesce(j.total, 0))
+        FROM {appointments} a
+        JOIN product p ON p.id = a.product_id
+        LEFT JOIN (SELECT appointment_id, sum(price) AS total FROM {jobs} GROUP BY appointment_id) j
+               ON j.appointment_id = a.id
+        GROUP BY 1, 2, 3
+    """))
+    for statement in schema(archive):
+        connection.execute(text(statement))
+
+
+# Report name -> (rollup column, key in the result rows)
+REPORT_GROUPS = {
+    'installer': ('r.installer_id', 'installer_id'),
+    'product_type': ('r.product_type', 'product_type'),
+    'day': ('r.day', 'day'),
+}
+
+
+# Totals per installer, product type or day for days in [start, end), read from the rollups only
+def report(connection, group, start, end):
+    key, label = REPORT_GROUPS[group]
+    rows = connection.execute(text(f"""
+        SELECT {key} AS key, sum(r.appointments) AS appointments, sum(r.hours) AS hours,
+               sum(r.product_revenue) AS product_revenue, sum(r.job_revenue) AS job_revenue
+        FROM daily_rollup r
+        WHERE r.day >= :start AND r.day < :end
+        GROUP BY {key}
+        HAVING sum(r.appointments) != 0 OR round(sum(r.job_revenue), 2) != 0
+        ORDER BY {key}
+    """), {'start': start.isoformat(), 'end': end.isoformat()})
+    return [
+        {
+            label: row.key,
+            'appointments': row.appointments,
+            'hours': round(row.hours, 2),
+            'product_revenue': round(row.product_revenue, 2),
+            'job_revenue': round(row.job_revenue, 2),
+            'revenue': round(row.product_revenue + row.job_revenue, 2),
+        }
+        for row in rows
+    ]
@@ -1,65 +1,111 @@
 let calendar;
 let currentEvent;
+let syncCursor = null;  // Server cursor for incremental /events/changes syncs
 
 document.addEventListener('DOMContentLoaded', function () {
-    fetch('/events')
-        .then(response => response.json())
-        .then(events => {
-            const calendarEl = document.getElementById('calendar');
-            const calendar = new FullCalendar.Calendar(calendarEl, {
-                themeSystem: 'bootstrap',
-                initialView: 'dayGridMonth',
-                headerToolbar: {
-                    left: 'prev,next today',
-                    center: 'title',
-                    right: 'dayGridMonth,timeGridWeek,timeGridDay'
-                },
-                slotMinTime: '08:00:00',
-                slotMaxTime: '18:00:00',
-                slotDuration: '01:00:00',
-                expandRows: true,
-                selectable: true,
-                selectMirror: true,
-                editable: true,
-                events: events,  // Use the fetched events
-
-                dateClick(info) {
-                    if (calendar.view.type === 'dayGridMonth') {
-                        calendar.changeView('timeGridDay', info.dateStr);
-                    } else {
-                        openCreateModal(info.dateStr);
+    const calendarEl = document.getElementById('calendar');
+    calendar = new FullCalendar.Calendar(calendarEl, {
+        themeSystem: 'bootstrap',
+        initialView: 'dayGridMonth',
+        headerToolbar: {
+            left: 'prev,next today',
+            center: 'title',
+            right: 'dayGridMonth,timeGridWeek,timeGridDay'
+        },
+        slotMinTime: '08:00:00',
+        slotMaxTime: '18:00:00',
+        slotDuration: '01:00:00',
+        expandRows: true,
+        selectable: true,
+        selectMirror: true,
+        editable: true,
+        // Request only the visible range and remember the sync cursor that came with it
+        events(fetchInfo, successCallback, failureCallback) {
+            const params = new URLSearchParams({ start: fetchInfo.startStr, end: fetchInfo.endStr });
+            fetch(`/events?${params}`)
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error('Network response was not ok.');
                     }
-                },
+                    syncCursor = response.headers.get('X-Sync-Cursor');
+                    return response.json();
+                })
+                .then(successCallback)
+                .catch(error => {
+                    console.error('Error fetching events:', error);
+                    failureCallback(error);
+                });
+        },
 
-                eventClick(info) {
-                    openViewModal(info.event);
-                },
+        dateClick(info) {
+            if (calendar.view.type === 'dayGridMonth') {
+                calendar.changeView('timeGridDay', info.dateStr);
+            } else {
+                openCreateModal(info.dateStr);
+            }
+        },
 
-                eventDrop(info) {
-                    confirmMove(info, 'drop');
-                },
+        eventClick(info) {
+            openViewModal(info.event);
+        },
 
-                eventResize(info) {
-                    confirmMove(info, 'resize');
-                }
-            });
+        eventDrop(info) {
+            confirmMove(info, 'drop');
+        },
 
-            calendar.render();
+        eventResize(info) {
+            confirmMove(info, 'resize');
+        }
+    });
 
-            // Re-fetch events when modals are hidden
-            document.getElementById('createAppointmentModal').addEventListener('hidden.bs.modal', function () {
-                calendar.refetchEvents();
-            });
+    calendar.render();
 
-            document.getElementById('editAppointmentModal').addEventListener('hidden.bs.modal', function () {
-                calendar.refetchEvents();
-            });
+    // Merge appointments changed since the last sync instead of re-downloading the whole range
+    function syncChanges() {
+        if (!syncCursor) {
+            calendar.refetchEvents();
+            return;
+        }
 
-            document.getElementById('deleteConfirmationModal').addEventListener('hidden.bs.modal', function () {
+        fetch(`/events/changes?since=${encodeURIComponent(syncCursor)}`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Network response was not ok.');
+                }
+                return response.json();
+            })
+            .then(data => {
+                if (data.reset) {
+                    calendar.refetchEvents();
+                    return;
+                }
+
+                const source = calendar.getEventSources()[0];
+                data.deleted.forEach(id => calendar.getEventById(String(id))?.remove());
+                data.events.forEach(event => {
+                    calendar.getEventById(String(event.id))?.remove();
+                    calendar.addEvent(event, source);
+                });
+                syncCursor = data.cursor;
+            })
+            .catch(error => {
+                console.error('Error syncing events:', error);
                 calendar.refetchEvents();
             });
-        })
-        .catch(error => console.error('Error fetching events:', error));
+    }
+
+    // Sync events when modals are hidden
+    document.getElementById('createAppointmentModal').addEventListener('hidden.bs.modal', function () {
+        syncChanges();
+    });
+
+    document.getElementById('editAppointmentModal').addEventListener('hidden.bs.modal', function () {
+        syncChanges();
+    });
+
+    document.getElementById('deleteConfirmationModal').addEventListener('hidden.bs.modal', function () {
+        syncChanges();
+    });
 
     // Format date to local ISO
     function formatDateToLocalISO(date) {
@@ -67,8 +113,40 @@ document.addEventListener('DOMContentLoaded', function () {
         return new Date(date.getTime() - timezoneOffset).toISOString().slice(0, 19);
     }
 
-    // Confirm Move Modal
+    // Validate a dragged event against installer bookings before asking for confirmation
     function confirmMove(info, actionType) {
+        const endTime = info.event.end || info.event.start;
+
+        fetch('/appointment/conflicts', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                appointments: [{
+                    id: info.event.id,
+                    start_time: formatDateToLocalISO(info.event.start),
+                    end_time: formatDateToLocalISO(endTime)
+                }]
+            })
+        })
+            .then(response => response.json())
+            .then(data => {
+                if (data.has_conflicts) {
+                    const clashes = data.results[0].conflicts.map(conflict => `#${conflict.id}`).join(', ');
+                    alert(`The installer is already booked at that time (appointment ${clashes}).`);
+                    info.revert();
+                } else {
+                    showMoveConfirmation(info, actionType);
+                }
+            })
+            .catch(error => {
+                // The move endpoint checks again, so let the user continue
+                console.error('Error checking conflicts:', error);
+                showMoveConfirmation(info, actionType);
+            });
+    }
+
+    // Confirm Move Modal
+    function showMoveConfirmation(info, actionType) {
         const newStartTime = info.event.start;
         const newEndTime = info.event.end || newStartTime;
 
@@ -80,15 +158,21 @@ document.addEventListener('DOMContentLoaded', function () {
         const moveModal = new bootstrap.Modal(document.getElementById('moveConfirmationModal'));
         moveModal.show();
 
+        let confirmed = false;
+
         document.getElementById('confirmMoveButton').onclick = function () {
+            confirmed = true;
             moveModal.hide();
             if (actionType === 'drop' || actionType === 'resize') {
                 handleEventMoveOrResize(info.event);
             }
         };
 
+        // A cancelled move puts the event back where it was
         document.getElementById('moveConfirmationModal').addEventListener('hidden.bs.modal', function () {
-            calendar.refetchEvents();
+            if (!confirmed) {
+                info.revert();
+            }
         }, { once: true });
     }
 
@@ -100,9 +184,11 @@ document.addEventListener('DOMContentLoaded', function () {
         fetch(`/appointment/move/${event.id}`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-            body: `start_time=${encodeURIComponent(startTimeISO)}&end_time=${encodeURIComponent(endTimeISO)}`
+            body: `start_time=${encodeURIComponent(startTimeISO)}&end_time=${encodeURIComponent(endTimeISO)}` +
+                `&version=${encodeURIComponent(event.extendedProps.version ?? '')}`
         }).then(response => {
-            if (!response.ok) {
+            // A 409 carries a JSON description of the double booking or of a newer version
+            if (!response.ok && response.status !== 409) {
                 throw new Error('Network response was not ok.');
             }
             return response.json();
@@ -110,6 +196,9 @@ document.addEventListener('DOMContentLoaded', function () {
             if (data.status !== 'success') {
                 alert('Error moving appointment: ' + data.message);
                 calendar.refetchEvents();
+            } else {
+                event.setExtendedProp('version', data.version);
+                syncChanges();
             }
         }).catch(error => {
             console.error('Fetch error:', error);
@@ -139,6 +228,8 @@ document.addEventListener('DOMContentLoaded', function () {
     // Function to open the View Modal and store the current event
     function openViewModal(event) {
         currentEvent = event; // Store the event data in the global variable
+        // Archived appointments are read-only
+        document.getElementById('editAppointmentButton').hidden = Boolean(event.extendedProps.archived);
 
         // Populate and show the View Modal
         const modal = new bootstrap.Modal(document.getElementById('viewAppointmentModal'));
@@ -173,6 +264,7 @@ document.addEventListener('DOMContentLoaded', function () {
             data.append('vehicle_model', formData.get('vehicle_model'));
             data.append('installation_type', formData.get('installation_type'));
             data.append('notes', formData.get('notes'));
+            data.append('version', event.extendedProps.version ?? '');
 
             formData.getAll('edit_installation_job[]').forEach((job, index) => {
                 data.append('edit_installation_job[]', job);
@@ -210,6 +302,7 @@ document.addEventListener('DOMContentLoaded', function () {
                                 vehicle_model: formData.get('vehicle_model'),
                                 installation_type: formData.get('installation_type'),
                                 notes: formData.get('notes'),
+                                version: result.version,
                                 installation_jobs: formData.getAll('edit_installation_job[]').map((job, index) => ({
                                     job_details: job,
                                     price: formData.getAll('edit_installation_price[]')[index]
@@ -224,6 +317,11 @@ document.addEventListener('DOMContentLoaded', function () {
                         calendar.changeView('timeGridDay', formData.get('start_time'));
                     } else {
                         alert('Error: ' + result.message);
+                        // A newer version exists: show it so the edit can be redone on top of it
+                        if (result.version !== undefined) {
+                            modal.hide();
+                            calendar.refetchEvents();
+                        }
                     }
                 })
                 .catch(error => {
@@ -333,6 +431,10 @@ document.addEventListener('DOMContentLoaded', function () {
         productNameInput.name = `${prefix}_product_name[]`;
         productNameInput.placeholder = 'Enter product name';
         productNameInput.className = 'form-control';
+        if (prefix !== 'view') {
+            productNameInput.setAttribute('list', 'productOptions');
+            productNameInput.autocomplete = 'off';
+        }
         productNameDiv.appendChild(productNameInput);
 
         const productPriceDiv = document.createElement('div');
@@ -414,6 +516,38 @@ document.addEventListener('DOMContentLoaded', function () {
         return jobEntry;
     }
 
+    // Product name typeahead: suggest catalog products and fill in the price of a picked one
+    let productSuggestions = [];
+    let productLookupTimer = null;
+    document.addEventListener('input', function (event) {
+        const input = event.target;
+        if (input.getAttribute('list') !== 'productOptions') {
+            return;
+        }
+
+        const picked = productSuggestions.find(product => product.name === input.value);
+        const priceInput = input.closest('.product-entry')?.querySelector('[name$="product_price[]"]');
+        if (picked && priceInput && !priceInput.value) {
+            priceInput.value = picked.price;
+        }
+
+        clearTimeout(productLookupTimer);
+        productLookupTimer = setTimeout(() => {
+            fetch(`/products?${new URLSearchParams({ q: input.value })}`)
+                .then(response => response.json())
+                .then(data => {
+                    productSuggestions = data.items || [];
+                    document.getElementById('productOptions').replaceChildren(...productSuggestions.map(product => {
+                        const option = document.createElement('option');
+                        option.value = product.name;
+                        option.label = `$${product.price} - ${product.type}`;
+                        return option;
+                    }));
+                })
+                .catch(error => console.error('Error loading products:', error));
+        }, 150);
+    });
+
     // Remove Product Entry
     document.querySelectorAll('.remove-product').forEach(button => {
         button.addEventListener('click', function () {
@@ -0,0 +1,225 @@
+// Manager dashboard: users, customers and appointments are loaded on demand
+// from the keyset-paginated JSON endpoints instead of being rendered up front.
+
+document.addEventListener('DOMContentLoaded', function () {
+    // Fetch one page of results; `after` is the cursor returned with the previous page
+    function fetchPage(url, query, after) {
+        const params = new URLSearchParams({ q: query });
+        if (after) {
+            params.set('after', after);
+        }
+        return fetch(`${url}?${params}`).then(response => {
+            if (!response.ok) {
+                throw new Error('Network response was not ok.');
+            }
+            return response.json();
+        });
+    }
+
+    // Wait until the user stops typing before searching
+    function debounce(fn, delay) {
+        let timer;
+        return function (...args) {
+            clearTimeout(timer);
+            timer = setTimeout(() => fn.apply(this, args), delay);
+        };
+    }
+
+    // Search box + result list that fills a hidden id field when a result is picked
+    function setupTypeahead({ inputId, hiddenId, resultsId, url, label }) {
+        const input = document.getElementById(inputId);
+        const hidden = document.getElementById(hiddenId);
+        const results = document.getElementById(resultsId);
+        let nextCursor = null;
+        let currentQuery = '';
+
+        function render(items, append) {
+            if (!append) {
+                results.innerHTML = '';
+            }
+            results.querySelector('.load-more')?.remove();
+
+            items.forEach(item => {
+                const entry = document.createElement('li');
+                entry.textContent = label(item);
+                entry.addEventListener('click', function () {
+                    hidden.value = item.id;
+                    input.value = label(item);
+                    results.querySelectorAll('li').forEach(li => li.classList.remove('selected'));
+                    entry.classList.add('selected');
+                });
+                results.appendChild(entry);
+            });
+
+            if (nextCursor) {
+                const more = document.createElement('li');
+                more.className = 'load-more';
+                more.textContent = 'Load more...';
+                more.addEventListener('click', () => load(true));
+                results.appendChild(more);
+            }
+        }
+
+        function load(append) {
+            fetchPage(url, currentQuery, append ? nextCursor : null)
+                .then(data => {
+                    nextCursor = data.next;
+                    render(data.items, append);
+                })
+                .catch(error => console.error('Error loading results:', error));
+        }
+
+        input.addEventListener('input', debounce(function () {
+            hidden.value = '';
+            currentQuery = input.value.trim();
+            load(false);
+        }, 250));
+
+        input.addEventListener('focus', function () {
+            if (!results.children.length) {
+                load(false);
+            }
+        });
+
+        // Don't submit the form until a result has been picked
+        input.form.addEventListener('submit', function (event) {
+            if (!hidden.value) {
+                event.preventDefault();
+                alert('Please pick an entry from the search results.');
+            }
+        });
+    }
+
+    // Users table with search and "Load More" paging
+    function setupUserTable() {
+        const search = document.getElementById('userTableSearch');
+        const body = document.getElementById('userTableBody');
+        const more = document.getElementById('userTableMore');
+        let nextCursor = null;
+
+        function addRow(user) {
+            const row = document.createElement('tr');
+            const username = document.createElement('td');
+            username.textContent = user.username;
+            const role = document.createElement('td');
+            role.textContent = user.role;
+
+            const action = document.createElement('td');
+            const form = document.createElement('form');
+            form.method = 'POST';
+            const userId = document.createElement('input');
+            userId.type = 'hidden';
+            userId.name = 'user_id';
+            userId.value = user.id;
+            const button = document.createElement('button');
+            button.type = 'submit';
+            button.name = 'delete_user';
+            button.textContent = 'Delete';
+            form.appendChild(userId);
+            form.appendChild(button);
+            action.appendChild(form);
+
+            row.appendChild(username);
+            row.appendChild(role);
+            row.appendChild(action);
+            body.appendChild(row);
+        }
+
+        function load(append) {
+            fetchPage('/manager_dashboard/users', search.value.trim(), append ? nextCursor : null)
+                .then(data => {
+                    if (!append) {
+                        body.innerHTML = '';
+                    }
+                    data.items.forEach(addRow);
+                    nextCursor = data.next;
+                    more.hidden = !nextCursor;
+                })
+                .catch(error => console.error('Error loading users:', error));
+        }
+
+        search.addEventListener('input', debounce(() => load(false), 250));
+        more.addEventListener('click', () => load(true));
+        load(false);
+    }
+
+    // Revenue and workload report for a date range, grouped by installer, product type or day
+    function setupReports() {
+        const start = document.getElementById('reportStart');
+        const end = document.getElementById('reportEnd');
+        const group = document.getElementById('reportGroup');
+        const keyHeader = document.getElementById('reportKeyHeader');
+        const body = document.getElementById('reportBody');
+        const keyLabels = { installer: 'Installer', product_type: 'Product Type', day: 'Day' };
+        const keyOf = {
+            installer: item => item.installer_name,
+            product_type: item => item.product_type,
+            day: item => item.day
+        };
+
+        function load() {
+            const params = new URLSearchParams();
+            if (start.value) {
+                params.set('start', start.value);
+            }
+            if (end.value) {
+                params.set('end', end.value);
+            }
+            fetch(`/manager_dashboard/reports/${group.value}?${params}`)
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error('Network response was not ok.');
+                    }
+                    return response.json();
+                })
+                .then(data => {
+                    start.value = data.start;
+                    end.value = data.end;
+                    keyHeader.textContent = keyLabels[group.value];
+                    body.innerHTML = '';
+                    data.items.forEach(item => {
+                        const row = document.createElement('tr');
+                        [keyOf[group.value](item), item.appointments, item.hours.toFixed(1),
+                         item.product_revenue.toFixed(2), item.job_revenue.toFixed(2), item.revenue.toFixed(2)]
+                            .forEach(value => {
+                                const cell = document.createElement('td');
+                                cell.textContent = value;
+                                row.appendChild(cell);
+                            });
+                        body.appendChild(row);
+                    });
+                })
+                .catch(error => console.error('Error loading report:', error));
+        }
+
+        [start, end, group].forEach(input => input.addEventListener('change', load));
+        load();
+    }
+
+    setupUserTable();
+    setupReports();
+
+    setupTypeahead({
+        inputId: 'updateUserSearch',
+        hiddenId: 'updateUserId',
+        resultsId: 'updateUserResults',
+        url: '/manager_dashboard/users',
+        label: user => `${user.username} (${user.role})`
+    });
+
+    setupTypeahead({
+        inputId: 'customerSearch',
+        hiddenId: 'customerId',
+        resultsId: 'customerResults',
+        url: '/manager_dashboard/customers',
+        label: customer => `${customer.first_name} ${customer.last_name} - ${customer.phone_number}`
+    });
+
+    setupTypeahead({
+        inputId: 'appointmentSearch',
+        hiddenId: 'appointmentId',
+        resultsId: 'appointmentResults',
+        url: '/manager_dashboard/appointments',
+        label: appointment => `Appointment #${appointment.id} - ${appointment.start.replace('T', ' ')} - ${appointment.customer}`
+    });
+});
@@ -0,0 +1,64 @@
+import json
+import zlib
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+
+# Serialize to compact UTF-8 JSON bytes, using orjson when it is installed
+def dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':')).encode()
+
+
+# Encode an iterable of batches of items as one JSON array, one chunk per batch
+def iter_json_array(batches):
+    first = True
+    yield b'['
+    for batch in batches:
+        if not batch:
+            continue
+        chunk = b','.join(dumps(item) for item in batch)
+        yield chunk if first else b',' + chunk
+        first = False
+    yield b']'
+
+
+# Pick the best content coding the client accepts: brotli if available, then gzip
+def negotiate_encoding(accept_encodings):
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+# Compress a stream of chunks, flushing after each one so the client receives data as it is produced
+def compress_chunks(chunks, encoding, level=6):
+    if encoding is None:
+        yield from chunks
+        return
+
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=min(level, 11))
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
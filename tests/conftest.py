@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+from flask_migrate import upgrade
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app as application  # noqa: E402
+
+
+# The application bound to a new database in tmp_path, migrated to head, inside an app context
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    flask_app = application.create_app({
+        'SECRET_KEY': 'test', 'TESTING': True, 'TEMPLATE_CACHE_DIR': str(tmp_path / 'jinja_cache'),
+    })
+    with flask_app.app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+        yield flask_app
+        application.db.session.remove()
+        application.db.engine.dispose()
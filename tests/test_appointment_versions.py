@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as application
+
+START = datetime(2024, 3, 4, 9)
+
+
+@pytest.fixture
+def client(app):
+    db = application.db
+    user = application.User(username='sales', role='Sales')
+    user.set_password('secret')
+    customer = application.Customer(first_name='Ada', last_name='Lovelace', phone_number='555-0100')
+    vehicle = application.Vehicle(year=2019, make='Toyota', model='Tacoma', owner=customer)
+    product = application.Product(name='Amplifier 1', type='standard', price=199.0)
+    db.session.add_all([user, customer, vehicle, product])
+    db.session.add(application.Appointment(
+        start_time=START, end_time=START + timedelta(hours=1), customer=customer, vehicle=vehicle,
+        product=product, install_type='standard'
+    ))
+    db.session.commit()
+
+    client = app.test_client()
+    client.post('/login/sales', data={'username': 'sales', 'password': 'secret'})
+    return client
+
+
+def edit_form(**fields):
+    return {'start_time': START.isoformat(), 'duration': '2', 'installation_type': 'standard', 'notes': '', **fields}
+
+
+def move_form(**fields):
+    return {'start_time': START.isoformat(), 'end_time': (START + timedelta(hours=2)).isoformat(), **fields}
+
+
+# Without the version the client saw, a write could silently overwrite a newer one
+@pytest.mark.parametrize('path, form', [('/appointment/edit/1', edit_form), ('/appointment/move/1', move_form)])
+@pytest.mark.parametrize('version', [None, '', 'latest'])
+def test_write_without_version_is_rejected(client, path, form, version):
+    fields = {} if version is None else {'version': version}
+    response = client.post(path, data=form(**fields))
+    assert response.status_code == 400
+    assert application.db.session.get(application.Appointment, 1).version == 1
+
+
+@pytest.mark.parametrize('path, form', [('/appointment/edit/1', edit_form), ('/appointment/move/1', move_form)])
+def test_write_checks_the_version(client, path, form):
+    response = client.post(path, data=form(version='1'))
+    assert response.status_code == 200 and response.json['version'] == 2
+
+    response = client.post(path, data=form(version='1'))
+    assert response.status_code == 409 and response.json['version'] == 2
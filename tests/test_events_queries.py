@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import app as application
+
+START = datetime(2024, 3, 4, 8)
+# The archive boundary lookup, then the appointment and job projections of the hot tables
+QUERIES_PER_REQUEST = 3
+
+
+# Book `count` one-hour appointments, each with two installation jobs
+def add_appointments(count):
+    db = application.db
+    customer = application.Customer(first_name='Ada', last_name='Lovelace', phone_number='555-0100')
+    vehicle = application.Vehicle(year=2019, make='Toyota', model='Tacoma', owner=customer)
+    product = application.Product(name='Amplifier 1', type='standard', price=199.0)
+    installer = application.Installer(name='Installer 1', skill_level='expert')
+    db.session.add_all([customer, vehicle, product, installer])
+    for index in range(count):
+        start = START + timedelta(hours=index)
+        appointment = application.Appointment(
+            start_time=start, end_time=start + timedelta(hours=1), customer=customer, vehicle=vehicle,
+            product=product, installer=installer, install_type='standard', comments=f'Booking {index}'
+        )
+        db.session.add(appointment)
+        db.session.add_all([
+            application.InstallationJob(job_details='Run power wire', price=50.0, appointment=appointment),
+            application.InstallationJob(job_details='Tune DSP', price=75.0, appointment=appointment),
+        ])
+    db.session.commit()
+    db.session.expire_all()
+
+
+# Statements sent to the database while serializing the whole booked window
+def count_event_queries(count):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = application.db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        events = application.retrieve_calendar_events(START, START + timedelta(hours=count))
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert len(events) == count
+    assert all(len(item['extendedProps']['installation_jobs']) == 2 for item in events)
+    return len(statements)
+
+
+@pytest.mark.parametrize('count', [1, 10, 100])
+def test_event_serialization_uses_fixed_number_of_queries(app, count):
+    add_appointments(count)
+    assert count_event_queries(count) == QUERIES_PER_REQUEST
+
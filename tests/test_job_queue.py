@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+import app as application
+import job_queue
+
+NOW = datetime(2024, 3, 4, 8)
+LEASE_SECONDS = 300
+
+
+def queue_job(app, max_attempts):
+    app.config['JOB_MAX_ATTEMPTS'] = max_attempts
+    application.enqueue_job('booking_confirmation', {'appointment_id': 1}, run_at=NOW)
+    application.db.session.commit()
+
+
+def claim(now):
+    with application.db.engine.begin() as connection:
+        return job_queue.claim_job(connection, now, LEASE_SECONDS)
+
+
+def stored_job():
+    application.db.session.expire_all()
+    return application.db.session.execute(select(application.BackgroundJob)).scalar_one()
+
+
+# A job whose worker dies before reporting back is claimed again once its lease runs out
+def test_expired_lease_is_reclaimed_while_attempts_remain(app):
+    queue_job(app, max_attempts=3)
+    first = claim(NOW)
+    assert claim(NOW + timedelta(seconds=LEASE_SECONDS - 1)) is None
+
+    second = claim(NOW + timedelta(seconds=LEASE_SECONDS + 1))
+    assert (second.id, second.attempts) == (first.id, 2)
+
+
+# A poison job that takes its worker down on every attempt fails instead of running forever
+def test_job_losing_its_worker_on_every_attempt_ends_up_failed(app):
+    queue_job(app, max_attempts=3)
+    now = NOW
+    for attempt in range(1, 4):
+        job = claim(now)
+        assert job.attempts == attempt
+        now += timedelta(seconds=LEASE_SECONDS + 1)
+
+    assert claim(now) is None
+    job = stored_job()
+    assert (job.status, job.attempts, job.last_error) == (job_queue.FAILED, 3, 'Lease expired')
+    assert job.locked_until is None and job.finished_at == now
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+import app as application
+from benchmarks.seed_data import generate_data
+from benchmarks.startup_benchmark import measure_startup
+
+# Cold start (interpreter, import, create_app and GET /) is well under a second on a laptop;
+# the budget only has to catch startup that reads the data again
+STARTUP_BUDGET_SECONDS = 5.0
+
+
+@pytest.fixture
+def seeded_app(app):
+    generate_data(application, customers=200, products=50, appointments=2000)
+    application.db.session.remove()
+    return app
+
+
+# Building the application must not touch the database, whatever it holds
+def test_create_app_runs_no_sql(seeded_app):
+    statements, connections = [], []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def record_connection(dbapi_connection, connection_record):
+        connections.append(dbapi_connection)
+
+    event.listen(Engine, 'before_cursor_execute', record_statement)
+    event.listen(Pool, 'connect', record_connection)
+    try:
+        application.create_app({'SECRET_KEY': 'test', 'TESTING': True})
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record_statement)
+        event.remove(Pool, 'connect', record_connection)
+
+    assert statements == []
+    assert connections == []
+
+
+def test_cold_start_within_budget(seeded_app):
+    timing, = measure_startup(seeded_app.config['SQLALCHEMY_DATABASE_URI'], runs=1)
+    assert timing['status'] == 200
+    assert timing['total'] < STARTUP_BUDGET_SECONDS